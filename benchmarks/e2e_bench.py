@@ -0,0 +1,218 @@
+"""
+Offline end-to-end benchmark of POST /research
+
+Starts the local Tavily/Groq/website fakes from benchmarks/fakes.py and
+runs main.py under uvicorn against them. It then fires research requests
+at increasing concurrency and reports throughput, p50/p95/p99 latency
+and per-stage upstream time. Results are written to JSON so runs can be
+compared across commits.
+
+Usage:
+    python benchmarks/e2e_bench.py --concurrency 1,4,16 --requests 32
+    python benchmarks/e2e_bench.py --cold --groq-latency 1.5 --error-rate 0.05
+    python benchmarks/e2e_bench.py --cold --js-rate 0.3 --scrape-strategy race
+    python benchmarks/e2e_bench.py --workers 4 --store kv
+
+By default caches start empty but warm up during the run, like
+production. --cold disables every cache so each request runs the full
+pipeline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import FakeServers, FakeConfig, StageRecorder, free_port
+
+ROOT = Path(__file__).resolve().parent.parent
+
+COLD_ENV = {
+    "SCRAPE_CACHE_TTL": "0",
+    "LLM_CACHE_TTL": "0",
+    "RESULT_CACHE_TTL": "0",
+    "KNOWLEDGE_TTL": "0",
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def start_app(env: Dict[str, str], port: int, workers: int = 1) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def wait_healthy(base_url: str, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.time() < deadline:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("App did not become healthy")
+
+
+async def run_level(base_url: str, concurrency: int, requests: int, timeout: float) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        async def one(i: int):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/research", json={"query": f"benchmark query c{concurrency} n{i}"})
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    config = FakeConfig(
+        tavily_latency=args.tavily_latency,
+        groq_latency=args.groq_latency,
+        site_latency=args.site_latency,
+        firecrawl_latency=args.firecrawl_latency,
+        jitter=args.jitter,
+        js_rate=args.js_rate,
+        error_rate=args.error_rate,
+    )
+    servers = FakeServers(config)
+    servers.start()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {**servers.env(), "CACHE_DIR": cache_dir, **(COLD_ENV if args.cold else {})}
+        if args.scrape_strategy == "http":
+            env["FIRECRAWL_API_KEY"] = ""
+        else:
+            env["SCRAPE_STRATEGY"] = args.scrape_strategy
+        env["STORE_BACKEND"] = args.store
+        if args.site_index:
+            env.update(servers.site_index_env(os.path.join(cache_dir, "official_sites.json")))
+        app = start_app(env, port, args.workers)
+        try:
+            await wait_healthy(base_url)
+            levels = []
+            for concurrency in args.concurrency:
+                before = servers.recorder.snapshot()
+                level = await run_level(base_url, concurrency, args.requests, args.timeout)
+                level["stages"] = StageRecorder.diff(servers.recorder.snapshot(), before)
+                levels.append(level)
+                print_level(level)
+        finally:
+            app.terminate()
+            app.wait(timeout=10)
+            servers.stop()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "cold": args.cold,
+        "scrape_strategy": args.scrape_strategy,
+        "site_index": args.site_index,
+        "store": args.store,
+        "workers": args.workers,
+        "fakes": config.model_dump(),
+        "levels": levels,
+    }
+
+
+def print_level(level: Dict[str, Any]):
+    print(f"\nconcurrency={level['concurrency']:<3} requests={level['requests']:<4} errors={level['errors']:<3} "
+          f"throughput={level['throughput_rps']} req/s  "
+          f"p50={level['p50_ms']}ms p95={level['p95_ms']}ms p99={level['p99_ms']}ms")
+    for stage in ("search", "scrape", "firecrawl", "extract", "analyze", "recommend"):
+        s = level["stages"].get(stage)
+        if s:
+            print(f"  {stage:<10} {s['requests']:>5} calls  {s['mean_ms']:>8} ms/call  {s['seconds']:>8} s total  {s['errors']} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,2,4,8", type=lambda v: [int(x) for x in v.split(",")])
+    parser.add_argument("--requests", type=int, default=16, help="Requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--tavily-latency", type=float, default=0.4)
+    parser.add_argument("--groq-latency", type=float, default=0.8)
+    parser.add_argument("--site-latency", type=float, default=0.3)
+    parser.add_argument("--firecrawl-latency", type=float, default=1.5)
+    parser.add_argument("--js-rate", type=float, default=0.0, help="Fraction of vendor sites that need JavaScript")
+    parser.add_argument("--scrape-strategy", choices=["http", "fallback", "race"], default="http",
+                        help="http: no Firecrawl; otherwise SCRAPE_STRATEGY")
+    parser.add_argument("--site-index", action="store_true",
+                        help="Resolve official sites from a local index instead of searching")
+    parser.add_argument("--store", choices=["memory", "sqlite", "kv"], default="sqlite",
+                        help="STORE_BACKEND for results and caches (kv uses a local stand-in)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Fraction of latency, uniform +/-")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--cold", action="store_true", help="Disable all caches")
+    parser.add_argument("--out", help="JSON output path (default benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    out = Path(args.out) if args.out else (
+        ROOT / "benchmarks" / "results" / f"{datetime.now():%Y%m%d-%H%M%S}-{results['commit']}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+    print(f"\nSaved results to {out}")
+
+
+if __name__ == "__main__":
+    main()
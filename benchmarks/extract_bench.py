@@ -0,0 +1,159 @@
+"""
+Micro-benchmark: scraper HTML extraction, legacy BeautifulSoup vs src.extract
+
+Usage:
+    python benchmarks/extract_bench.py [--fixtures DIR] [--runs N] [--json OUT]
+
+Every *.html file in the fixtures directory is extracted with both
+engines. Reported per fixture: mean/min wall time and peak memory. Memory
+is how far peak RSS rises while a fresh subprocess extracts the page
+once, so lxml's C-side tree counts as well as the Python heap. Drop real saved pages into a directory and pass
+--fixtures to compare on them.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import resource
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup
+from src.extract import extract_text
+
+
+def legacy_extract(html: bytes, max_chars: int) -> str:
+    """The scraper's original extractor: full html.parser tree, then slice"""
+    soup = BeautifulSoup(html.decode("utf-8", errors="replace"), "html.parser")
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside", "form"]):
+        tag.decompose()
+    text = soup.get_text(separator=" ", strip=True)
+    text = re.sub(r'\s+', ' ', text)
+    return text[:max_chars]
+
+
+def capped_extract(html: bytes, max_chars: int) -> str:
+    max_bytes = int(os.getenv("SCRAPE_MAX_BYTES", str(1024 * 1024)))
+    return extract_text(html[:max_bytes], max_chars)
+
+
+ENGINES = {
+    "legacy": legacy_extract,
+    "extract": capped_extract,
+}
+
+
+def _status_kb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return float(line.split()[1])
+    raise OSError(f"{field} not in /proc/self/status")
+
+
+def max_rss_kb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss / 1024 if sys.platform == "darwin" else rss
+
+
+def reset_peak() -> float:
+    """Start peak RSS over from the current RSS; returns the baseline in KB.
+
+    A child's ru_maxrss starts at its parent's peak, which the benchmark
+    has already pushed past a single parse. Linux can reset the peak
+    (VmHWM) through clear_refs; elsewhere ru_maxrss is the best there is.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return _status_kb("VmRSS")
+    except OSError:
+        return max_rss_kb()
+
+
+def peak_kb() -> float:
+    try:
+        return _status_kb("VmHWM")
+    except OSError:
+        return max_rss_kb()
+
+
+def peak_in_child(engine: str, path: Path, max_chars: int) -> float:
+    """KB the peak RSS of a fresh interpreter grows by while engine extracts path once"""
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", engine, str(path), "--max-chars", str(max_chars)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return float(out.strip())
+
+
+def child(engine: str, path: str, max_chars: int):
+    # Imports and the file are loaded before the baseline, so only the parse counts
+    html = Path(path).read_bytes()
+    before = reset_peak()
+    ENGINES[engine](html, max_chars)
+    print(peak_kb() - before)
+
+
+def measure(name: str, path: Path, html: bytes, max_chars: int, runs: int) -> dict:
+    fn = ENGINES[name]
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        text = fn(html, max_chars)
+        timings.append(time.perf_counter() - start)
+
+    peak = peak_in_child(name, path, max_chars)
+
+    return {
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 2),
+        "min_ms": round(min(timings) * 1000, 2),
+        "peak_kb": round(peak, 1),
+        "chars": len(text),
+        "preview": text[:80],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=str(Path(__file__).parent / "fixtures"))
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-chars", type=int, default=5000)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--child", nargs=2, metavar=("ENGINE", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.max_chars)
+        return
+
+    fixtures = sorted(Path(args.fixtures).glob("*.html"))
+    if not fixtures:
+        sys.exit(f"No *.html fixtures in {args.fixtures}")
+
+    results = {}
+    print(f"{'fixture':<22}{'engine':<10}{'mean ms':>10}{'min ms':>10}{'peak KB':>10}{'chars':>8}")
+    for path in fixtures:
+        html = path.read_bytes()
+        results[path.name] = {"bytes": len(html)}
+        for name, fn in ENGINES.items():
+            stats = measure(name, path, html, args.max_chars, args.runs)
+            results[path.name][name] = stats
+            print(f"{path.name:<22}{name:<10}{stats['mean_ms']:>10}{stats['min_ms']:>10}{stats['peak_kb']:>10}{stats['chars']:>8}")
+        legacy, new = results[path.name]["legacy"], results[path.name]["extract"]
+        print(f"{'':<22}{'speedup':<10}{legacy['mean_ms'] / max(new['mean_ms'], 0.01):>9.1f}x"
+              f"{'':>10}{legacy['peak_kb'] / max(new['peak_kb'], 0.1):>9.1f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
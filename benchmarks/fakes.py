@@ -0,0 +1,455 @@
+"""
+Local stand-ins for the external services the research pipeline calls.
+
+- Tavily search API       POST /search
+- Groq chat completions   POST /openai/v1/chat/completions (incl. stream=True)
+- Vendor websites         GET  /site/{tool}/..., GET /article/{n}, GET /robots.txt
+- Firecrawl scrape API    POST /v2/scrape (and the older /v1/scrape)
+
+Each fake sleeps for latency ± jitter seconds and fails error_rate of
+requests. Every request is recorded per pipeline stage (search, scrape,
+extract, analyze, recommend, firecrawl) so a benchmark can break time
+down by stage. js_rate of the vendor sites serve an empty JavaScript shell
+that only Firecrawl can read. Landing pages link to pricing, docs and
+GitHub pages under /site/{tool}/ for the crawler to follow.
+
+    servers = FakeServers(FakeConfig(groq_latency=0.8))
+    servers.start()
+    env = servers.env()   # TAVILY_API_BASE_URL, GROQ_BASE_URL, FIRECRAWL_API_URL, API keys
+    ...
+    servers.stop()
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+TOOLS = [
+    "Supabase", "Neon", "PlanetScale", "Firebase", "Railway", "Turso", "Xata",
+    "CockroachDB", "MongoDB Atlas", "Appwrite", "Convex", "Fauna", "Upstash", "Render",
+]
+
+
+class FakeConfig(BaseModel):
+    tavily_latency: float = 0.4
+    groq_latency: float = 0.8
+    site_latency: float = 0.3
+    firecrawl_latency: float = 1.5
+    jitter: float = 0.2
+    # Fraction of vendor sites that need JavaScript to render
+    js_rate: float = 0.0
+    error_rate: float = 0.0
+    # Streamed Groq replies send the first token after this share of groq_latency
+    # and spread the rest over the tokens; total time matches a non-streamed reply
+    ttft_fraction: float = 0.3
+    # Minimum seconds between streamed Groq chunks
+    token_interval: float = 0.01
+    # Small models (ids with "8b" or "instant") answer in this share of groq_latency
+    small_latency_factor: float = 0.3
+    # Share of small-model analysis replies that come back without JSON
+    small_error_rate: float = 0.0
+    # Fraction of vendor sites whose landing page states pricing, license and SDKs outright
+    facts_rate: float = 0.5
+    seed: int = 7
+
+
+class StageRecorder:
+    """Thread-safe per-stage request counts and upstream time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, stage: str, seconds: float, error: bool = False):
+        with self._lock:
+            s = self._stages.setdefault(stage, {"requests": 0, "errors": 0, "seconds": 0.0})
+            s["requests"] += 1
+            s["errors"] += int(error)
+            s["seconds"] += seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._stages.items()}
+
+    @staticmethod
+    def diff(after: Dict[str, Dict[str, float]], before: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for stage, s in after.items():
+            b = before.get(stage, {"requests": 0, "errors": 0, "seconds": 0.0})
+            requests = s["requests"] - b["requests"]
+            seconds = s["seconds"] - b["seconds"]
+            out[stage] = {
+                "requests": requests,
+                "errors": s["errors"] - b["errors"],
+                "seconds": round(seconds, 3),
+                "mean_ms": round(seconds / requests * 1000, 1) if requests else 0.0,
+            }
+        return out
+
+
+def _pick(seed_text: str, items: List[str], k: int) -> List[str]:
+    rng = random.Random(hashlib.sha256(seed_text.encode()).hexdigest())
+    return rng.sample(items, k)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip("-")
+
+
+def _is_small(model: str) -> bool:
+    return "8b" in model or "instant" in model
+
+
+def _needs_js(slug: str, rate: float) -> bool:
+    # Stable per site, so per-host backend stats have something to learn
+    return int(hashlib.sha256(slug.encode()).hexdigest(), 16) % 1000 < rate * 1000
+
+
+def _states_facts(slug: str, rate: float) -> bool:
+    return int(hashlib.sha256(f"facts:{slug}".encode()).hexdigest(), 16) % 1000 < rate * 1000
+
+
+JS_SHELL = (
+    "<html><head><title>{name}</title></head>"
+    "<body><div id=\"root\"></div><script src=\"/static/app.js\"></script></body></html>"
+)
+
+REPO_PAGE = (
+    "<html><head><title>GitHub - {tool}/{tool}</title></head><body><article>"
+    "<h1>{name}</h1><p>{name} is open source under the MIT license. Contributions are welcome: "
+    "open an issue or a pull request, and read CONTRIBUTING.md before you start.</p>"
+    "<h2>Install</h2><pre><code>npm install {tool}</code></pre><pre><code>pip install {tool}</code></pre>"
+    "</article></body></html>"
+)
+
+
+class Fakes:
+    def __init__(self, config: FakeConfig, recorder: StageRecorder):
+        self.config = config
+        self.recorder = recorder
+        self.rng = random.Random(config.seed)
+        self.base_url = ""
+        self._landing = (FIXTURES / "vendor_landing.html").read_text()
+        self._facts_landing = (FIXTURES / "sdk_landing.html").read_text()
+        self._pricing = (FIXTURES / "pricing_table.html").read_text()
+        self._docs = (FIXTURES / "docs_article.html").read_text()
+
+    async def _delay(self, latency: float) -> bool:
+        """Sleep like the real service; True if this request should fail"""
+        jitter = self.rng.uniform(-self.config.jitter, self.config.jitter) * latency
+        await asyncio.sleep(max(0.0, latency + jitter))
+        return self.rng.random() < self.config.error_rate
+
+    # Tavily
+
+    def tavily_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/search")
+        async def search(request: Request):
+            body = await request.json()
+            query = body.get("query", "")
+            start = time.perf_counter()
+            failed = await self._delay(self.config.tavily_latency)
+            self.recorder.record("search", time.perf_counter() - start, failed)
+            if failed:
+                return JSONResponse({"detail": "Fake Tavily error"}, status_code=500)
+
+            if query.endswith(" official website"):
+                tool = query.removesuffix(" official website")
+                results = [{
+                    "title": f"{tool} - Official site",
+                    "url": f"{self.base_url}/site/{_slug(tool)}/",
+                    "content": f"{tool} is a developer platform.",
+                }]
+            else:
+                tools = _pick(query, TOOLS, 5)
+                results = [{
+                    "title": f"Top {len(tools)} tools: {query}",
+                    "url": f"{self.base_url}/article/{i}?q={_slug(query)}",
+                    "content": "Comparison of " + ", ".join(tools) + ".",
+                } for i in range(body.get("max_results") or 5)]
+            return {"query": query, "results": results, "response_time": 0.1}
+
+        return app
+
+    # Groq
+
+    @staticmethod
+    def _stage_for(messages: List[Dict[str, Any]]) -> str:
+        system = messages[0].get("content", "") if messages else ""
+        if "Extract specific tool" in system:
+            return "extract"
+        if "analyzing" in system:
+            return "analyze"
+        return "recommend"
+
+    def _completion_text(self, stage: str, messages: List[Dict[str, Any]]) -> str:
+        user = messages[-1].get("content", "") if messages else ""
+        if stage == "extract":
+            return "\n".join(_pick(user, TOOLS, 5))
+        if stage == "analyze":
+            names = re.findall(r'^### Tool \d+: (.+)$', user, re.MULTILINE)
+            single = re.search(r'^Tool: (.+)$', user, re.MULTILINE)
+            analyses = [{
+                "name": name,
+                "pricing_model": "Freemium",
+                "is_open_source": True,
+                "tech_stack": ["Postgres", "REST"],
+                "description": f"{name} is a hosted developer platform.",
+                "api_available": True,
+                "language_support": ["JavaScript", "Python"],
+                "integration_capabilities": ["GitHub", "Vercel"],
+            } for name in (names or [single.group(1) if single else "Tool"])]
+            return json.dumps(analyses if names else analyses[0])
+        return "## 🏆 Top Pick\n" + "Fake recommendation text for benchmarking. " * 20
+
+    def groq_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/openai/v1/chat/completions")
+        async def completions(request: Request):
+            body = await request.json()
+            messages = body.get("messages", [])
+            stage = self._stage_for(messages)
+            start = time.perf_counter()
+            streamed = bool(body.get("stream"))
+            small = _is_small(body.get("model") or "")
+            latency = self.config.groq_latency * (self.config.small_latency_factor if small else 1.0)
+            first_token = self.config.ttft_fraction if streamed else 1.0
+            failed = await self._delay(latency * first_token)
+            if failed:
+                self.recorder.record(stage, time.perf_counter() - start, True)
+                return JSONResponse(
+                    {"error": {"message": "Rate limit reached", "type": "tokens"}},
+                    status_code=429,
+                    headers={"retry-after": "1"}
+                )
+
+            text = self._completion_text(stage, messages)
+            if small and stage == "analyze" and self.rng.random() < self.config.small_error_rate:
+                text = "Here is a summary: the tool offers a free tier and paid plans."
+            prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+            completion_tokens = len(text) // 4
+            base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": body.get("model")}
+
+            if not streamed:
+                self.recorder.record(stage, time.perf_counter() - start)
+                return {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                }
+
+            tokens = re.findall(r'\S+\s*', text)
+            interval = max(
+                self.config.token_interval,
+                latency * (1 - self.config.ttft_fraction) / max(len(tokens), 1)
+            )
+
+            async def chunks():
+                for token in tokens:
+                    await asyncio.sleep(interval)
+                    chunk = {**base, "object": "chat.completion.chunk",
+                             "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                self.recorder.record(stage, time.perf_counter() - start)
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+
+        return app
+
+    # Vendor websites
+
+    def sites_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/site/{tool}/{path:path}")
+        async def site(tool: str, path: str = ""):
+            start = time.perf_counter()
+            failed = await self._delay(self.config.site_latency)
+            self.recorder.record("scrape", time.perf_counter() - start, failed)
+            if failed:
+                return HTMLResponse("<h1>Server error</h1>", status_code=500)
+            name = tool.replace("-", " ").title()
+            if _needs_js(tool, self.config.js_rate):
+                return HTMLResponse(JS_SHELL.format(name=name))
+            headers = {"ETag": f'"{tool}-{path.strip("/") or "home"}-v1"'}
+            if path.startswith("pricing"):
+                return HTMLResponse(self._pricing.replace("Vercelish", name), headers=headers)
+            if path.startswith(("docs", "developer")):
+                return HTMLResponse(self._docs.replace("Neonish", name), headers=headers)
+            if path.startswith("github"):
+                return HTMLResponse(REPO_PAGE.format(name=name, tool=tool), headers=headers)
+            landing = self._facts_landing if _states_facts(tool, self.config.facts_rate) else self._landing
+            # Site-relative and GitHub links point back into this fake site
+            landing = landing.replace('href="/', f'href="/site/{tool}/').replace("Acme DB", name)
+            landing = re.sub(r'href="https://github\.com/[^"]*"', f'href="/site/{tool}/github"', landing)
+            return HTMLResponse(landing, headers=headers)
+
+        @app.get("/robots.txt")
+        async def robots():
+            return PlainTextResponse("User-agent: *\nDisallow: /private/\n")
+
+        @app.get("/article/{n}")
+        async def article(n: int, q: str = ""):
+            start = time.perf_counter()
+            failed = await self._delay(self.config.site_latency)
+            self.recorder.record("scrape", time.perf_counter() - start, failed)
+            if failed:
+                return HTMLResponse("<h1>Server error</h1>", status_code=500)
+            tools = _pick(q, TOOLS, 5)
+            items = "".join(f"<h2>{i}. {t}</h2><p>{t} is a great choice for startups.</p>" for i, t in enumerate(tools, 1))
+            return HTMLResponse(f"<html><head><title>Best tools</title></head><body><article>{items}</article></body></html>")
+
+        return app
+
+    # Firecrawl
+
+    def firecrawl_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v2/scrape")
+        @app.post("/v1/scrape")
+        async def scrape(request: Request):
+            body = await request.json()
+            url = body.get("url", "")
+            start = time.perf_counter()
+            failed = await self._delay(self.config.firecrawl_latency)
+            self.recorder.record("firecrawl", time.perf_counter() - start, failed)
+            if failed:
+                return JSONResponse({"success": False, "error": "Fake Firecrawl error"}, status_code=500)
+
+            match = re.search(r'/site/([^/]+)/', url)
+            name = match.group(1).replace("-", " ").title() if match else "Page"
+            # Like the real API, links come back as absolute markdown links
+            site = f"{self.base_url}/site/{match.group(1)}" if match else self.base_url
+            markdown = (
+                f"# {name}\n\n[Pricing]({site}/pricing) · [Docs]({site}/docs)\n\n"
+                f"{name} is a developer platform with a generous free tier.\n\n"
+                "## Pricing\n\n- Free: hobby projects\n- Pro: $25/month\n- Enterprise: custom\n\n"
+                "## Open source\n\nApache 2.0 licensed. SDKs for JavaScript, Python and Go.\n"
+            )
+            return {
+                "success": True,
+                "data": {"markdown": markdown, "metadata": {"title": name, "sourceURL": url, "statusCode": 200}},
+            }
+
+        return app
+
+    # Key-value store (Upstash REST protocol)
+
+    def kv_app(self) -> FastAPI:
+        app = FastAPI()
+        data: Dict[str, Any] = {}
+
+        @app.post("/")
+        async def command(request: Request):
+            args = await request.json()
+            name, key = args[0].upper(), args[1]
+            value, expires_at = data.get(key, (None, None))
+            if expires_at is not None and expires_at <= time.time():
+                data.pop(key, None)
+                value = None
+            if name == "GET":
+                return {"result": value}
+            if name == "SET":
+                px = int(args[args.index("PX") + 1]) if "PX" in args else None
+                data[key] = (args[2], time.time() + px / 1000 if px else None)
+                return {"result": "OK"}
+            if name == "DEL":
+                return {"result": int(data.pop(key, None) is not None)}
+            return JSONResponse({"error": f"ERR unknown command '{name}'"}, status_code=400)
+
+        return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeServers:
+    """Runs the fakes on local ports in a background thread"""
+
+    def __init__(self, config: Optional[FakeConfig] = None, extra_apps: Optional[Dict[str, FastAPI]] = None):
+        self.config = config or FakeConfig()
+        self.recorder = StageRecorder()
+        self.fakes = Fakes(self.config, self.recorder)
+        self.ports = {name: free_port() for name in ("tavily", "groq", "sites", "firecrawl", "kv", *(extra_apps or {}))}
+        self.fakes.base_url = self.url("sites")
+        self._apps = {
+            "tavily": self.fakes.tavily_app(),
+            "groq": self.fakes.groq_app(),
+            "sites": self.fakes.sites_app(),
+            "firecrawl": self.fakes.firecrawl_app(),
+            "kv": self.fakes.kv_app(),
+            **(extra_apps or {}),
+        }
+        self._servers: List[uvicorn.Server] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self.ports[name]}"
+
+    def env(self) -> Dict[str, str]:
+        return {
+            "TAVILY_API_KEY": "fake",
+            "TAVILY_API_BASE_URL": self.url("tavily"),
+            "GROQ_API_KEY": "fake",
+            "GROQ_BASE_URL": self.url("groq"),
+            "FIRECRAWL_API_KEY": "fake",
+            "FIRECRAWL_API_URL": self.url("firecrawl"),
+            # Only read with STORE_BACKEND=kv
+            "KV_URL": self.url("kv"),
+            # The bundled index and domain probes point at the real internet
+            "SITE_RESOLVER": "0",
+        }
+
+    def site_index_env(self, path: str) -> Dict[str, str]:
+        """Env that resolves every fake tool from a local index instead of Tavily"""
+        Path(path).write_text(json.dumps({tool: f"{self.url('sites')}/site/{_slug(tool)}/" for tool in TOOLS}))
+        return {"SITE_RESOLVER": "1", "SITE_INDEX_FILE": path, "RESOLVER_MAX_PROBES": "0"}
+
+    def start(self):
+        self._servers = [
+            uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.ports[name], log_level="warning"))
+            for name, app in self._apps.items()
+        ]
+
+        async def serve():
+            await asyncio.gather(*(server.serve() for server in self._servers))
+
+        self._thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+        self._thread.start()
+        deadline = time.time() + 10
+        while not all(server.started for server in self._servers):
+            if time.time() > deadline:
+                raise RuntimeError("Fake servers did not start")
+            time.sleep(0.05)
+
+    def stop(self):
+        for server in self._servers:
+            server.should_exit = True
+        if self._thread:
+            self._thread.join(timeout=5)
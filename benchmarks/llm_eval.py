@@ -0,0 +1,204 @@
+"""
+Offline evaluation of LLM model tiers on saved pages
+
+Runs tool extraction and tool analysis over the HTML fixtures once per
+tier and compares latency, Groq tokens, parse failures and agreement
+with the large model's answers. Tiers are model ids (escalation off, so
+each model is measured on its own) plus "routed", LLMService as
+configured with per-method models and escalation, and "rules", which
+analyzes like the workflow: page rules first, then the routed service for
+the fields they leave open (HEURISTIC_CONFIDENCE). Extraction has no rules
+path, so "rules" extracts like "routed".
+
+Agreement per analysis is the share of fields matching the reference:
+exact for pricing_model/is_open_source/api_available, Jaccard overlap for
+list fields. Extraction agreement is the Jaccard overlap of tool names.
+
+Usage:
+    GROQ_API_KEY=... python benchmarks/llm_eval.py --repeat 3
+    python benchmarks/llm_eval.py --fake --small-error-rate 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import FakeServers, FakeConfig
+from e2e_bench import ROOT, git_commit
+
+FIXTURES = Path(__file__).parent / "fixtures"
+# Fixtures whose <title> doesn't start with the product name
+FIXTURE_TOOLS = {"docs_article.html": "Neonish", "pricing_table.html": "Vercelish"}
+EXTRACTION_FIXTURE = "listicle.html"
+EXTRACTION_QUERY = "best databases for startups"
+SCALAR_FIELDS = ("pricing_model", "is_open_source", "api_available")
+LIST_FIELDS = ("tech_stack", "language_support", "integration_capabilities")
+
+
+def tool_name(path: Path, html: str) -> str:
+    if path.name in FIXTURE_TOOLS:
+        return FIXTURE_TOOLS[path.name]
+    match = re.search(r"<title>([^<]*)", html)
+    return re.split(r"\s+[-|–]\s+", match.group(1))[0].strip() if match else path.stem
+
+
+def jaccard(a: List[str], b: List[str]) -> float:
+    a, b = {x.lower() for x in a}, {x.lower() for x in b}
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def agreement(analysis, reference) -> Optional[float]:
+    if analysis is None or reference is None:
+        return None
+    scores = [float(getattr(analysis, f) == getattr(reference, f)) for f in SCALAR_FIELDS]
+    scores += [jaccard(getattr(analysis, f), getattr(reference, f)) for f in LIST_FIELDS]
+    return sum(scores) / len(scores)
+
+
+def make_service(tier: str):
+    from src.llm import LLMService
+    service = LLMService(cache=None)
+    if tier not in ("routed", "rules"):
+        service.models = {method: tier for method in service.models}
+        service.escalate = False
+    return service
+
+
+async def rules_analysis(service, tool: str, content: str):
+    from src.heuristics import read_facts
+    threshold = float(os.getenv("HEURISTIC_CONFIDENCE", "0.7"))
+    facts = read_facts(tool, content)
+    if not facts.needs_llm(threshold):
+        return facts.to_analysis()
+    analysis = await service.analyze_tool(tool, content, use_cache=False, fields=facts.missing(threshold))
+    return facts.merge(analysis, threshold) if analysis else None
+
+
+async def measure(fn, repeat: int) -> Dict[str, Any]:
+    """Run fn repeat times; latency, tokens, failed calls, escalations and the last usable answer"""
+    from src.metrics import GROQ_TOKENS, LLM_ESCALATIONS
+    latencies, tokens, answer, failures = [], [], None, 0
+    escalations = LLM_ESCALATIONS.total()
+    for _ in range(repeat):
+        before = GROQ_TOKENS.total()
+        start = time.perf_counter()
+        result = await fn()
+        if result:
+            answer = result
+        else:
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+        tokens.append(GROQ_TOKENS.total() - before)
+    return {
+        "latency_ms": round(statistics.median(latencies) * 1000, 1),
+        "tokens": round(statistics.median(tokens)),
+        "escalations": int(LLM_ESCALATIONS.total() - escalations),
+        "failures": failures,
+        "answer": answer,
+    }
+
+
+async def evaluate(tiers: List[str], reference: str, repeat: int, max_chars: int) -> Dict[str, Any]:
+    from src.extract import extract_text
+
+    pages = {}
+    for path in sorted(FIXTURES.glob("*.html")):
+        html = path.read_bytes()
+        pages[path.name] = (tool_name(path, html.decode("utf-8", errors="replace")), extract_text(html, max_chars))
+
+    runs: Dict[str, Dict[str, Any]] = {}
+    for tier in tiers:
+        service = make_service(tier)
+        runs[tier] = {"extract": await measure(
+            lambda: service.extract_tools(EXTRACTION_QUERY, pages[EXTRACTION_FIXTURE][1], use_cache=False), repeat
+        )}
+        for name, (tool, content) in pages.items():
+            if name != EXTRACTION_FIXTURE:
+                if tier == "rules":
+                    analyze = lambda: rules_analysis(service, tool, content)
+                else:
+                    analyze = lambda: service.analyze_tool(tool, content, use_cache=False)
+                runs[tier][name] = await measure(analyze, repeat)
+
+    results = {}
+    for tier in tiers:
+        extract = runs[tier]["extract"]
+        analyses = {k: v for k, v in runs[tier].items() if k != "extract"}
+        scores = [agreement(v["answer"], runs[reference][k]["answer"]) for k, v in analyses.items()]
+        results[tier] = {
+            "extract_latency_ms": extract["latency_ms"],
+            "extract_tokens": extract["tokens"],
+            "extract_agreement": round(jaccard(extract["answer"] or [], runs[reference]["extract"]["answer"] or []), 3),
+            "analyze_latency_ms": round(statistics.mean(v["latency_ms"] for v in analyses.values()), 1),
+            "analyze_tokens": round(statistics.mean(v["tokens"] for v in analyses.values())),
+            "analyze_failures": sum(v["failures"] for v in analyses.values()),
+            "analyze_agreement": round(statistics.mean(s for s in scores if s is not None), 3) if any(s is not None for s in scores) else None,
+            "escalations": sum(v["escalations"] for v in runs[tier].values()),
+            "extract_failures": extract["failures"],
+            "tools": extract["answer"],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tiers", help="Comma-separated model ids, 'routed' and/or 'rules' (default: small, large, routed, rules)")
+    parser.add_argument("--repeat", type=int, default=1, help="Calls per fixture and tier (median reported)")
+    parser.add_argument("--max-chars", type=int, default=int(os.getenv("SCRAPE_MAX_CHARS", "5000")))
+    parser.add_argument("--fake", action="store_true", help="Use the local Groq stand-in instead of the real API")
+    parser.add_argument("--small-error-rate", type=float, default=0.0, help="With --fake: small-model replies without JSON")
+    parser.add_argument("--out", help="JSON output path (default benchmarks/results/llm-eval-<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    servers = None
+    if args.fake:
+        servers = FakeServers(FakeConfig(small_error_rate=args.small_error_rate))
+        servers.start()
+        os.environ.update(servers.env())
+
+    from src.llm import LARGE_MODEL, SMALL_MODEL
+    large = os.getenv("LLM_MODEL", LARGE_MODEL)
+    small = os.getenv("LLM_SMALL_MODEL", SMALL_MODEL)
+    tiers = args.tiers.split(",") if args.tiers else [small, large, "routed", "rules"]
+    reference = large if large in tiers else tiers[0]
+
+    try:
+        results = asyncio.run(evaluate(tiers, reference, args.repeat, args.max_chars))
+    finally:
+        if servers:
+            servers.stop()
+
+    print(f"\nreference: {reference}")
+    print(f"{'tier':<28} {'extract ms':>10} {'tok':>6} {'agree':>6}   {'analyze ms':>10} {'tok':>6} {'agree':>6} {'fail':>5} {'esc':>4}")
+    for tier, r in results.items():
+        print(f"{tier:<28} {r['extract_latency_ms']:>10} {r['extract_tokens']:>6} {r['extract_agreement']:>6}   "
+              f"{r['analyze_latency_ms']:>10} {r['analyze_tokens']:>6} {str(r['analyze_agreement']):>6} "
+              f"{r['analyze_failures']:>5} {r['escalations']:>4}")
+
+    out = Path(args.out) if args.out else (
+        ROOT / "benchmarks" / "results" / f"llm-eval-{datetime.now():%Y%m%d-%H%M%S}-{git_commit()}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "fake": args.fake,
+        "reference": reference,
+        "repeat": args.repeat,
+        "tiers": results,
+    }, indent=2))
+    print(f"\nSaved results to {out}")
+
+
+if __name__ == "__main__":
+    main()
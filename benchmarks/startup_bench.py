@@ -0,0 +1,161 @@
+"""
+Cold-start benchmark for the API
+
+Measures what a Render instance waking from idle spin-down pays before it
+can answer:
+
+- import time of main.py and each module it imports directly
+  (python -X importtime, median over fresh interpreters)
+- time from launching uvicorn to the first 200 from /health
+- time until /health reports workflow_ready (graph and clients built)
+
+It also fails if importing main loads a module from LAZY_MODULES: the HTML
+parsers are only needed once a page is scraped.
+
+The app runs against the local fakes from benchmarks/fakes.py, so no API
+keys are needed. Results are written to JSON so releases can be compared.
+
+Usage:
+    python benchmarks/startup_bench.py
+    python benchmarks/startup_bench.py --runs 10 --top 20
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import FakeServers, free_port
+from e2e_bench import ROOT, start_app, git_commit
+
+_importtime = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# Packages that must stay out of `import main`
+LAZY_MODULES = ("bs4", "lxml")
+
+
+def import_times(module: str) -> Dict[str, float]:
+    """Cumulative import ms for module and each module it imports directly, in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _importtime.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        depth = len(indent) // 2
+        # Depth 0 is the module itself; depth 1 are its direct imports
+        if depth == 1 or (depth == 0 and name == module):
+            times[name] = int(cumulative) / 1000
+    return times
+
+
+def eager_imports(module: str) -> List[str]:
+    """Modules from LAZY_MODULES already loaded after importing module, in a fresh interpreter"""
+    code = (
+        f"import sys, {module}; "
+        f"print(*sorted(m for m in sys.modules if m.split('.')[0] in {LAZY_MODULES!r}))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def startup_times(env: Dict[str, str], timeout: float) -> Dict[str, float]:
+    """Seconds from launching uvicorn to the first healthy /health and to workflow_ready"""
+    port = free_port()
+    start = time.perf_counter()
+    app = start_app(env, port)
+    healthy = ready = None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    response = client.get("/health")
+                except httpx.TransportError:
+                    time.sleep(0.01)
+                    continue
+                if response.status_code == 200:
+                    now = time.perf_counter() - start
+                    healthy = healthy or now
+                    if response.json().get("workflow_ready"):
+                        ready = now
+                        break
+                time.sleep(0.01)
+    finally:
+        app.terminate()
+        app.wait(timeout=10)
+    if healthy is None or ready is None:
+        raise RuntimeError("App did not become ready")
+    return {"first_health_s": healthy, "workflow_ready_s": ready}
+
+
+def median_by_key(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    keys = {k for run in runs for k in run}
+    return {k: round(statistics.median(run.get(k, 0.0) for run in runs), 3) for k in keys}
+
+
+def run(args) -> Dict[str, Any]:
+    eager = eager_imports("main")
+    assert not eager, f"import main loads {', '.join(eager)}; import them where they are used"
+    imports = median_by_key([import_times("main") for _ in range(args.runs)])
+    total = imports.pop("main")
+
+    servers = FakeServers()
+    servers.start()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            env = {**servers.env(), "CACHE_DIR": cache_dir}
+            startup = median_by_key([startup_times(env, args.timeout) for _ in range(args.runs)])
+    finally:
+        servers.stop()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "runs": args.runs,
+        "import_main_ms": total,
+        "imports_ms": dict(sorted(imports.items(), key=lambda kv: -kv[1])),
+        **startup,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters/servers per measurement")
+    parser.add_argument("--top", type=int, default=10, help="Slowest direct imports to print")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--out", help="JSON output path (default benchmarks/results/startup-<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    print(f"import main        {results['import_main_ms']:>8.1f} ms")
+    for name, ms in list(results["imports_ms"].items())[:args.top]:
+        print(f"  {name:<16} {ms:>8.1f} ms")
+    print(f"first /health      {results['first_health_s'] * 1000:>8.1f} ms")
+    print(f"workflow ready     {results['workflow_ready_s'] * 1000:>8.1f} ms")
+
+    out = Path(args.out) if args.out else (
+        ROOT / "benchmarks" / "results" / f"startup-{datetime.now():%Y%m%d-%H%M%S}-{results['commit']}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+    print(f"\nSaved results to {out}")
+
+
+if __name__ == "__main__":
+    main()
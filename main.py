@@ -2,11 +2,15 @@
 Developer Tools Research API
 """
 import os
+import json
+import asyncio
+import hmac
 from contextlib import asynccontextmanager
-from typing import Optional
-from fastapi import FastAPI, HTTPException
+import importlib
+from typing import Optional, Union, Annotated, TYPE_CHECKING
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, PlainTextResponse
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import uuid
@@ -14,8 +18,19 @@ from datetime import datetime
 
 load_dotenv()
 
-from src.workflow import ResearchWorkflow
-from src.models import ResearchState
+from src.models import ResearchState, CompanyInfo
+from src.http_client import HTTPPool
+from src.config import env_flag
+from src.cache import ScrapeCache, LLMCache, ResultStore, normalize_query
+from src.knowledge import KnowledgeBase
+from src.resolver import SiteIndex
+from src.jobs import JobQueue, Job, QueueFull
+from src.refresh import RefreshQueue
+from src.backends import BackendSelector
+from src import metrics, resilience
+
+if TYPE_CHECKING:
+    from src.workflow import ResearchWorkflow, EventCallback
 
 
 class ResearchRequest(BaseModel):
@@ -30,6 +45,8 @@ class ToolInfo(BaseModel):
     is_open_source: Optional[bool] = None
     language_support: list[str] = []
     integrations: list[str] = []
+    # When this tool was last researched; a refresh that reuses it keeps the old time
+    researched_at: Optional[str] = None
 
 
 class ResearchResponse(BaseModel):
@@ -38,26 +55,77 @@ class ResearchResponse(BaseModel):
     tools: list[ToolInfo]
     recommendations: str
     timestamp: str
+    partial: bool = False
+    # Set when served from the result cache; stale responses are being refreshed in the background
+    age_seconds: Optional[int] = None
+    stale: bool = False
+
+
+class BatchRequest(BaseModel):
+    queries: list[Annotated[str, Field(min_length=3, max_length=200)]] = Field(
+        ..., min_length=1, max_length=int(os.getenv("BATCH_MAX_QUERIES", "500"))
+    )
+
+
+class WarmRequest(BaseModel):
+    tools: list[str] = Field(..., min_length=1, max_length=20)
 
 
 class HealthResponse(BaseModel):
     status: str
     version: str
     groq_configured: bool
+    workflow_ready: bool
 
 
-research_cache: dict[str, ResearchResponse] = {}
+# Per-host scrape backend stats outlive individual workflows
+scrape_selector = BackendSelector()
+# Shared by every /research/batch request so concurrent batches can't multiply load
+batch_slots = asyncio.Semaphore(int(os.getenv("BATCH_CONCURRENCY", "8")))
+research_cache: Optional[ResultStore] = None
+http_pool: Optional[HTTPPool] = None
+scrape_cache: Optional[ScrapeCache] = None
+llm_cache: Optional[LLMCache] = None
+knowledge: Optional[KnowledgeBase] = None
+site_index: Optional[SiteIndex] = None
+job_queue: Optional[JobQueue] = None
+refresh_queue: Optional[RefreshQueue] = None
+# Per-tool analyses older than this are researched again when a stale result refreshes
+reuse_ttl = float(os.getenv("REFRESH_REUSE_TTL", os.getenv("KNOWLEDGE_TTL", str(7 * 86400))))
+# Built once after startup and shared by every request; see start_workflow()
+workflow_task: Optional["asyncio.Task[ResearchWorkflow]"] = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global research_cache, http_pool, scrape_cache, llm_cache, knowledge, site_index, job_queue, refresh_queue, workflow_task
     print("🚀 Starting Developer Tools Research API")
     if not os.getenv("GROQ_API_KEY"):
         print("⚠️ WARNING: GROQ_API_KEY not set!")
     else:
         print("✅ Groq API configured")
+    research_cache = ResultStore(ResearchResponse)
+    http_pool = HTTPPool()
+    scrape_cache = ScrapeCache()
+    llm_cache = LLMCache()
+    knowledge = KnowledgeBase()
+    site_index = SiteIndex()
+    workflow_task = asyncio.create_task(start_workflow())
+    job_queue = JobQueue(run_job)
+    await job_queue.start()
+    refresh_queue = RefreshQueue(refresh_research)
+    await refresh_queue.start()
     yield
     print("👋 Shutting down...")
+    workflow_task.cancel()
+    await refresh_queue.stop()
+    await job_queue.stop()
+    await http_pool.aclose()
+    scrape_cache.close()
+    llm_cache.close()
+    research_cache.close()
+    knowledge.close()
+    site_index.close()
 
 
 app = FastAPI(
@@ -76,6 +144,17 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def add_server_timing(request: Request, call_next):
+    if not env_flag("SERVER_TIMING"):
+        return await call_next(request)
+    with metrics.server_timing() as timings:
+        response = await call_next(request)
+    if timings:
+        response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+    return response
+
+
 @app.get("/", include_in_schema=False)
 async def landing_page():
     return FileResponse("static/index.html")
@@ -86,39 +165,188 @@ async def health_check():
     return HealthResponse(
         status="healthy",
         version="1.0.0",
-        groq_configured=bool(os.getenv("GROQ_API_KEY"))
+        groq_configured=bool(os.getenv("GROQ_API_KEY")),
+        workflow_ready=bool(workflow_task and workflow_task.done() and not workflow_task.cancelled()
+                            and workflow_task.exception() is None)
+    )
+
+
+@app.get("/stats", tags=["Info"])
+async def get_stats():
+    return {
+        "http_pool": http_pool.stats() if http_pool else None,
+        "scrape_cache": scrape_cache.stats() if scrape_cache else None,
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "research_cache": research_cache.stats() if research_cache else None,
+        "knowledge": knowledge.stats() if knowledge else None,
+        "resolver": site_index.stats() if site_index else None,
+        "jobs": job_queue.stats() if job_queue else None,
+        "refresh": refresh_queue.stats() if refresh_queue else None,
+        "scrape_backends": scrape_selector.stats(),
+        "circuit_breakers": resilience.breaker_stats(),
+    }
+
+
+@app.get("/metrics", tags=["Info"], response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+async def start_workflow() -> "ResearchWorkflow":
+    """Import the workflow and build its graph and clients while the server is already up.
+
+    LangGraph, Groq, Tavily and Firecrawl take most of the startup time,
+    so they load in a thread instead of delaying the first /health.
+    """
+    start = asyncio.get_running_loop().time()
+    module = await asyncio.to_thread(importlib.import_module, "src.workflow")
+    workflow = module.ResearchWorkflow(
+        http=http_pool,
+        scrape_cache=scrape_cache,
+        llm_cache=llm_cache,
+        knowledge=knowledge,
+        scrape_selector=scrape_selector,
+        site_index=site_index
     )
+    print(f"✅ Workflow ready in {asyncio.get_running_loop().time() - start:.2f}s")
+    return workflow
+
+
+async def get_workflow() -> "ResearchWorkflow":
+    # shield: a request that goes away must not cancel the shared build
+    return await asyncio.shield(workflow_task)
 
 
-@app.post("/research", response_model=ResearchResponse, tags=["Research"])
-async def research_tools(request: ResearchRequest):
+async def run_research(
+    query: str,
+    emit: Optional["EventCallback"] = None,
+    result_id: Optional[str] = None,
+    previous: Optional[ResearchResponse] = None
+) -> ResearchResponse:
+    """Run the workflow and store its result. Tools of previous that are
+    extracted again and were researched within reuse_ttl are not researched again."""
+    workflow = await get_workflow()
+    metrics.RESEARCH_IN_FLIGHT.inc()
     try:
-        workflow = ResearchWorkflow()
-        result: ResearchState = workflow.run(request.query)
-        
-        tools = [
-            ToolInfo(
-                name=c.name,
-                website=c.website,
-                description=c.description,
-                pricing_model=c.pricing_model,
-                is_open_source=c.is_open_source,
-                language_support=c.language_support,
-                integrations=c.integration_capabilities
+        result: ResearchState = await workflow.run(query, emit=emit, reuse=reusable_tools(previous))
+    finally:
+        metrics.RESEARCH_IN_FLIGHT.dec()
+    return await store_response(query, result, result_id, previous)
+
+
+def reusable_tools(previous: Optional[ResearchResponse]) -> list[CompanyInfo]:
+    if previous is None:
+        return []
+    cutoff = datetime.utcnow().timestamp() - reuse_ttl
+    return [
+        CompanyInfo(
+            name=t.name,
+            description=t.description,
+            website=t.website,
+            pricing_model=t.pricing_model,
+            is_open_source=t.is_open_source,
+            language_support=t.language_support,
+            integration_capabilities=t.integrations
+        )
+        for t in previous.tools
+        if t.researched_at and datetime.fromisoformat(t.researched_at).timestamp() > cutoff
+    ]
+
+
+async def store_response(
+    query: str,
+    result: ResearchState,
+    result_id: Optional[str] = None,
+    previous: Optional[ResearchResponse] = None
+) -> ResearchResponse:
+    now = datetime.utcnow().isoformat()
+    researched_at = {t.name: t.researched_at for t in previous.tools} if previous else {}
+    tools = [
+        ToolInfo(
+            name=c.name,
+            website=c.website,
+            description=c.description,
+            pricing_model=c.pricing_model,
+            is_open_source=c.is_open_source,
+            language_support=c.language_support,
+            integrations=c.integration_capabilities,
+            researched_at=(
+                researched_at.get(c.name) if c.name in result.reused_tools
+                else datetime.utcfromtimestamp(result.known_tools[c.name]).isoformat() if c.name in result.known_tools
+                else now
             )
-            for c in result.companies
-        ]
-        
-        response = ResearchResponse(
-            id=str(uuid.uuid4()),
-            query=request.query,
-            tools=tools,
-            recommendations=result.analysis or "No recommendations generated",
-            timestamp=datetime.utcnow().isoformat()
         )
+        for c in result.companies
+    ]
+    
+    response = ResearchResponse(
+        id=result_id or str(uuid.uuid4()),
+        query=query,
+        tools=tools,
+        recommendations=result.analysis or "No recommendations generated",
+        timestamp=now,
+        partial=result.partial
+    )
+    
+    # Empty and partial results are still retrievable by id but never served for repeats
+    await research_cache.put(response.id, query, response, index=bool(tools) and not result.partial)
+    return response
+
+
+async def refresh_research(query: str) -> bool:
+    """Re-run a query whose cached result went stale, reusing what hasn't changed"""
+    found = await research_cache.lookup_stale(query, record=False)
+    # Another worker may have refreshed it, or be refreshing it, already
+    if found and found[2]:
+        return False
+    if not await research_cache.claim_refresh(query, lease=float(os.getenv("RESEARCH_DEADLINE", "90"))):
+        return False
+    previous = found[0] if found else None
+    try:
+        await research_cache.coalesce(query, lambda: run_research(query, previous=previous))
+    finally:
+        await research_cache.release_refresh(query)
+    return True
+
+
+async def run_job(job: Job, emit: "EventCallback") -> ResearchResponse:
+    cached = await research_cache.lookup(job.query)
+    if cached:
+        return cached
+    return await run_research(job.query, emit=emit, result_id=job.id)
+
+
+@app.post(
+    "/research",
+    response_model=ResearchResponse,
+    tags=["Research"],
+    responses={202: {"model": Job, "description": "Job accepted (mode=async)"}}
+)
+async def research_tools(
+    request: ResearchRequest,
+    response: Response,
+    mode: str = Query("sync", pattern="^(sync|async)$", description="async: return 202 with a job id to poll")
+):
+    """Research a query. A repeat query is answered from the result cache; an
+    expired result is returned at once with stale=true and refreshed in the background."""
+    if mode == "async":
+        try:
+            job = job_queue.submit(request.query)
+        except QueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return JSONResponse(status_code=202, content=job.model_dump())
+    
+    try:
+        found = await research_cache.lookup_stale(request.query)
+        if found:
+            cached, age, fresh = found
+            if not fresh:
+                refresh_queue.schedule(request.query)
+            response.headers["Age"] = str(int(age))
+            return cached.model_copy(update={"age_seconds": int(age), "stale": not fresh})
         
-        research_cache[response.id] = response
-        return response
+        return await research_cache.coalesce(request.query, lambda: run_research(request.query))
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -127,11 +355,149 @@ async def research_tools(request: ResearchRequest):
         raise HTTPException(status_code=500, detail=f"Research failed: {str(e)}")
 
 
-@app.get("/research/{research_id}", response_model=ResearchResponse, tags=["Research"])
+@app.post("/research/batch", tags=["Research"])
+async def research_batch(request: BatchRequest):
+    """Research many queries at once; each distinct tool is researched only once.
+    
+    Streams newline-delimited JSON: one {"event": "result"} line per query as
+    it finishes (index gives its position in queries), then {"event": "done"}.
+    """
+    async def lines():
+        start = asyncio.get_running_loop().time()
+        # Repeated queries in the batch are researched once and reported for each index
+        indexes: dict[str, list[int]] = {}
+        cached = 0
+        for index, query in enumerate(request.queries):
+            response = await research_cache.lookup(query)
+            if response:
+                cached += 1
+                yield json.dumps({"event": "result", "index": index, "result": response.model_dump()}) + "\n"
+            else:
+                indexes.setdefault(normalize_query(query), []).append(index)
+        
+        pending = [request.queries[group[0]] for group in indexes.values()]
+        if pending:
+            workflow = await get_workflow()
+            unfinished = len(pending)
+            metrics.RESEARCH_IN_FLIGHT.inc(unfinished)
+            try:
+                async for i, result in workflow.run_batch(pending, batch_slots):
+                    unfinished -= 1
+                    metrics.RESEARCH_IN_FLIGHT.dec()
+                    response = await store_response(pending[i], result)
+                    for index in indexes[normalize_query(pending[i])]:
+                        yield json.dumps({"event": "result", "index": index, "result": response.model_dump()}) + "\n"
+            finally:
+                metrics.RESEARCH_IN_FLIGHT.dec(unfinished)
+        
+        yield json.dumps({
+            "event": "done",
+            "queries": len(request.queries),
+            "cached": cached,
+            "researched": len(pending),
+            "elapsed_s": round(asyncio.get_running_loop().time() - start, 3),
+        }) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/research/stream", tags=["Research"])
+async def research_stream(request: ResearchRequest):
+    """Server-Sent Events: search_results, tools, company, recommendations_delta, then done or error"""
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def emit(event: str, data):
+        await queue.put(sse_event(event, data))
+    
+    async def produce():
+        try:
+            cached = await research_cache.lookup(request.query)
+            response = cached or await run_research(request.query, emit=emit)
+            await emit("done", response.model_dump())
+        except Exception as e:
+            print(f"Research error: {e}")
+            await emit("error", {"detail": f"Research failed: {str(e)}"})
+        finally:
+            await queue.put(None)
+    
+    async def events():
+        task = asyncio.create_task(produce())
+        try:
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+        finally:
+            # Client went away before the run finished
+            if not task.done():
+                task.cancel()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/research/{research_id}", response_model=Union[ResearchResponse, Job], tags=["Research"])
 async def get_research(research_id: str):
-    if research_id not in research_cache:
+    """A finished result, or the status of a job submitted with mode=async"""
+    job = await asyncio.to_thread(job_queue.get, research_id)
+    if job is not None:
+        return job
+    response = await research_cache.get(research_id)
+    if response is None:
         raise HTTPException(status_code=404, detail="Research not found")
-    return research_cache[research_id]
+    return response
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        # Admin routes can delete entries and spend API quota; without a token they don't exist
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/admin/knowledge", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def list_knowledge(limit: int = 100, offset: int = 0):
+    entries = await asyncio.to_thread(knowledge.entries, limit, offset)
+    return {
+        "stats": knowledge.stats(),
+        "entries": [e.model_dump() for e in entries],
+    }
+
+
+@app.get("/admin/knowledge/{name}", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def get_knowledge(name: str):
+    entry = await asyncio.to_thread(knowledge.get, name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Tool not known")
+    return {**entry.model_dump(), "age": entry.age(), "fresh": entry.age() < knowledge.ttl}
+
+
+@app.delete("/admin/knowledge/{name}", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def invalidate_knowledge(name: str):
+    if not await asyncio.to_thread(knowledge.invalidate, name):
+        raise HTTPException(status_code=404, detail="Tool not known")
+    return {"invalidated": name}
+
+
+@app.post("/admin/knowledge/warm", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def warm_knowledge(request: WarmRequest):
+    """Re-research the given tools now and store the results"""
+    try:
+        companies = await (await get_workflow()).research_tools_by_index(request.tools, refresh=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # By position: "neon.tech" comes back as Neon
+    return {
+        "warmed": [companies[i].model_dump() for i in sorted(companies)],
+        "failed": [t for i, t in enumerate(request.tools) if i not in companies],
+    }
 
 
 @app.get("/examples", tags=["Info"])
@@ -3,6 +3,13 @@ Developer Tools Research Agent
 Free agentic AI for researching developer tools
 """
 from .models import ResearchState, CompanyInfo, CompanyAnalysis
-from .workflow import ResearchWorkflow
 
-__all__ = ["ResearchWorkflow", "ResearchState", "CompanyInfo", "CompanyAnalysis"]
\ No newline at end of file
+__all__ = ["ResearchWorkflow", "ResearchState", "CompanyInfo", "CompanyAnalysis"]
+
+
+def __getattr__(name: str):
+    # The workflow pulls in LangGraph, Groq, Tavily and Firecrawl; import it on first use
+    if name == "ResearchWorkflow":
+        from .workflow import ResearchWorkflow
+        return ResearchWorkflow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
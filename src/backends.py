@@ -0,0 +1,158 @@
+"""
+Choosing between scrape backends per host.
+
+Each (host, backend) pair keeps a moving average of success rate and
+latency. "fallback" tries backends one at a time, best first; "race"
+starts them together and keeps the first good result. Both learn from
+every attempt, so a host that only renders with JavaScript moves to
+Firecrawl first and a fast static site stops paying for a race.
+"""
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Awaitable, Optional, List, TypeVar
+
+from .metrics import Counter
+
+STRATEGIES = ("fallback", "race")
+
+# Weight of the newest attempt in the moving averages
+ALPHA = 0.2
+# Below this success rate on a host a backend sits out races there
+MIN_RACE_SUCCESS = 0.2
+# Samples needed before a host's stats override the configured order
+MIN_SAMPLES = 3
+# A backend this reliable and this much better than the rest runs alone in a race
+DOMINANT_SUCCESS = 0.9
+DOMINANT_RATIO = 3.0
+
+SCRAPE_WINS = Counter("scrape_backend_wins_total", "Pages won by each scrape backend")
+SCRAPE_ATTEMPTS = Counter("scrape_backend_attempts_total", "Scrape backend attempts by backend and result")
+
+T = TypeVar("T")
+
+# A backend fetches one URL: the scraped page, or None when it got nothing usable
+Fetch = Callable[[], Awaitable[Optional[T]]]
+
+
+class HostStats:
+    def __init__(self):
+        self.success = 1.0
+        self.latency = 1.0
+        self.samples = 0
+
+    def record(self, ok: bool, seconds: float):
+        if self.samples == 0:
+            self.success, self.latency = float(ok), seconds
+        else:
+            self.success += ALPHA * (float(ok) - self.success)
+            self.latency += ALPHA * (seconds - self.latency)
+        self.samples += 1
+
+    def score(self) -> float:
+        # Trying backends in descending success/latency minimises expected time to a good page
+        return self.success / max(self.latency, 0.05)
+
+
+class BackendSelector:
+    """Process-wide per-host backend stats and the strategy that uses them"""
+
+    def __init__(self, strategy: Optional[str] = None, max_hosts: Optional[int] = None):
+        self.strategy = strategy or os.getenv("SCRAPE_STRATEGY", "fallback")
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"SCRAPE_STRATEGY must be one of {', '.join(STRATEGIES)}")
+        self.max_hosts = max_hosts or int(os.getenv("SCRAPE_BACKEND_HOSTS", "5000"))
+        self._hosts: "OrderedDict[str, Dict[str, HostStats]]" = OrderedDict()
+        self.wins: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+
+    def _stats(self, host: str) -> Dict[str, HostStats]:
+        if host in self._hosts:
+            self._hosts.move_to_end(host)
+        else:
+            self._hosts[host] = {}
+            if len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+        return self._hosts[host]
+
+    def order(self, host: str, names: List[str]) -> List[str]:
+        """Backends best first for host; configured order until there is data"""
+        stats = self._stats(host)
+        known = all(name in stats and stats[name].samples >= MIN_SAMPLES for name in names)
+        if not known:
+            return list(names)
+        return sorted(names, key=lambda name: -stats[name].score())
+
+    async def _attempt(self, host: str, name: str, fetch: Fetch[T], good: Callable[[Optional[T]], bool]) -> Optional[T]:
+        start = time.perf_counter()
+        try:
+            content = await fetch()
+        except asyncio.CancelledError:
+            # A cancelled race loser says nothing about the backend
+            raise
+        except Exception as e:
+            print(f"❌ {name} scrape failed: {e}")
+            content = None
+
+        ok = good(content)
+        self._stats(host).setdefault(name, HostStats()).record(ok, time.perf_counter() - start)
+        SCRAPE_ATTEMPTS.inc(backend=name, result="ok" if ok else "failed")
+        if not ok:
+            self.failures[name] = self.failures.get(name, 0) + 1
+        return content if ok else None
+
+    def _won(self, name: str):
+        self.wins[name] = self.wins.get(name, 0) + 1
+        SCRAPE_WINS.inc(backend=name)
+
+    async def scrape(self, host: str, backends: Dict[str, Fetch[T]], good: Callable[[Optional[T]], bool]) -> Optional[T]:
+        names = self.order(host, list(backends))
+        if self.strategy == "race" and len(names) > 1:
+            return await self._race(host, names, backends, good)
+
+        for name in names:
+            content = await self._attempt(host, name, backends[name], good)
+            if content is not None:
+                self._won(name)
+                return content
+        return None
+
+    async def _race(self, host: str, names: List[str], backends: Dict[str, Fetch[T]], good: Callable[[Optional[T]], bool]) -> Optional[T]:
+        stats = self._stats(host)
+        known = {n: stats[n] for n in names if n in stats and stats[n].samples >= MIN_SAMPLES}
+        # Backends that keep failing on this host only run if everything else fails
+        runners = [n for n in names if n not in known or known[n].success >= MIN_RACE_SUCCESS]
+        if len(known) == len(names):
+            best = known[names[0]]
+            if best.success >= DOMINANT_SUCCESS and all(best.score() >= DOMINANT_RATIO * known[n].score() for n in names[1:]):
+                runners = names[:1]
+        reserves = [n for n in names if n not in runners]
+
+        tasks = {asyncio.create_task(self._attempt(host, n, backends[n], good)): n for n in runners}
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result() is not None:
+                        self._won(tasks[task])
+                        return task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        for name in reserves:
+            content = await self._attempt(host, name, backends[name], good)
+            if content is not None:
+                self._won(name)
+                return content
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "hosts": len(self._hosts),
+            "wins": dict(self.wins),
+            "failures": dict(self.failures),
+        }
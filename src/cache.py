@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import hashlib
+import asyncio
+from typing import Optional, Dict, Any, Callable, Awaitable, Type, TypeVar, Tuple, List
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from pydantic import BaseModel
+
+from .metrics import CACHE_LOOKUPS
+from .storage import Store, open_store
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def normalize_url(url: str) -> str:
+    """Canonical cache key: lowercase host, no fragment, default port,
+    tracking params or trailing slash, sorted query"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_")
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split()).strip(" ?!.")
+
+
+class CachedPage(BaseModel):
+    url: str
+    content: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float
+    # Absolute URL -> anchor text, for crawling on from the page
+    links: Dict[str, str] = {}
+    # og:site_name and <title>, for telling a tool's site from a namesake's
+    names: List[str] = []
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class ScrapeCache:
+    """Cache of extracted page text keyed by normalized URL, kept past its TTL for revalidation"""
+
+    def __init__(self, store: Optional[Store] = None, ttl: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("SCRAPE_CACHE_TTL", "86400"))
+        self.store = store or open_store(
+            "scrape", int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+        )
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        record = self.store.get_json(normalize_url(url))
+        return CachedPage.model_validate(record) if record else None
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return page.age() < self.ttl
+
+    def put(
+        self,
+        url: str,
+        content: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        links: Optional[Dict[str, str]] = None,
+        names: Optional[List[str]] = None
+    ):
+        key = normalize_url(url)
+        page = CachedPage(
+            url=key, content=content, etag=etag, last_modified=last_modified, fetched_at=time.time(),
+            links=links or {}, names=names or []
+        )
+        self.store.put_json(key, page.model_dump())
+
+    def touch(self, url: str):
+        """Mark an entry fresh again after a 304 revalidation"""
+        page = self.get(url)
+        if page:
+            self.put(page.url, page.content, page.etag, page.last_modified, page.links, page.names)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.store.stats(),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+        }
+
+    def close(self):
+        self.store.close()
+
+
+class LLMCache:
+    """Cache of chat completions keyed by a request fingerprint"""
+
+    def __init__(self, store: Optional[Store] = None, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("LLM_CACHE_TTL", "604800"))
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+        self.store = store or open_store(
+            "llm", int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024))), self.max_entries
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(**request: Any) -> str:
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        response = self.store.get_json(key)
+        if response is not None:
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache="llm", result="hit")
+            return response
+        self.misses += 1
+        CACHE_LOOKUPS.inc(cache="llm", result="miss")
+        return None
+
+    def put(self, key: str, response: str):
+        self.store.put_json(key, response, ttl=self.ttl)
+
+    def delete(self, key: str):
+        self.store.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.store.stats(),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        self.store.close()
+
+
+class ResultStore:
+    """Store of research responses, shared by every worker that uses the same backend.
+
+    Responses are kept by id for GET /research/{id} and indexed by
+    normalized query so repeat queries are answered while fresh. The
+    index outlives ttl by stale_ttl, so lookup_stale() can still answer
+    with an expired response while it is refreshed. Identical queries that
+    arrive while one is running in this process share its result.
+    """
+
+    def __init__(
+        self,
+        model: Type[M],
+        store: Optional[Store] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        stale_ttl: Optional[float] = None
+    ):
+        self.model = model
+        self.max_entries = max_entries or int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "500"))
+        self.max_bytes = max_bytes or int(os.getenv("RESULT_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+        self.ttl = ttl if ttl is not None else float(os.getenv("RESULT_CACHE_TTL", "3600"))
+        # Seconds past ttl an expired response may still be served while it refreshes; 0 turns that off
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.getenv("RESULT_CACHE_STALE", "86400"))
+        self.store = store or open_store("results", self.max_bytes, self.max_entries)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale = 0
+
+    async def get(self, result_id: str) -> Optional[M]:
+        record = await asyncio.to_thread(self.store.get_json, f"id:{result_id}")
+        return self.model.model_validate(record) if record else None
+
+    async def put(self, result_id: str, query: str, value: M, index: bool = True):
+        """Store a response; index=False keeps it reachable by id only"""
+        await asyncio.to_thread(self.store.put_json, f"id:{result_id}", value.model_dump(mode="json"))
+        if index:
+            await asyncio.to_thread(
+                self.store.put_json,
+                f"query:{normalize_query(query)}",
+                {"id": result_id, "at": time.time()},
+                self.ttl + self.stale_ttl
+            )
+
+    async def _find(self, query: str) -> Optional[Tuple[M, float]]:
+        """(response, age in seconds) for an equivalent query, fresh or stale"""
+        entry = await asyncio.to_thread(self.store.get_json, f"query:{normalize_query(query)}")
+        if not entry:
+            return None
+        result_id = entry["id"]
+        age = max(0.0, time.time() - entry["at"])
+        if age >= self.ttl + self.stale_ttl:
+            return None
+        # The response itself may have been evicted before its query entry expired
+        value = await self.get(result_id)
+        return (value, age) if value is not None else None
+
+    def _count(self, result: str):
+        if result == "hit":
+            self.hits += 1
+        elif result == "stale":
+            self.stale += 1
+        else:
+            self.misses += 1
+        CACHE_LOOKUPS.inc(cache="result", result=result)
+
+    async def lookup(self, query: str) -> Optional[M]:
+        """Return the freshest cached response for an equivalent query"""
+        found = await self._find(query)
+        if found and found[1] < self.ttl:
+            self._count("hit")
+            return found[0]
+        self._count("miss")
+        return None
+
+    async def lookup_stale(self, query: str, record: bool = True) -> Optional[Tuple[M, float, bool]]:
+        """(response, age in seconds, fresh) for an equivalent query, including
+        responses up to stale_ttl past their ttl. record=False leaves the hit counts alone."""
+        found = await self._find(query)
+        if found is None:
+            if record:
+                self._count("miss")
+            return None
+        value, age = found
+        fresh = age < self.ttl
+        if record:
+            self._count("hit" if fresh else "stale")
+        return value, age, fresh
+
+    async def claim_refresh(self, query: str, lease: float) -> bool:
+        """Best-effort claim on refreshing query across processes sharing the store.
+
+        False if another process claimed it within the last lease seconds.
+        Two processes can both win if they check at the same moment; that
+        costs a duplicate refresh, not a wrong result.
+        """
+        key = f"refresh:{normalize_query(query)}"
+        if await asyncio.to_thread(self.store.get_json, key):
+            return False
+        await asyncio.to_thread(self.store.put_json, key, time.time(), lease)
+        return True
+
+    async def release_refresh(self, query: str):
+        await asyncio.to_thread(self.store.delete, f"refresh:{normalize_query(query)}")
+
+    async def coalesce(self, query: str, factory: Callable[[], Awaitable[M]]) -> M:
+        """Run factory once for all concurrent callers with the same query"""
+        key = normalize_query(query)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+            CACHE_LOOKUPS.inc(cache="result", result="coalesced")
+        # shield so one caller going away doesn't cancel the shared run
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.store.stats(),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+    def close(self):
+        self.store.close()
@@ -0,0 +1,10 @@
+"""
+Helpers for reading settings from the environment.
+"""
+import os
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """True for 1/true/yes; default when the variable is unset"""
+    value = os.getenv(name)
+    return default if value is None else value.lower() in ("1", "true", "yes")
@@ -0,0 +1,141 @@
+"""
+Relevance-ranked context packing for LLM prompts.
+
+Scraped pages and search snippets are split into chunks, scored with BM25
+against the query (plus optional keyword boosts) and the best chunks are
+kept until a token budget is full. Kept chunks stay in document order.
+"""
+import os
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Rough chars-per-token ratio for Llama tokenizers on English web text
+CHARS_PER_TOKEN = 4
+CHUNK_CHARS = int(os.getenv("CONTEXT_CHUNK_CHARS", "400"))
+EXTRACT_CONTEXT_TOKENS = int(os.getenv("EXTRACT_CONTEXT_TOKENS", "700"))
+ANALYSIS_CONTEXT_TOKENS = int(os.getenv("ANALYSIS_CONTEXT_TOKENS", "500"))
+
+# Terms that mark the facts tool analysis asks for
+ANALYSIS_BOOSTS: Dict[str, float] = {
+    "pricing": 2.0, "price": 1.5, "prices": 1.5, "plan": 1.0, "plans": 1.5,
+    "free": 1.5, "tier": 1.0, "paid": 1.0, "enterprise": 1.0, "month": 0.5,
+    "trial": 0.5, "open": 1.0, "source": 1.0, "opensource": 1.5, "license": 2.0,
+    "licensed": 2.0, "mit": 1.5, "apache": 1.5, "gpl": 1.5, "agpl": 1.5,
+    "github": 1.0, "api": 1.5, "sdk": 1.5, "sdks": 1.5, "rest": 0.5,
+    "graphql": 0.5, "integrations": 1.5, "integrates": 1.0, "python": 0.5,
+    "javascript": 0.5, "typescript": 0.5, "go": 0.5, "rust": 0.5, "java": 0.5,
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "best", "by", "for", "from",
+    "how", "in", "is", "it", "of", "on", "or", "that", "the", "to", "top",
+    "what", "which", "with", "you", "your",
+}
+
+_token = re.compile(r"[a-z0-9][a-z0-9+#]*")
+_sentence_end = re.compile(r"(?<=[.!?])\s+")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _token.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Split text without sentence punctuation (menus, lists) on word boundaries"""
+    parts, current = [], ""
+    for word in text.split():
+        if current and len(current) + len(word) + 1 > max_chars:
+            parts.append(current)
+            current = ""
+        current = f"{current} {word}" if current else word
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_chunks(text: str, max_chars: int = CHUNK_CHARS) -> List[str]:
+    """Paragraphs stay whole when they fit; longer ones are grouped by sentence"""
+    chunks = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            chunks.append(paragraph)
+            continue
+        current = ""
+        for sentence in _sentence_end.split(paragraph):
+            for piece in _split_long(sentence, max_chars) if len(sentence) > max_chars else [sentence]:
+                if current and len(current) + len(piece) + 1 > max_chars:
+                    chunks.append(current)
+                    current = ""
+                current = f"{current} {piece}" if current else piece
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def score_chunks(chunks: List[str], query: str, boosts: Optional[Dict[str, float]] = None) -> List[float]:
+    """BM25 over the chunks themselves, with boost terms as extra weighted query terms"""
+    docs = [Counter(tokenize(chunk)) for chunk in chunks]
+    if not docs:
+        return []
+    avg_len = sum(sum(d.values()) for d in docs) / len(docs) or 1.0
+    document_frequency = Counter(term for d in docs for term in d)
+
+    weights: Dict[str, float] = dict(boosts or {})
+    for term in tokenize(query):
+        weights[term] = weights.get(term, 0.0) + 3.0
+
+    scores = []
+    for doc in docs:
+        length = sum(doc.values())
+        score = 0.0
+        for term, weight in weights.items():
+            tf = doc.get(term)
+            if not tf:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            score += weight * idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_len))
+        scores.append(score)
+    return scores
+
+
+def pack_context(
+    text: str,
+    query: str,
+    max_tokens: int,
+    boosts: Optional[Dict[str, float]] = None
+) -> str:
+    """Best chunks of text for query that fit in max_tokens, in original order"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    chunks = split_chunks(text)
+    scores = score_chunks(chunks, query, boosts)
+    # Highest score first; ties (including no match at all) keep page order
+    ranked = sorted(range(len(chunks)), key=lambda i: (-scores[i], i))
+
+    budget = max_tokens * CHARS_PER_TOKEN
+    chosen = []
+    for i in ranked:
+        cost = len(chunks[i]) + 2
+        if cost <= budget:
+            chosen.append(i)
+            budget -= cost
+        elif not chosen:
+            # Even the best chunk is too big: keep as much of it as fits
+            return chunks[i][:budget]
+
+    return "\n\n".join(chunks[i] for i in sorted(chosen))
@@ -0,0 +1,293 @@
+"""
+Following a tool's homepage to the pages that answer the analysis.
+
+Homepages often leave pricing, licensing and SDKs to other pages. The
+Crawler picks up to CRAWL_MAX_PAGES of them from the homepage's links:
+the pricing page, the docs and the source repository (one of each, and
+only a repository named after the tool), guessing pricing/ and docs/ next
+to the homepage when it had no links to read. They are fetched concurrently, at most CRAWL_PER_HOST at a time per
+host and only where robots.txt allows. A tool's crawl shares one
+CRAWL_MAX_BYTES download budget and ends after CRAWL_TIMEOUT seconds;
+pages not back by then are left out and the homepage is used as it is.
+"""
+import os
+import re
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple, Collection
+from urllib.parse import urlsplit, urljoin
+from urllib.robotparser import RobotFileParser
+
+from .http_client import HTTPPool
+from .scraper import ScraperService, Page
+from .cache import normalize_url
+from .resolver import _name_tokens
+from .metrics import Counter
+from . import resilience
+
+# Fetched in this order of preference when CRAWL_MAX_PAGES is lower
+KINDS = ("pricing", "docs", "source")
+LABELS = {"pricing": "Pricing page", "docs": "Documentation", "source": "Source repository"}
+# Paths tried when the homepage came without links (cached before links were kept)
+GUESSES = {"pricing": "pricing", "docs": "docs"}
+# The page most likely to settle each analysis field a homepage leaves open
+FIELD_KINDS = {
+    "pricing_model": "pricing",
+    "is_open_source": "source",
+    "api_available": "docs",
+    "language_support": "docs",
+    "integration_capabilities": "docs",
+}
+
+SOURCE_HOSTS = {"github.com", "gitlab.com", "codeberg.org", "bitbucket.org"}
+# First path segments on source hosts that are site pages, not an owner
+_SOURCE_RESERVED = {
+    "about", "blog", "collections", "contact", "customer-stories", "enterprise", "explore", "features",
+    "login", "marketplace", "orgs", "pricing", "search", "security", "signup", "site", "sponsors", "topics",
+}
+_PRICING_SEGMENTS = {"pricing", "plans", "plan", "prices", "price"}
+_DOCS_SEGMENTS = {"docs", "doc", "documentation", "developers", "developer", "reference", "guides", "quickstart"}
+_pricing_text = re.compile(r"\b(pricing|plans|prices)\b", re.IGNORECASE)
+_docs_text = re.compile(r"\b(docs|documentation|developers|api reference|getting started)\b", re.IGNORECASE)
+_source_text = re.compile(r"\b(github|gitlab|source code)\b", re.IGNORECASE)
+# Sections are appended in KINDS order, so the repository's is always last
+_source_section = re.compile(r"\n\n" + re.escape(LABELS["source"]) + r": .*\Z", re.DOTALL)
+
+# How long a robots.txt that couldn't be fetched keeps its host closed
+ROBOTS_RETRY_SECONDS = 300.0
+
+CRAWL_PAGES = Counter("crawl_pages_total", "Pages followed from tool homepages by kind and result")
+
+
+def _site(host: str) -> str:
+    return host[4:] if host.startswith("www.") else host
+
+
+def _segments(path: str) -> List[str]:
+    return [s for s in path.lower().split("/") if s]
+
+
+def _same_site(host: str, home: str) -> bool:
+    """host is the homepage's site or one of its subdomains (docs.example.com)"""
+    host, home = _site(host), _site(home)
+    return host == home or host.endswith("." + home)
+
+
+def _kind(url: str, text: str, home: str, tokens: List[str]) -> Optional[str]:
+    """Which of KINDS a homepage link leads to, if any"""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    segments = _segments(parts.path)
+    if _site(host) in SOURCE_HOSTS:
+        if len(segments) not in (1, 2) or segments[0] in _SOURCE_RESERVED:
+            return None
+        # The tool's own repository, not an SDK or example repo (github.com/stripe/stripe-node)
+        name = re.sub(r"[^a-z0-9+#]", "", segments[-1])
+        return "source" if name in tokens else None
+    if not _same_site(host, home):
+        return None
+    words = {w for s in segments for w in re.split(r"[-_.]", s)}
+    if words & _PRICING_SEGMENTS or _pricing_text.search(text):
+        return "pricing"
+    if words & _DOCS_SEGMENTS or _docs_text.search(text) or host.split(".")[0] in ("docs", "developer", "developers"):
+        return "docs"
+    # A "GitHub" link on the vendor's own site usually redirects to the repository
+    if _source_text.search(text):
+        return "source"
+    return None
+
+
+def _dedup_key(url: str) -> str:
+    """normalize_url, also treating www.example.com and example.com as one site"""
+    key = normalize_url(url)
+    return re.sub(r"^(https?)://www\.", r"\1://", key)
+
+
+def rules_text(content: str) -> str:
+    """Crawled content without the source repository section, for page rules.
+
+    A repository's license is easily someone else's (a client library,
+    a fork), so only the LLM reads it, next to the rest of the page.
+    """
+    return _source_section.sub("", content)
+
+
+def pick_pages(
+    tool_name: str, homepage: str, links: Dict[str, str], max_pages: int, kinds: Collection[str] = KINDS
+) -> List[Tuple[str, str]]:
+    """(kind, url) for the pages of kinds worth fetching next to homepage, best link per kind.
+
+    Among links of one kind the shallowest wins (/pricing over
+    /blog/pricing-update), then the first on the page. Source links
+    to a repository (owner/repo) beat links to an owner.
+    """
+    home = urlsplit(homepage).netloc.lower()
+    tokens = _name_tokens(tool_name)
+    seen = {_dedup_key(homepage)}
+    best: Dict[str, Tuple[Tuple[int, int], str]] = {}
+    for position, (url, text) in enumerate(links.items()):
+        kind = _kind(url, text, home, tokens)
+        key = _dedup_key(url)
+        if kind not in kinds or key in seen:
+            continue
+        depth = len(_segments(urlsplit(url).path))
+        rank = (-depth if kind == "source" else depth, position)
+        if kind not in best or rank < best[kind][0]:
+            best[kind] = (rank, url)
+
+    if not links:
+        # No links to go on; pricing/ and docs/ next to the homepage are the usual places
+        base = homepage if homepage.endswith("/") else homepage + "/"
+        for kind, path in GUESSES.items():
+            if kind in kinds:
+                best[kind] = ((0, 0), urljoin(base, path))
+
+    pages = []
+    for kind in KINDS:
+        if kind in best and _dedup_key(best[kind][1]) not in seen:
+            seen.add(_dedup_key(best[kind][1]))
+            pages.append((kind, best[kind][1]))
+    return pages[:max_pages]
+
+
+class RobotsCache:
+    """robots.txt per host, fetched once and kept for CRAWL_ROBOTS_TTL"""
+
+    def __init__(self, http: HTTPPool, user_agent: str, ttl: Optional[float] = None, max_hosts: Optional[int] = None):
+        self.http = http
+        self.user_agent = user_agent
+        self.ttl = ttl if ttl is not None else float(os.getenv("CRAWL_ROBOTS_TTL", "86400"))
+        self.max_hosts = max_hosts or int(os.getenv("CRAWL_ROBOTS_HOSTS", "2000"))
+        self.timeout = float(os.getenv("CRAWL_ROBOTS_TIMEOUT", "3"))
+        # Origin -> (expires at, parser)
+        self._rules: "OrderedDict[str, Tuple[float, RobotFileParser]]" = OrderedDict()
+        # Origin -> fetch in progress, so concurrent crawls of one host share it
+        self._fetching: Dict[str, asyncio.Task] = {}
+
+    async def allowed(self, url: str) -> bool:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc.lower()}"
+        cached = self._rules.get(origin)
+        if cached and cached[0] > time.time():
+            self._rules.move_to_end(origin)
+            return cached[1].can_fetch(self.user_agent, url)
+
+        task = self._fetching.get(origin)
+        if task is None:
+            task = asyncio.create_task(self._fetch(origin))
+            self._fetching[origin] = task
+            task.add_done_callback(lambda _: self._fetching.pop(origin, None))
+        parser = await asyncio.shield(task)
+        return parser.can_fetch(self.user_agent, url)
+
+    async def _fetch(self, origin: str) -> RobotFileParser:
+        parser = RobotFileParser(origin + "/robots.txt")
+        ttl = self.ttl
+        try:
+            response = await self.http.get(
+                parser.url, headers={"User-Agent": self.user_agent}, timeout=resilience.time_left(self.timeout)
+            )
+            if response.status_code == 200:
+                parser.parse(response.text.splitlines())
+            elif 400 <= response.status_code < 500:
+                # No robots.txt (or not for us to read) means no restrictions
+                parser.allow_all = True
+            else:
+                parser.disallow_all = True
+                ttl = ROBOTS_RETRY_SECONDS
+        except resilience.DeadlineExceeded:
+            # The crawl ran out of time, which says nothing about the host
+            raise
+        except Exception as e:
+            # Unreachable robots.txt: stay off the host for now rather than guess
+            print(f"⚠️ robots.txt unavailable for {origin}: {e}")
+            parser.disallow_all = True
+            ttl = ROBOTS_RETRY_SECONDS
+        # can_fetch() answers False until the parser has been marked read
+        parser.modified()
+
+        self._rules[origin] = (time.time() + ttl, parser)
+        self._rules.move_to_end(origin)
+        if len(self._rules) > self.max_hosts:
+            self._rules.popitem(last=False)
+        return parser
+
+
+class Crawler:
+    """Bounded crawl from a tool's homepage to its pricing, docs and source pages"""
+
+    def __init__(self, scraper: ScraperService, robots: Optional[RobotsCache] = None):
+        self.scraper = scraper
+        self.robots = robots or RobotsCache(scraper.http, scraper.headers["User-Agent"])
+        self.max_pages = int(os.getenv("CRAWL_MAX_PAGES", "3"))
+        self.max_bytes = int(os.getenv("CRAWL_MAX_BYTES", str(1536 * 1024)))
+        self.timeout = float(os.getenv("CRAWL_TIMEOUT", "6"))
+        self.per_host = int(os.getenv("CRAWL_PER_HOST", "4"))
+        # Host -> its crawl slots, least recently used first, bounded like the HTTP pool's
+        self._host_slots: "OrderedDict[str, asyncio.Semaphore]" = OrderedDict()
+        self.max_hosts = scraper.http.max_hosts
+        # Host -> fetches holding or waiting for a slot
+        self._busy: Dict[str, int] = {}
+
+    def _slot(self, host: str) -> asyncio.Semaphore:
+        if host in self._host_slots:
+            self._host_slots.move_to_end(host)
+            return self._host_slots[host]
+        self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        if len(self._host_slots) > self.max_hosts:
+            idle = next((h for h in self._host_slots if h not in self._busy), None)
+            if idle is not None and idle != host:
+                del self._host_slots[idle]
+        return self._host_slots[host]
+
+    async def _fetch(self, kind: str, url: str, max_bytes: int) -> Optional[str]:
+        try:
+            if not await self.robots.allowed(url):
+                CRAWL_PAGES.inc(kind=kind, result="disallowed")
+                return None
+            host = urlsplit(url).netloc.lower()
+            self._busy[host] = self._busy.get(host, 0) + 1
+            try:
+                async with self._slot(host):
+                    page = await self.scraper.scrape_page(url, max_bytes)
+            finally:
+                self._busy[host] -= 1
+                if not self._busy[host]:
+                    del self._busy[host]
+        except Exception as e:
+            # Deadline passed while waiting for robots.txt or a host slot
+            print(f"⏭️ Skipping {url[:60]}: {str(e) or type(e).__name__}")
+            CRAWL_PAGES.inc(kind=kind, result="timeout")
+            return None
+        if page is None or not self.scraper.has_content(page.content):
+            CRAWL_PAGES.inc(kind=kind, result="empty")
+            return None
+        return page.content
+
+    async def crawl(self, tool_name: str, homepage: str, page: Page, kinds: Collection[str] = KINDS) -> str:
+        """The homepage's text followed by a labelled section per page of kinds fetched from it"""
+        pages = pick_pages(tool_name, homepage, page.links, self.max_pages, kinds)
+        if not pages or resilience.expired():
+            return page.content
+
+        # An equal share each: the fetches run at once, so nothing is left over to hand on
+        share = min(self.max_bytes // len(pages), self.scraper.max_bytes)
+        with resilience.deadline(self.timeout):
+            texts = await asyncio.gather(*(self._fetch(kind, url, share) for kind, url in pages))
+
+        sections = [page.content]
+        seen = {page.content}
+        for (kind, url), text in zip(pages, texts):
+            if not text:
+                continue
+            if text in seen:
+                # Sites that answer every path with the homepage (or the same docs index)
+                CRAWL_PAGES.inc(kind=kind, result="duplicate")
+                continue
+            seen.add(text)
+            CRAWL_PAGES.inc(kind=kind, result="fetched")
+            # No URL in the label: a github.com link reads as evidence of open source
+            sections.append(f"{LABELS[kind]}: {text}")
+            print(f"    🔗 {LABELS[kind]}: {url[:60]}")
+        return "\n\n".join(sections)
@@ -0,0 +1,170 @@
+import re
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urljoin, urldefrag
+
+# lxml and bs4 are imported where pages are parsed, not here: they take tens
+# of milliseconds to load and the API should not pay that at startup
+
+
+SKIP_TAGS = ["script", "style", "nav", "footer", "header", "aside", "form", "noscript", "svg", "iframe", "template"]
+MAIN_CANDIDATES = ["main", "*[@role='main']", "article"]
+
+# Below this many characters a <main>/<article> is treated as a false positive
+MIN_MAIN_CHARS = 200
+
+# Links kept per page; navigation menus rarely need more
+MAX_LINKS = 200
+
+_whitespace = re.compile(r'\s+')
+_markdown_link = re.compile(r'\[([^\]]*)\]\((https?://[^)\s]+)')
+_markdown_heading = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+
+
+def _collect(texts: Iterable[str], max_chars: int) -> str:
+    """Join text nodes until max_chars is reached, then stop reading"""
+    parts = []
+    total = 0
+    for text in texts:
+        text = _whitespace.sub(" ", text).strip()
+        if not text:
+            continue
+        parts.append(text)
+        total += len(text) + 1
+        if total >= max_chars:
+            break
+    return " ".join(parts)[:max_chars]
+
+
+def _add_link(links: Dict[str, str], base_url: str, href: Optional[str], text: str):
+    href = (href or "").strip()
+    if not href or href.startswith(("#", "mailto:", "javascript:", "tel:")) or len(links) >= MAX_LINKS:
+        return
+    url = urldefrag(urljoin(base_url, href))[0]
+    if url.startswith(("http://", "https://")) and url not in links:
+        links[url] = _whitespace.sub(" ", text).strip()[:100]
+
+
+def _extract_lxml(
+    html: Union[str, bytes], max_chars: int, base_url: Optional[str] = None,
+    links: Optional[Dict[str, str]] = None, names: Optional[List[str]] = None
+) -> str:
+    import lxml.html
+
+    doc = lxml.html.document_fromstring(html)
+    if links is not None:
+        # Before dropping <nav>/<header>/<footer>, which hold the pricing and docs links
+        for node in doc.iter("a"):
+            _add_link(links, base_url, node.get("href"), node.text_content())
+    for node in doc.xpath("//" + " | //".join(SKIP_TAGS) + " | //comment()"):
+        node.drop_tree()
+
+    title = _whitespace.sub(" ", doc.findtext(".//title") or "").strip()
+    if names is not None:
+        names.extend(_whitespace.sub(" ", n).strip() for n in doc.xpath("//meta[@property='og:site_name']/@content"))
+        names.append(title)
+    body = doc.body if doc.find("body") is not None else doc
+
+    for candidate in MAIN_CANDIDATES:
+        nodes = body.xpath(".//" + candidate)
+        if not nodes:
+            continue
+        # Several <article>s usually means a listing page; take the biggest
+        node = max(nodes, key=lambda n: len(n.text_content())) if len(nodes) > 1 else nodes[0]
+        text = _collect(node.itertext(), max_chars)
+        if len(text) >= MIN_MAIN_CHARS:
+            return _collect([title, text], max_chars)
+
+    return _collect(chain([title], body.itertext()), max_chars)
+
+
+def _extract_soup(
+    html: Union[str, bytes], max_chars: int, base_url: Optional[str] = None,
+    links: Optional[Dict[str, str]] = None, names: Optional[List[str]] = None
+) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    if links is not None:
+        for node in soup.find_all("a", href=True):
+            _add_link(links, base_url, node["href"], node.get_text(" "))
+    for tag in soup(SKIP_TAGS):
+        tag.decompose()
+
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+    if names is not None:
+        site_name = soup.find("meta", attrs={"property": "og:site_name"})
+        if site_name and site_name.get("content"):
+            names.append(_whitespace.sub(" ", site_name["content"]).strip())
+        names.append(title)
+    for name, attrs in (("main", {}), (None, {"role": "main"}), ("article", {})):
+        node = soup.find(name, attrs=attrs)
+        if node:
+            text = _collect(node.stripped_strings, max_chars)
+            if len(text) >= MIN_MAIN_CHARS:
+                return _collect([title, text], max_chars)
+
+    return _collect(chain([title], soup.body.stripped_strings if soup.body else soup.stripped_strings), max_chars)
+
+
+def _extract(
+    html: Union[str, bytes], max_chars: int, encoding: Optional[str], base_url: Optional[str],
+    links: Optional[Dict[str, str]], names: Optional[List[str]] = None
+) -> str:
+    if isinstance(html, bytes) and encoding:
+        html = html.decode(encoding, errors="replace")
+    if not html or not html.strip():
+        return ""
+
+    try:
+        from lxml import etree
+    except ImportError:
+        etree = None
+    try:
+        if etree is not None:
+            return _extract_lxml(html, max_chars, base_url, links, names)
+    except (etree.ParserError, ValueError):
+        # Start over with the fallback parser rather than mixing the two
+        if links:
+            links.clear()
+        if names:
+            names.clear()
+    return _extract_soup(html, max_chars, base_url, links, names)
+
+
+def extract_text(html: Union[str, bytes], max_chars: int = 5000, encoding: Optional[str] = None) -> str:
+    """Readable text of an HTML page, preferring its main content block.
+
+    Bytes are decoded with encoding when the server declared one,
+    otherwise the parser sniffs <meta charset>.
+    """
+    return _extract(html, max_chars, encoding, None, None)
+
+
+def extract_page(
+    html: Union[str, bytes], base_url: str, max_chars: int = 5000, encoding: Optional[str] = None
+) -> Tuple[str, Dict[str, str], List[str]]:
+    """extract_text plus the page's links and names from the same parse.
+
+    Links map absolute http(s) URLs to their anchor text, in page order,
+    up to MAX_LINKS. Unlike the text they include <nav> and <footer>.
+    Names are what the page calls its site: og:site_name, then <title>.
+    """
+    links: Dict[str, str] = {}
+    names: List[str] = []
+    text = _extract(html, max_chars, encoding, base_url, links, names)
+    return text, links, [n for n in names if n]
+
+
+def markdown_links(markdown: str) -> Dict[str, str]:
+    """Absolute URL -> link text for [text](url) links in markdown, such as Firecrawl output"""
+    links: Dict[str, str] = {}
+    for text, url in _markdown_link.findall(markdown or ""):
+        _add_link(links, url, url, text)
+    return links
+
+
+def markdown_names(markdown: str) -> List[str]:
+    """The first top-level heading, a markdown page's nearest thing to a <title>"""
+    match = _markdown_heading.search(markdown or "")
+    return [_whitespace.sub(" ", match.group(1)).strip()] if match else []
@@ -1,16 +1,34 @@
 import os
-from firecrawl import FirecrawlApp, ScrapeOptions
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+from firecrawl import FirecrawlApp
+from firecrawl.types import ScrapeOptions
 from dotenv import load_dotenv
 
+from .metrics import span, EXTERNAL_SECONDS, ERRORS
+from . import resilience
+
 load_dotenv()
 
+# The Firecrawl SDK is synchronous, like Tavily's; calls run on a bounded pool
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("FIRECRAWL_MAX_WORKERS", "4")),
+    thread_name_prefix="firecrawl"
+)
+
 
 class FirecrawlService:
     def __init__(self):
         api_key = os.getenv("FIRECRAWL_API_KEY")
         if not api_key:
             raise ValueError("Missing FIRECRAWL_API_KEY environment variable")
-        self.app = FirecrawlApp(api_key=api_key)
+        # FIRECRAWL_API_URL points the client at a self-hosted instance or a local stand-in
+        self.app = FirecrawlApp(api_key=api_key, api_url=os.getenv("FIRECRAWL_API_URL") or "https://api.firecrawl.dev")
+        self.timeout = float(os.getenv("FIRECRAWL_TIMEOUT", "30"))
+        self.max_chars = int(os.getenv("SCRAPE_MAX_CHARS", "5000"))
+        self.breaker = resilience.breaker("firecrawl")
 
     def search_companies(self, query: str, num_results: int = 5):
         try:
@@ -28,7 +46,7 @@ class FirecrawlService:
 
     def scrape_company_pages(self, url: str):
         try:
-            result = self.app.scrape_url(
+            result = self.app.scrape(
                 url,
                 formats=["markdown"]
             )
@@ -36,3 +54,24 @@ class FirecrawlService:
         except Exception as e:
             print(e)
             return None
+
+    async def scrape(self, url: str) -> Optional[str]:
+        """Rendered page as markdown (capped like ScraperService output), or None"""
+        loop = asyncio.get_running_loop()
+        try:
+            with span(EXTERNAL_SECONDS, "firecrawl", service="firecrawl", operation="scrape"):
+                # The SDK raises plain Exceptions, so every failure counts against the breaker
+                result = await resilience.call(
+                    lambda: loop.run_in_executor(_executor, partial(self.app.scrape, url, formats=["markdown"])),
+                    self.breaker,
+                    lambda e: True,
+                    retries=0,
+                    timeout=self.timeout
+                )
+        except Exception as e:
+            print(f"❌ Firecrawl failed: {e}")
+            ERRORS.inc(stage="firecrawl")
+            return None
+
+        markdown = getattr(result, "markdown", None) or ""
+        return markdown[:self.max_chars] or None
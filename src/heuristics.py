@@ -0,0 +1,296 @@
+"""
+Reading structured tool facts straight from a scraped page.
+
+Most of what tool analysis asks for shows up on a vendor page as fixed
+phrases: "Free tier" next to "$20/month", "Contact sales", "MIT License",
+"Star us on GitHub", "pip install acme", "SDKs for Python and Go". Each
+CompanyAnalysis field has a precompiled pattern set; matches give a value
+and a confidence between 0 and 1. The workflow builds the analysis from
+these facts alone when every required field clears HEURISTIC_CONFIDENCE,
+and otherwise asks the LLM for just the fields that didn't.
+
+Scraped content is plain text, so links and badges only count when their
+text survives extraction (github.com/acme/acme, "MIT licensed").
+"""
+import re
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from .models import CompanyAnalysis
+from .metrics import Counter
+
+ANALYSIS_FIELDS = tuple(CompanyAnalysis.model_fields)
+# Fields worth an LLM call when the page doesn't settle them. The list fields
+# are kept as found: an LLM asked about a page that names no languages or
+# integrations mostly guesses.
+REQUIRED_FIELDS = ("pricing_model", "is_open_source", "api_available", "description")
+# Most entries kept for a list field
+MAX_LIST_ITEMS = 8
+
+FACT_FIELDS = Counter("analysis_fields_total", "Tool analysis fields by source (rules or llm)")
+ANALYSIS_PATHS = Counter("analysis_paths_total", "Tool analyses answered by page rules alone, rules plus a partial LLM call, or the LLM")
+
+_I = re.IGNORECASE
+
+# Pricing
+_price = re.compile(
+    r"(?:[$€£]\s?\d[\d,]*(?:\.\d+)?|\d[\d,]*(?:\.\d+)?\s?(?:USD|EUR))\s*"
+    r"(?:/|per\s+|a\s+)\s*(?:(?:user|seat|member|dev(?:eloper)?)\s*/\s*)?(?:mo(?:nth)?|yr|year|user|seat|member)\b",
+    _I
+)
+_free_tier = re.compile(
+    r"\bfree\s+(?:tier|plan|forever)\b|\bhobby\b|\bstarter\s+free\b|\$0\b"
+    r"|\b(?:start|get\s+started|try\s+it|sign\s+up)\s+(?:for\s+)?free\b|\bfree\s+to\s+start\b",
+    _I
+)
+_contact_sales = re.compile(
+    r"\b(?:contact|talk\s+to|call)\s+(?:our\s+)?sales\b|\bcustom\s+(?:pricing|quote|plan)\b"
+    r"|\b(?:request|book|schedule)\s+a\s+demo\b|\bget\s+a\s+quote\b",
+    _I
+)
+_free_only = re.compile(
+    r"\b(?:completely|totally|entirely|100%|always)\s+free\b|\bfree\s+and\s+open[- ]source\b"
+    r"|\bno\s+paid\s+plans\b|\bfree\s+of\s+charge\b",
+    _I
+)
+
+# Source availability
+_open_source = re.compile(r"\bopen[- ]source[d]?\b|\bopensource\b", _I)
+_license = re.compile(
+    r"\b(?:MIT|Apache(?:[- ]2(?:\.0)?)?|BSD(?:-[23]-Clause)?|L?GPL(?:-?v?[23](?:\.0)?)?|AGPL(?:-?v?3(?:\.0)?)?|MPL(?:-2\.0)?|Mozilla\s+Public)"
+    r"\s+licen[sc](?:e|ed)\b|\blicen[sc]ed\s+under\s+(?:the\s+)?(?:MIT|Apache|BSD|L?GPL|AGPL|Mozilla)\b",
+    _I
+)
+_source_host = re.compile(
+    r"\bgithub\.com/[\w.-]+/[\w.-]+|\bgitlab\.com/[\w.-]+/[\w.-]+"
+    r"|\b(?:star|fork)\s+(?:us|it)\s+on\s+git(?:hub|lab)\b|\bview\s+(?:the\s+)?source\b"
+    r"|\bself[- ]host(?:ed|ing|able)?\b|\bcontributors?\s+on\s+github\b",
+    _I
+)
+_closed_source = re.compile(
+    r"\bsource[- ]available\b|\bbusiness\s+source\s+licen[sc]e\b|\bclosed[- ]source\b",
+    _I
+)
+
+# API and SDKs
+_api = re.compile(
+    r"\b(?:REST(?:ful)?|GraphQL|HTTP|public|management|admin)\s+API\b|\bAPI\s+(?:reference|docs|documentation|keys?|endpoints?|access)\b"
+    r"|\bSDKs?\b|\bclient\s+librar(?:y|ies)\b|\bwebhooks?\b",
+    _I
+)
+# Install commands name both the API surface and the language it's for
+_installs: Tuple[Tuple[re.Pattern, str], ...] = tuple(
+    (re.compile(pattern, _I), language) for pattern, language in (
+        (r"\b(?:npm\s+(?:install|i)|yarn\s+add|pnpm\s+(?:add|install)|bun\s+add)\s+@?[\w./-]+", "JavaScript"),
+        (r"\b(?:pip3?\s+install|poetry\s+add|uv\s+(?:add|pip\s+install)|pipx\s+install)\s+[\w.\[\]-]+", "Python"),
+        (r"\bgo\s+(?:get|install)\s+[\w.-]+\.[\w./@-]+", "Go"),
+        (r"\bcargo\s+(?:add|install)\s+[\w-]+", "Rust"),
+        (r"\b(?:gem\s+install|bundle\s+add)\s+[\w-]+", "Ruby"),
+        (r"\bcomposer\s+require\s+[\w/-]+", "PHP"),
+        (r"\b(?:dotnet\s+add\s+package|Install-Package)\s+[\w.-]+", "C#"),
+        (r"<artifactId>[\w.-]+</artifactId>|\bimplementation\s*\(?\s*['\"][\w.-]+:[\w.-]+", "Java"),
+    )
+)
+
+# Languages, by canonical name
+LANGUAGES: Dict[str, str] = {
+    "python": "Python", "javascript": "JavaScript", "node.js": "JavaScript", "nodejs": "JavaScript",
+    "typescript": "TypeScript", "golang": "Go", "go": "Go", "rust": "Rust", "ruby": "Ruby",
+    "php": "PHP", "java": "Java", "kotlin": "Kotlin", "swift": "Swift", "c#": "C#", ".net": "C#",
+    "dart": "Dart", "flutter": "Dart", "elixir": "Elixir", "scala": "Scala", "c++": "C++",
+}
+# Also ordinary words, so they only count inside an SDK or install context
+_AMBIGUOUS_LANGUAGES = {"go", "swift", "rust", "dart"}
+_language_names = "|".join(sorted((re.escape(k) for k in LANGUAGES), key=len, reverse=True))
+_language = re.compile(rf"(?<![\w.#+])(?:{_language_names})(?![\w#+]|\.\w)", _I)
+# "SDKs for Python, Node.js and Go", "Python SDK", "client libraries in Ruby"
+_sdk_list = re.compile(r"\b(?:SDKs?|client\s+librar(?:y|ies)|libraries|bindings|drivers?)\s+(?:for|in|available\s+(?:for|in))\s+((?:[^.;:!?]|\.(?=\w)){2,160})", _I)
+_sdk_suffix = re.compile(rf"(?<![\w.#+])({_language_names})\s+(?:SDK|client|library|bindings|driver)s?\b", _I)
+
+TECHNOLOGIES: Dict[str, str] = {
+    "postgres": "Postgres", "postgresql": "Postgres", "mysql": "MySQL", "sqlite": "SQLite",
+    "mongodb": "MongoDB", "redis": "Redis", "kafka": "Kafka", "graphql": "GraphQL", "rest api": "REST",
+    "grpc": "gRPC", "websockets": "WebSockets", "react": "React", "next.js": "Next.js", "vue": "Vue",
+    "svelte": "Svelte", "deno": "Deno", "webassembly": "WebAssembly", "wasm": "WebAssembly",
+    "docker": "Docker", "kubernetes": "Kubernetes", "serverless": "Serverless", "edge functions": "Edge Functions",
+    "vector embeddings": "Vector embeddings", "pgvector": "pgvector", "elasticsearch": "Elasticsearch",
+}
+_technology = re.compile(
+    r"(?<![\w.])(?:" + "|".join(sorted((re.escape(k) for k in TECHNOLOGIES), key=len, reverse=True)) + r")(?![\w])",
+    _I
+)
+
+INTEGRATIONS: Dict[str, str] = {
+    "github": "GitHub", "gitlab": "GitLab", "bitbucket": "Bitbucket", "slack": "Slack", "discord": "Discord",
+    "vercel": "Vercel", "netlify": "Netlify", "aws": "AWS", "google cloud": "Google Cloud", "gcp": "Google Cloud",
+    "azure": "Azure", "cloudflare": "Cloudflare", "zapier": "Zapier", "stripe": "Stripe", "terraform": "Terraform",
+    "datadog": "Datadog", "sentry": "Sentry", "jira": "Jira", "vs code": "VS Code",
+    "vscode": "VS Code", "auth0": "Auth0", "okta": "Okta", "docker": "Docker", "kubernetes": "Kubernetes",
+    "heroku": "Heroku", "prisma": "Prisma", "supabase": "Supabase", "firebase": "Firebase", "openai": "OpenAI",
+}
+_integration = re.compile(
+    r"(?<![\w.])(?:" + "|".join(sorted((re.escape(k) for k in INTEGRATIONS), key=len, reverse=True)) + r")(?![\w])",
+    _I
+)
+_integrations_section = re.compile(r"\bintegrat(?:ions?|es?|ing)\b|\bworks\s+with\b|\bconnects?\s+(?:to|with)\b|\bplugins?\b", _I)
+
+_sentence = re.compile(r"[^.!?]{20,300}[.!?]")
+# "Acme is ...", "Acme lets you ...": the page describing the tool in its own words
+_DESCRIPTION_VERBS = r"(?:is|are|lets|helps|provides|makes|gives|enables|offers|turns|brings)"
+
+
+def _canonical(matches: Iterable[str], names: Dict[str, str]) -> List[str]:
+    """Canonical names in order of first mention"""
+    found = dict.fromkeys(names[m.lower()] for m in matches if m.lower() in names)
+    return list(found)[:MAX_LIST_ITEMS]
+
+
+class PageFacts:
+    """Analysis fields read from one page, each with a confidence"""
+
+    def __init__(self, tool_name: str):
+        self.tool_name = tool_name
+        self.values: Dict[str, Any] = {}
+        self.confidence: Dict[str, float] = {}
+
+    def set(self, field: str, value: Any, confidence: float):
+        self.values[field] = value
+        self.confidence[field] = confidence
+
+    def missing(self, threshold: float) -> List[str]:
+        """Fields in analysis order that the page doesn't answer confidently"""
+        return [f for f in ANALYSIS_FIELDS if self.confidence.get(f, 0.0) < threshold]
+
+    def needs_llm(self, threshold: float) -> bool:
+        missing = self.missing(threshold)
+        return any(f in missing for f in REQUIRED_FIELDS)
+
+    def confident(self, threshold: float) -> Dict[str, Any]:
+        return {f: v for f, v in self.values.items() if self.confidence[f] >= threshold}
+
+    def to_analysis(self) -> CompanyAnalysis:
+        """Analysis from the page alone; fields it says nothing about keep their defaults"""
+        ANALYSIS_PATHS.inc(path="rules")
+        FACT_FIELDS.inc(len(ANALYSIS_FIELDS), source="rules")
+        return CompanyAnalysis(**{"pricing_model": "Unknown", **self.values})
+
+    def merge(self, analysis: CompanyAnalysis, threshold: float) -> CompanyAnalysis:
+        """LLM analysis of the missing fields, overridden by what the page settles"""
+        known = self.confident(threshold)
+        ANALYSIS_PATHS.inc(path="partial" if known else "llm")
+        FACT_FIELDS.inc(len(known), source="rules")
+        FACT_FIELDS.inc(len(ANALYSIS_FIELDS) - len(known), source="llm")
+        return analysis.model_copy(update=known)
+
+
+def _pricing(text: str, facts: PageFacts):
+    prices = len(_price.findall(text))
+    free_tier = bool(_free_tier.search(text))
+    sales = bool(_contact_sales.search(text))
+    if prices and free_tier:
+        facts.set("pricing_model", "Freemium", 0.9)
+    elif free_tier and sales:
+        facts.set("pricing_model", "Freemium", 0.75)
+    elif prices:
+        facts.set("pricing_model", "Paid", 0.8 if prices > 1 else 0.65)
+    elif sales:
+        facts.set("pricing_model", "Enterprise", 0.7)
+    elif _free_only.search(text):
+        facts.set("pricing_model", "Free", 0.8)
+    elif free_tier:
+        facts.set("pricing_model", "Freemium", 0.55)
+
+
+def _source(text: str, facts: PageFacts):
+    open_source = len(_open_source.findall(text))
+    license = bool(_license.search(text))
+    hosted = bool(_source_host.search(text))
+    closed = bool(_closed_source.search(text))
+    if closed and not license:
+        # "open source alternative" next to "source-available" is too mixed to call
+        if not open_source:
+            facts.set("is_open_source", False, 0.8)
+        return
+    if license and (open_source or hosted):
+        facts.set("is_open_source", True, 0.95)
+    elif license or (open_source and hosted):
+        facts.set("is_open_source", True, 0.85)
+    elif open_source:
+        # "Acme is an open source ..." says it of the tool itself, not of something it works with
+        own = re.search(rf"\b{re.escape(facts.tool_name)}\b[^.!?]{{0,60}}{_open_source.pattern}", text, _I)
+        facts.set("is_open_source", True, 0.75 if own or open_source > 1 else 0.65)
+    elif hosted:
+        facts.set("is_open_source", True, 0.55)
+    elif facts.values.get("pricing_model") in ("Paid", "Enterprise"):
+        # A commercial page with no word about source code is only a hint;
+        # below the default threshold, so the LLM still answers this field
+        facts.set("is_open_source", False, 0.5)
+
+
+def _api_and_languages(text: str, facts: PageFacts):
+    install_languages = [language for pattern, language in _installs if pattern.search(text)]
+    api_signals = {m.lower() for m in _api.findall(text)}
+
+    sdk_mentions = [m for span in _sdk_list.findall(text) for m in _language.findall(span)]
+    sdk_mentions += _sdk_suffix.findall(text)
+    # Bare mentions only count for names that aren't ordinary words
+    bare = [m for m in _language.findall(text) if m.lower() not in _AMBIGUOUS_LANGUAGES]
+
+    if install_languages or sdk_mentions:
+        facts.set("api_available", True, 0.9)
+    elif len(api_signals) > 1:
+        facts.set("api_available", True, 0.8)
+    elif api_signals:
+        facts.set("api_available", True, 0.65)
+
+    languages = _canonical(install_languages + sdk_mentions, LANGUAGES)
+    if languages:
+        # Bare mentions add to a list an SDK section already vouches for
+        languages = list(dict.fromkeys(languages + _canonical(bare, LANGUAGES)))[:MAX_LIST_ITEMS]
+        facts.set("language_support", languages, 0.85)
+    else:
+        bare_languages = _canonical(bare, LANGUAGES)
+        if bare_languages:
+            facts.set("language_support", bare_languages, 0.7 if len(bare_languages) > 1 else 0.5)
+
+
+def _lists(text: str, facts: PageFacts):
+    technologies = _canonical(_technology.findall(text), TECHNOLOGIES)
+    if technologies:
+        facts.set("tech_stack", technologies, 0.75 if len(technologies) > 1 else 0.5)
+
+    own = facts.tool_name.lower()
+    integrations = [i for i in _canonical(_integration.findall(text), INTEGRATIONS) if i.lower() != own]
+    if integrations:
+        section = bool(_integrations_section.search(text))
+        facts.set("integration_capabilities", integrations, 0.8 if section else 0.5)
+
+
+def _description(text: str, facts: PageFacts):
+    name = re.escape(facts.tool_name)
+    defining = re.compile(rf"\b{name}\s+{_DESCRIPTION_VERBS}\s+", _I)
+    mentions = re.compile(rf"\b{name}\b", _I)
+    fallback = None
+    for match in _sentence.finditer(text):
+        sentence = " ".join(match.group().split())
+        start = defining.search(sentence)
+        if start and len(sentence) - start.start() >= 30:
+            facts.set("description", sentence[start.start():], 0.8)
+            return
+        if fallback is None and mentions.search(sentence):
+            fallback = sentence
+    if fallback:
+        facts.set("description", fallback, 0.4)
+
+
+def read_facts(tool_name: str, content: Optional[str]) -> PageFacts:
+    """Analysis fields the page states outright, with a confidence each"""
+    facts = PageFacts(tool_name)
+    if not content:
+        return facts
+    _pricing(content, facts)
+    # Source status reads the pricing verdict, so it comes second
+    _source(content, facts)
+    _api_and_languages(content, facts)
+    _lists(content, facts)
+    _description(content, facts)
+    return facts
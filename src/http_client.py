@@ -0,0 +1,107 @@
+import os
+import asyncio
+import importlib.util
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator
+from urllib.parse import urlsplit
+import httpx
+
+from .config import env_flag
+
+
+class HTTPPool:
+    """Long-lived pooled HTTP client shared by every workflow run"""
+
+    def __init__(self):
+        self.per_host_limit = int(os.getenv("HTTP_PER_HOST_LIMIT", "6"))
+        self.max_hosts = int(os.getenv("HTTP_MAX_HOSTS", "2000"))
+        self.http2 = env_flag("HTTP2") and importlib.util.find_spec("h2") is not None
+
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+                max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+                keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+            ),
+            timeout=httpx.Timeout(
+                connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+                read=float(os.getenv("HTTP_READ_TIMEOUT", "10")),
+                write=10.0,
+                pool=5.0
+            ),
+            http2=self.http2,
+            follow_redirects=True,
+            verify=False
+        )
+
+        # Host -> its request slots, least recently used first
+        self._host_slots: "OrderedDict[str, asyncio.Semaphore]" = OrderedDict()
+        self._in_flight: Dict[str, int] = {}
+        self.requests = 0
+        self.errors = 0
+
+    def _slot(self, host: str) -> asyncio.Semaphore:
+        if host in self._host_slots:
+            self._host_slots.move_to_end(host)
+            return self._host_slots[host]
+        self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        if len(self._host_slots) > self.max_hosts:
+            # Only idle hosts go: a host with waiters has requests in flight
+            idle = next((h for h in self._host_slots if h not in self._in_flight), None)
+            if idle is not None and idle != host:
+                del self._host_slots[idle]
+        return self._host_slots[host]
+
+    @asynccontextmanager
+    async def _track(self, url: str) -> AsyncIterator[None]:
+        host = urlsplit(url).netloc.lower()
+        async with self._slot(host):
+            self.requests += 1
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            try:
+                yield
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self._in_flight[host] -= 1
+                if not self._in_flight[host]:
+                    del self._in_flight[host]
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        async with self._track(url):
+            return await self.client.get(url, **kwargs)
+
+    async def head(self, url: str, **kwargs) -> httpx.Response:
+        async with self._track(url):
+            return await self.client.head(url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """GET without reading the body, holding the host slot until exit"""
+        async with self._track(url):
+            async with self.client.stream("GET", url, **kwargs) as response:
+                yield response
+
+    def stats(self) -> Dict[str, Any]:
+        # httpcore doesn't publish pool stats, so read them off the transport
+        connections = []
+        try:
+            connections = list(self.client._transport._pool.connections)
+        except AttributeError:
+            pass
+
+        return {
+            "http2": self.http2,
+            "per_host_limit": self.per_host_limit,
+            "connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": dict(self._in_flight),
+            "hosts": len(self._host_slots),
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
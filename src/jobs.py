@@ -0,0 +1,250 @@
+import os
+import time
+import uuid
+import asyncio
+import threading
+from typing import Optional, Dict, Any, List, Set, Callable, Awaitable
+from pydantic import BaseModel
+
+from .storage import cache_path, connect
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job(BaseModel):
+    id: str
+    query: str
+    status: str = QUEUED
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    partial: Dict[str, Any] = {}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+# Runs one job: (job, emit) -> final response. emit(event, data) reports progress.
+JobRunner = Callable[[Job, Callable[[str, Any], Awaitable[None]]], Awaitable[BaseModel]]
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """Research jobs persisted in SQLite and drained by a bounded pool of workers.
+
+    A worker claims a job by moving it from queued to running in one
+    UPDATE, so a job runs once even when several processes share the
+    database. The claim carries a lease, renewed while the job runs;
+    start() requeues running jobs whose lease ran out (their process
+    stopped) along with every job still queued, and every lease period
+    it sweeps for jobs left behind by processes that died since.
+    """
+
+    def __init__(self, runner: JobRunner, workers: Optional[int] = None, path: Optional[str] = None):
+        self.runner = runner
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "2"))
+        self.max_queued = int(os.getenv("JOB_MAX_QUEUED", "100"))
+        self.retention = float(os.getenv("JOB_RETENTION", "86400"))
+        self.lease = float(os.getenv("JOB_LEASE", "60"))
+        # Identifies this queue's claims among the processes sharing the database
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.path = path or cache_path("jobs.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                record TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                owner TEXT,
+                lease_until REAL
+            )"""
+        )
+        self._conn.commit()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # Ids in _queue, so a sweep doesn't queue the same job twice
+        self._queued: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+
+    def _save(self, job: Job):
+        with self._lock:
+            # An upsert, so the owner and lease of a claimed job are kept
+            self._conn.execute(
+                """INSERT INTO jobs (id, status, record, created_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET status = excluded.status, record = excluded.record""",
+                (job.id, job.status, job.model_dump_json(), job.created_at)
+            )
+            self._conn.commit()
+
+    def _claim(self, job_id: str) -> Optional[Job]:
+        """Take a queued job for this process; None if it is gone or another worker has it"""
+        with self._lock:
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_until = ? WHERE id = ? AND status = ?",
+                (RUNNING, self.owner, time.time() + self.lease, job_id, QUEUED)
+            ).rowcount
+            self._conn.commit()
+            if claimed != 1:
+                return None
+            row = self._conn.execute("SELECT record FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.model_validate_json(row[0])
+
+    def _renew(self, job_id: str) -> bool:
+        """Extend this process's lease on a running job; False if it has lost it"""
+        with self._lock:
+            renewed = self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND owner = ? AND status = ?",
+                (time.time() + self.lease, job_id, self.owner, RUNNING)
+            ).rowcount
+            self._conn.commit()
+        return renewed == 1
+
+    def _release(self, job_id: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = 0 WHERE id = ? AND owner = ?", (job_id, self.owner)
+            )
+            self._conn.commit()
+
+    def _recover(self) -> List[str]:
+        """Requeue running jobs whose lease has expired; ids of every queued job, oldest first"""
+        with self._lock:
+            expired = self._conn.execute(
+                "SELECT id, record FROM jobs WHERE status = ? AND (lease_until IS NULL OR lease_until < ?)",
+                (RUNNING, time.time())
+            ).fetchall()
+            for job_id, record in expired:
+                # Its process stopped mid-run: start over
+                job = Job.model_validate_json(record)
+                job.status = QUEUED
+                job.partial = {}
+                job.started_at = None
+                self._conn.execute(
+                    """UPDATE jobs SET status = ?, record = ?, owner = NULL, lease_until = NULL
+                    WHERE id = ? AND status = ? AND (lease_until IS NULL OR lease_until < ?)""",
+                    (QUEUED, job.model_dump_json(), job_id, RUNNING, time.time())
+                )
+            self._conn.commit()
+            queued = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [job_id for (job_id,) in queued]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.model_validate_json(row[0]) if row else None
+
+    def submit(self, query: str) -> Job:
+        if self._queue.qsize() >= self.max_queued:
+            raise QueueFull(f"{self.max_queued} jobs already queued")
+        job = Job(id=str(uuid.uuid4()), query=query, created_at=time.time())
+        self._save(job)
+        self._enqueue(job.id)
+        return job
+
+    def _enqueue(self, job_id: str) -> bool:
+        if job_id in self._queued:
+            return False
+        self._queued.add(job_id)
+        self._queue.put_nowait(job_id)
+        return True
+
+    async def start(self):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND created_at < ?",
+                (DONE, FAILED, time.time() - self.retention)
+            )
+            self._conn.commit()
+
+        pending = self._recover()
+        for job_id in pending:
+            self._enqueue(job_id)
+        if pending:
+            print(f"♻️ Resuming {len(pending)} queued research jobs")
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        with self._lock:
+            self._conn.close()
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            job = await asyncio.to_thread(self._claim, job_id)
+            if job is None:
+                continue
+            await self._run(job)
+
+    async def _sweep(self):
+        """Pick up jobs from workers sharing the database that stopped without finishing them"""
+        while True:
+            await asyncio.sleep(self.lease)
+            try:
+                found = sum(self._enqueue(job_id) for job_id in await asyncio.to_thread(self._recover))
+            except Exception as e:
+                print(f"⚠️ Job sweep failed: {e}")
+                continue
+            if found:
+                print(f"♻️ Picked up {found} orphaned research jobs")
+
+    async def _keep_lease(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            if not await asyncio.to_thread(self._renew, job_id):
+                print(f"⚠️ Lost the lease on job {job_id}")
+                return
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        await asyncio.to_thread(self._save, job)
+        lease = asyncio.create_task(self._keep_lease(job.id))
+
+        async def emit(event: str, data: Any):
+            if event == "tools":
+                job.partial["tools"] = data
+            elif event == "company":
+                job.partial.setdefault("companies", []).append(data)
+            else:
+                return
+            await asyncio.to_thread(self._save, job)
+
+        try:
+            response = await self.runner(job, emit)
+            job.status = DONE
+            job.result = response.model_dump()
+        except asyncio.CancelledError:
+            # Shutting down; leave it RUNNING with an expired lease so the next start() requeues it
+            self._release(job.id)
+            raise
+        except Exception as e:
+            print(f"❌ Job {job.id} failed: {e}")
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            lease.cancel()
+        job.finished_at = time.time()
+        await asyncio.to_thread(self._save, job)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            **{status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)},
+        }
@@ -0,0 +1,158 @@
+import os
+import re
+import time
+import threading
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel
+
+from .models import CompanyInfo
+from .storage import cache_path, connect
+from .metrics import CACHE_LOOKUPS
+
+
+def normalize_tool_name(name: str) -> str:
+    """'Supabase', ' supabase.com ', 'Supa-base' -> 'supabase'"""
+    name = name.lower().strip()
+    name = re.sub(r'\.(com|io|dev|app|sh|so|ai|org|net|co)$', '', name)
+    return re.sub(r'[^a-z0-9+#]', '', name)
+
+
+class KnowledgeEntry(BaseModel):
+    key: str
+    company: CompanyInfo
+    aliases: List[str] = []
+    last_verified: float
+
+    def age(self) -> float:
+        return time.time() - self.last_verified
+
+
+class KnowledgeBase:
+    """Persistent store of researched tools, indexed by normalized name and alias"""
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None):
+        self.path = path or cache_path("knowledge.sqlite3")
+        self.ttl = ttl if ttl is not None else float(os.getenv("KNOWLEDGE_TTL", str(7 * 86400)))
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS tools (
+                key TEXT PRIMARY KEY,
+                record TEXT NOT NULL,
+                last_verified REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS aliases (
+                alias TEXT PRIMARY KEY,
+                key TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS aliases_by_key ON aliases(key);"""
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+
+    def _resolve(self, name: str) -> Optional[str]:
+        alias = normalize_tool_name(name)
+        # A tool's own name beats an alias another tool picked up first
+        row = (
+            self._conn.execute("SELECT key FROM tools WHERE key = ?", (alias,)).fetchone()
+            or self._conn.execute("SELECT key FROM aliases WHERE alias = ?", (alias,)).fetchone()
+        )
+        return row[0] if row else None
+
+    def _aliases(self, key: str) -> List[str]:
+        rows = self._conn.execute("SELECT alias FROM aliases WHERE key = ? ORDER BY alias", (key,))
+        return [alias for (alias,) in rows]
+
+    def get(self, name: str) -> Optional[KnowledgeEntry]:
+        with self._lock:
+            key = self._resolve(name)
+            row = key and self._conn.execute(
+                "SELECT record, last_verified FROM tools WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            return KnowledgeEntry(
+                key=key,
+                company=CompanyInfo.model_validate_json(row[0]),
+                aliases=self._aliases(key),
+                last_verified=row[1]
+            )
+
+    def lookup(self, name: str) -> Optional[KnowledgeEntry]:
+        """Fresh entry for a tool, or None if unknown or due for re-research"""
+        entry = self.get(name)
+        if entry is None:
+            self.misses += 1
+            CACHE_LOOKUPS.inc(cache="knowledge", result="miss")
+            return None
+        if entry.age() >= self.ttl:
+            self.stale += 1
+            CACHE_LOOKUPS.inc(cache="knowledge", result="stale")
+            return None
+        self.hits += 1
+        CACHE_LOOKUPS.inc(cache="knowledge", result="hit")
+        return entry
+
+    def put(self, company: CompanyInfo, aliases: Optional[List[str]] = None):
+        """Store company under its normalized name, also reachable by aliases (e.g. its site's domain)"""
+        key = normalize_tool_name(company.name)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO tools VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE "
+                "SET record = excluded.record, last_verified = excluded.last_verified",
+                (key, company.model_dump_json(), time.time())
+            )
+            for name in [company.name, *(aliases or [])]:
+                alias = normalize_tool_name(name)
+                if not alias:
+                    continue
+                # Never steal an alias that already belongs to another tool
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO aliases VALUES (?, ?)", (alias, key)
+                )
+            self._conn.commit()
+
+    def invalidate(self, name: str) -> bool:
+        with self._lock:
+            key = self._resolve(name) or normalize_tool_name(name)
+            deleted = self._conn.execute("DELETE FROM tools WHERE key = ?", (key,)).rowcount
+            self._conn.execute("DELETE FROM aliases WHERE key = ?", (key,))
+            self._conn.commit()
+        return bool(deleted)
+
+    def entries(self, limit: int = 100, offset: int = 0) -> List[KnowledgeEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, record, last_verified FROM tools ORDER BY key LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+            return [
+                KnowledgeEntry(
+                    key=key,
+                    company=CompanyInfo.model_validate_json(record),
+                    aliases=self._aliases(key),
+                    last_verified=last_verified
+                )
+                for key, record, last_verified in rows
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM tools").fetchone()
+            (stale,) = self._conn.execute(
+                "SELECT COUNT(*) FROM tools WHERE last_verified < ?", (time.time() - self.ttl,)
+            ).fetchone()
+        return {
+            "entries": entries,
+            "stale_entries": stale,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,104 +1,426 @@
 import os
 import json
 import re
-from groq import Groq
+import asyncio
+from typing import Optional, AsyncIterator, Callable, TypeVar, Any
+import groq
+from groq import AsyncGroq
+from pydantic import ValidationError
 from .models import CompanyAnalysis
 from .prompts import DeveloperToolsPrompts
+from .cache import LLMCache
+from .config import env_flag
+from .metrics import span, EXTERNAL_SECONDS, GROQ_TOKENS, LLM_ESCALATIONS, ERRORS
+from . import resilience
+
+T = TypeVar("T")
+
+LARGE_MODEL = "llama-3.3-70b-versatile"
+SMALL_MODEL = "llama-3.1-8b-instant"
+# Tier each method runs on unless LLM_MODEL_<METHOD> says otherwise. Extraction and
+# analysis are structured tasks a small model handles; its unusable replies escalate.
+METHOD_TIERS = {
+    "extract_tools": "small",
+    "analyze_tool": "small",
+    "analyze_tools": "small",
+    "generate_recommendations": "large",
+}
+
+
+class UnusableReply(ValueError):
+    """A reply that parsed to nothing the method can use"""
+
+
+def _retryable(error: BaseException) -> bool:
+    return isinstance(error, (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError))
 
 
 class LLMService:
     
-    def __init__(self):
+    def __init__(self, cache: Optional[LLMCache] = None):
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise ValueError("Missing GROQ_API_KEY")
-        self.client = Groq(api_key=api_key)
-        self.model = "llama-3.3-70b-versatile"
+        # Retries are done by resilience.call so they respect the research deadline
+        self.client = AsyncGroq(api_key=api_key, max_retries=0)
+        self.retries = int(os.getenv("LLM_RETRIES", "2"))
+        self.timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+        self.breaker = resilience.breaker("groq")
+        self.large_model = os.getenv("LLM_MODEL", LARGE_MODEL)
+        self.small_model = os.getenv("LLM_SMALL_MODEL", SMALL_MODEL)
+        tiers = {"small": self.small_model, "large": self.large_model}
+        # LLM_MODEL_<METHOD> is a tier name or a Groq model id
+        self.models = {
+            method: tiers.get(choice, choice)
+            for method, choice in ((m, os.getenv(f"LLM_MODEL_{m.upper()}", tier)) for m, tier in METHOD_TIERS.items())
+        }
+        # Retry unusable replies on the large model
+        self.escalate = env_flag("LLM_ESCALATE", True)
         self.prompts = DeveloperToolsPrompts()
+        self.cache = cache
+    
+    def _count_tokens(self, method: str, model: str, usage):
+        if usage:
+            GROQ_TOKENS.inc(usage.prompt_tokens or 0, method=method, model=model, type="prompt")
+            GROQ_TOKENS.inc(usage.completion_tokens or 0, method=method, model=model, type="completion")
+    
+    def _tiers(self, method: str) -> list[str]:
+        """Models to try for method in order: its own, then the large one if escalation applies"""
+        model = self.models[method]
+        return [model, self.large_model] if self.escalate and model != self.large_model else [model]
+    
+    @staticmethod
+    def _escalating(method: str, model: str, reason: str):
+        print(f"⬆️ {method}: unusable reply from {model} ({reason}), retrying on the large model")
+        LLM_ESCALATIONS.inc(method=method, model=model)
     
-    def extract_tools(self, query: str, content: str) -> list[str]:
+    async def _complete_parsed(self, method: str, parse: Callable[[str], T], **request) -> T:
+        """_complete with parse; a ValueError from parse escalates to the large model"""
+        models = self._tiers(method)
+        for i, model in enumerate(models):
+            try:
+                return await self._complete(method, model=model, parse=parse, **request)
+            except ValueError as e:
+                if i == len(models) - 1:
+                    raise
+                self._escalating(method, model, type(e).__name__)
+    
+    async def _forget(self, key: str):
+        print("🗑️ Cached LLM reply is unusable, asking again")
+        await asyncio.to_thread(self.cache.delete, key)
+    
+    async def _complete(
+        self,
+        method: str,
+        messages: list[dict],
+        temperature: float,
+        max_tokens: int,
+        use_cache: bool = True,
+        model: Optional[str] = None,
+        parse: Optional[Callable[[str], Any]] = None
+    ) -> Any:
+        """The reply text, or parse(text) when parse is given.
+        
+        A reply is only cached once it parses, so an unusable one is asked
+        for again next time instead of being served from the cache.
+        """
+        model = model or self.models[method]
+        key = None
+        if self.cache and use_cache:
+            key = LLMCache.fingerprint(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                try:
+                    result = parse(cached) if parse else cached
+                    print("💾 LLM cache hit")
+                    return result
+                except ValueError:
+                    await self._forget(key)
+        
+        with span(EXTERNAL_SECONDS, "groq", service="groq", operation=method):
+            response = await resilience.call(
+                lambda: self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                ),
+                self.breaker, _retryable, self.retries, self.timeout
+            )
+        self._count_tokens(method, model, response.usage)
+        text = response.choices[0].message.content.strip()
+        
+        result = parse(text) if parse else text
+        if key and text:
+            await asyncio.to_thread(self.cache.put, key, text)
+        return result
+    
+    async def _stream(
+        self,
+        method: str,
+        messages: list[dict],
+        temperature: float,
+        max_tokens: int,
+        use_cache: bool = True,
+        model: Optional[str] = None,
+        validate: Optional[Callable[[str], Any]] = None
+    ) -> AsyncIterator[str]:
+        """Reply deltas as they arrive; the full reply is cached only if validate accepts it"""
+        model = model or self.models[method]
+        key = None
+        if self.cache and use_cache:
+            key = LLMCache.fingerprint(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                try:
+                    if validate:
+                        validate(cached)
+                except ValueError:
+                    await self._forget(key)
+                else:
+                    print("💾 LLM cache hit")
+                    yield cached
+                    return
+        
+        chunks = []
+        with span(EXTERNAL_SECONDS, "groq", service="groq", operation=method):
+            # Only opening the stream is retried; a failure mid-stream would repeat text
+            stream = await resilience.call(
+                lambda: self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True
+                ),
+                self.breaker, _retryable, self.retries, self.timeout
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+                # Groq reports usage on the final chunk
+                x_groq = getattr(chunk, "x_groq", None)
+                self._count_tokens(method, model, getattr(chunk, "usage", None) or getattr(x_groq, "usage", None))
+        
+        text = "".join(chunks).strip()
+        if key and text:
+            try:
+                if validate:
+                    validate(text)
+            except ValueError:
+                return
+            await asyncio.to_thread(self.cache.put, key, text)
+    
+    async def extract_tools(self, query: str, content: str, use_cache: bool = True) -> list[str]:
         try:
             print(f"🤖 Extracting tools from {len(content)} chars...")
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            tools = await self._complete_parsed(
+                "extract_tools",
+                self._parse_tools,
                 messages=[
                     {"role": "system", "content": self.prompts.TOOL_EXTRACTION_SYSTEM},
                     {"role": "user", "content": self.prompts.tool_extraction_user(query, content)}
                 ],
                 temperature=0.1,
-                max_tokens=500
+                max_tokens=500,
+                use_cache=use_cache
             )
             
-            text = response.choices[0].message.content.strip()
-            print(f"🤖 LLM response: {text[:100]}")
-            
-            # Parse tool names
-            tools = []
-            for line in text.split("\n"):
-                line = line.strip()
-                # Remove numbering, bullets, dashes
-                line = re.sub(r'^[\d\.\-\*\•]+\s*', '', line)
-                if line and len(line) < 50 and not line.startswith("Example"):
-                    tools.append(line)
-            
             print(f"✅ Extracted tools: {tools}")
             return tools[:5]
             
         except Exception as e:
             print(f"❌ Tool extraction error: {e}")
+            ERRORS.inc(stage="extract")
             return []
     
-    def analyze_tool(self, tool_name: str, content: str) -> CompanyAnalysis:
+    async def stream_tools(self, query: str, content: str, use_cache: bool = True) -> AsyncIterator[str]:
+        """Same prompt as extract_tools, yielding each tool name as soon as its line is complete"""
+        found = 0
+        try:
+            print(f"🤖 Streaming tool extraction from {len(content)} chars...")
+            models = self._tiers("extract_tools")
+            for model in models:
+                buffer = ""
+                async for delta in self._stream(
+                    "extract_tools",
+                    messages=[
+                        {"role": "system", "content": self.prompts.TOOL_EXTRACTION_SYSTEM},
+                        {"role": "user", "content": self.prompts.tool_extraction_user(query, content)}
+                    ],
+                    temperature=0.1,
+                    max_tokens=500,
+                    use_cache=use_cache,
+                    model=model,
+                    validate=self._parse_tools
+                ):
+                    buffer += delta
+                    *lines, buffer = buffer.split("\n")
+                    for line in lines:
+                        tool = self._parse_tool_line(line)
+                        # Keep reading past the fifth tool so the full reply gets cached
+                        if tool and found < 5:
+                            found += 1
+                            yield tool
+                
+                tool = self._parse_tool_line(buffer)
+                if tool and found < 5:
+                    found += 1
+                    yield tool
+                # Nothing has been yielded yet, so the large model can start over cleanly
+                if found or model == models[-1]:
+                    break
+                self._escalating("extract_tools", model, "no tools")
+        except Exception as e:
+            print(f"❌ Tool extraction stream error: {e}")
+            ERRORS.inc(stage="extract")
+    
+    def _parse_tools(self, text: str) -> list[str]:
+        print(f"🤖 LLM response: {text[:100]}")
+        tools = [tool for tool in map(self._parse_tool_line, text.split("\n")) if tool]
+        if not tools:
+            raise UnusableReply("no tool names")
+        return tools
+    
+    @staticmethod
+    def _parse_tool_line(line: str) -> Optional[str]:
+        line = line.strip()
+        # Remove numbering, bullets, dashes
+        line = re.sub(r'^[\d\.\-\*\•]+\s*', '', line)
+        if line and len(line) < 50 and not line.startswith("Example"):
+            return line
+        return None
+    
+    async def analyze_tool(
+        self,
+        tool_name: str,
+        content: str,
+        use_cache: bool = True,
+        fields: Optional[list[str]] = None
+    ) -> Optional[CompanyAnalysis]:
+        """fields asks for just those analysis fields; the others come back as defaults"""
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._complete_parsed(
+                "analyze_tool",
+                lambda text: self._to_analysis(tool_name, self._require_json(text)),
                 messages=[
                     {"role": "system", "content": self.prompts.TOOL_ANALYSIS_SYSTEM},
-                    {"role": "user", "content": self.prompts.tool_analysis_user(tool_name, content)}
+                    {"role": "user", "content": self.prompts.tool_analysis_user(tool_name, content, fields)}
                 ],
                 temperature=0.1,
-                max_tokens=800
-            )
-            
-            text = response.choices[0].message.content.strip()
-            json_data = self._extract_json(text)
-            
-            return CompanyAnalysis(
-                pricing_model=json_data.get("pricing_model", "Unknown"),
-                is_open_source=json_data.get("is_open_source"),
-                tech_stack=json_data.get("tech_stack", []),
-                description=json_data.get("description", f"{tool_name} - developer tool"),
-                api_available=json_data.get("api_available"),
-                language_support=json_data.get("language_support", []),
-                integration_capabilities=json_data.get("integration_capabilities", [])
+                max_tokens=800,
+                use_cache=use_cache
             )
             
         except Exception as e:
+            # None tells the workflow to fall back to the search snippet
             print(f"❌ Analysis error: {e}")
-            return CompanyAnalysis(
-                pricing_model="Unknown",
-                description=f"{tool_name} - developer tool"
+            ERRORS.inc(stage="analyze")
+            return None
+    
+    async def analyze_tools(
+        self,
+        pages: list[tuple[str, str]],
+        use_cache: bool = True,
+        fields: Optional[list[str]] = None
+    ) -> list[Optional[CompanyAnalysis]]:
+        """Analyze several (tool_name, content) pages in one request.
+        
+        Elements missing from the reply or failing validation are retried
+        individually with analyze_tool. Results follow the order of pages;
+        None marks a tool that could not be analyzed. fields works as in
+        analyze_tool, for every page.
+        """
+        if len(pages) == 1:
+            return [await self.analyze_tool(*pages[0], use_cache=use_cache, fields=fields)]
+        
+        analyses: list[Optional[CompanyAnalysis]] = [None] * len(pages)
+        try:
+            print(f"🤖 Batch analyzing {len(pages)} tools...")
+            items = await self._complete_parsed(
+                "analyze_tools",
+                self._require_json_array,
+                messages=[
+                    {"role": "system", "content": self.prompts.TOOL_BATCH_ANALYSIS_SYSTEM},
+                    {"role": "user", "content": self.prompts.tool_batch_analysis_user(pages, fields)}
+                ],
+                temperature=0.1,
+                max_tokens=min(600 * len(pages) + 200, 4000),
+                use_cache=use_cache
             )
+            
+            positions = {name.lower(): i for i, (name, _) in enumerate(pages)}
+            for i, item in enumerate(items):
+                if not isinstance(item, dict):
+                    continue
+                # Prefer the echoed name, fall back to position
+                index = positions.get(str(item.get("name", "")).lower(), i)
+                if index >= len(pages) or analyses[index] is not None:
+                    continue
+                try:
+                    analyses[index] = self._to_analysis(pages[index][0], item)
+                except ValidationError as e:
+                    print(f"⚠️ Invalid batch entry for {pages[index][0]}: {e.error_count()} errors")
+        
+        except (resilience.DeadlineExceeded, resilience.CircuitOpen) as e:
+            # Retrying tool by tool would fail the same way
+            print(f"❌ Batch analysis error: {e}")
+            ERRORS.inc(stage="analyze")
+            return analyses
+        except Exception as e:
+            print(f"❌ Batch analysis error: {e}")
+            ERRORS.inc(stage="analyze")
+        
+        missing = [i for i, a in enumerate(analyses) if a is None]
+        if missing:
+            print(f"🔁 Falling back to single analysis for {len(missing)} tools")
+            retried = await asyncio.gather(*(self.analyze_tool(*pages[i], use_cache=use_cache, fields=fields) for i in missing))
+            for i, analysis in zip(missing, retried):
+                analyses[i] = analysis
+        
+        return analyses
+    
+    @staticmethod
+    def _to_analysis(tool_name: str, json_data: dict) -> CompanyAnalysis:
+        return CompanyAnalysis(
+            pricing_model=json_data.get("pricing_model", "Unknown"),
+            is_open_source=json_data.get("is_open_source"),
+            tech_stack=json_data.get("tech_stack", []),
+            description=json_data.get("description", f"{tool_name} - developer tool"),
+            api_available=json_data.get("api_available"),
+            language_support=json_data.get("language_support", []),
+            integration_capabilities=json_data.get("integration_capabilities", [])
+        )
     
-    def generate_recommendations(self, query: str, tools_data: str) -> str:
+    async def generate_recommendations(self, query: str, tools_data: str, use_cache: bool = True) -> str:
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._complete(
+                "generate_recommendations",
                 messages=[
                     {"role": "system", "content": self.prompts.RECOMMENDATIONS_SYSTEM},
                     {"role": "user", "content": self.prompts.recommendations_user(query, tools_data)}
                 ],
                 temperature=0.3,
-                max_tokens=1000
+                max_tokens=1000,
+                use_cache=use_cache
             )
             
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             print(f"❌ Recommendations error: {e}")
+            ERRORS.inc(stage="recommend")
             return "Unable to generate recommendations."
     
+    async def stream_recommendations(self, query: str, tools_data: str, use_cache: bool = True) -> AsyncIterator[str]:
+        """Same prompt as generate_recommendations, yielded token by token"""
+        try:
+            async for delta in self._stream(
+                "generate_recommendations",
+                messages=[
+                    {"role": "system", "content": self.prompts.RECOMMENDATIONS_SYSTEM},
+                    {"role": "user", "content": self.prompts.recommendations_user(query, tools_data)}
+                ],
+                temperature=0.3,
+                max_tokens=1000,
+                use_cache=use_cache
+            ):
+                yield delta
+        except Exception as e:
+            print(f"❌ Recommendations stream error: {e}")
+            ERRORS.inc(stage="recommend")
+    
     def _extract_json(self, text: str) -> dict:
         text = text.strip()
         if text.startswith("```"):
@@ -114,4 +436,34 @@ class LLMService:
                     return json.loads(match.group())
                 except:
                     pass
-            return {}
\ No newline at end of file
+            return {}
+    
+    def _require_json(self, text: str) -> dict:
+        data = self._extract_json(text)
+        if not isinstance(data, dict) or not data:
+            raise UnusableReply("no JSON object")
+        return data
+    
+    def _require_json_array(self, text: str) -> list:
+        items = self._extract_json_array(text)
+        if not items:
+            raise UnusableReply("no JSON array")
+        return items
+    
+    def _extract_json_array(self, text: str) -> list:
+        text = text.strip()
+        if text.startswith("```"):
+            lines = text.split("\n")
+            text = "\n".join(lines[1:-1])
+        
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            match = re.search(r'\[.*\]', text, re.DOTALL)
+            if not match:
+                return []
+            try:
+                data = json.loads(match.group())
+            except json.JSONDecodeError:
+                return []
+        return data if isinstance(data, list) else []
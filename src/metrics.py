@@ -0,0 +1,148 @@
+"""
+Minimal Prometheus-format metrics and timing spans.
+
+Spans record into a histogram and, when a request opted in through
+server_timing(), into that request's Server-Timing header.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Tuple, List, Optional, Iterator
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry: List["_Metric"] = []
+_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("server_timings", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def total(self, **labels: str) -> float:
+        """Sum over every label set that includes the given labels"""
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(v for k, v in self._values.items() if wanted <= set(k))
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return super().render() + [f"{self.name}{_format_labels(k)} {v}" for k, v in values]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = buckets
+        # labels -> (bucket counts, sum, count)
+        self._values: Dict[Tuple[Tuple[str, str], ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = [(k, list(c), s, n) for k, (c, s, n) in self._values.items()]
+        for key, counts, total, count in values:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', str(bound)),))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+def render() -> str:
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+@contextmanager
+def span(histogram: Histogram, timing_name: Optional[str] = None, **labels: str) -> Iterator[None]:
+    """Time a block into histogram (and Server-Timing as timing_name)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, **labels)
+        timings = _timings.get()
+        if timings is not None and timing_name:
+            timings.append((timing_name, elapsed))
+
+
+@contextmanager
+def server_timing() -> Iterator[List[Tuple[str, float]]]:
+    """Collect spans finished in this context (and tasks it starts)"""
+    timings: List[Tuple[str, float]] = []
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    # Repeated names (one per tool) are summed into a single entry
+    totals: Dict[str, float] = {}
+    for name, elapsed in timings:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in totals.items())
+
+
+STAGE_SECONDS = Histogram("research_stage_seconds", "Duration of each ResearchWorkflow node")
+EXTERNAL_SECONDS = Histogram("external_call_seconds", "Duration of calls to Tavily, Groq and scraped sites")
+GROQ_TOKENS = Counter("groq_tokens_total", "Groq tokens used, by LLMService method, model and token type")
+LLM_ESCALATIONS = Counter("llm_escalations_total", "Replies from a method's model that were unusable and retried on the large model")
+SCRAPE_BYTES = Counter("scrape_bytes_total", "HTML bytes downloaded by the scraper")
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Cache lookups by cache and result (hit, miss, stale, revalidated, coalesced)")
+ERRORS = Counter("errors_total", "Errors swallowed by each pipeline stage")
+RESEARCH_IN_FLIGHT = Gauge("research_in_flight", "Research workflows currently running")
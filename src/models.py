@@ -38,4 +38,10 @@ class ResearchState(BaseModel):
     companies: List[CompanyInfo] = []
     search_results: List[SearchResult] = []
     analysis: Optional[str] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+    # True when the deadline cut research short
+    partial: bool = False
+    # Tools answered from a previous result instead of being researched again
+    reused_tools: List[str] = []
+    # Tools answered from the knowledge base -> when their record was last verified (epoch seconds)
+    known_tools: Dict[str, float] = {}
\ No newline at end of file
@@ -1,3 +1,24 @@
+from typing import Optional, Sequence
+
+from .context import pack_context, ANALYSIS_BOOSTS, EXTRACT_CONTEXT_TOKENS, ANALYSIS_CONTEXT_TOKENS
+
+# What tool analysis asks for, field by field; partial prompts keep a subset
+ANALYSIS_SCHEMA = {
+    "pricing_model": '"Free" | "Freemium" | "Paid" | "Enterprise" | "Unknown"',
+    "is_open_source": "true | false | null",
+    "tech_stack": '["list of supported technologies"]',
+    "description": '"One sentence about what it does"',
+    "api_available": "true | false | null",
+    "language_support": '["Python", "JavaScript", etc.]',
+    "integration_capabilities": '["GitHub", "Docker", etc.]',
+}
+
+
+def _analysis_schema(fields: Optional[Sequence[str]], indent: str) -> str:
+    keys = [f for f in ANALYSIS_SCHEMA if not fields or f in fields]
+    return ",\n".join(f'{indent}"{key}": {ANALYSIS_SCHEMA[key]}' for key in keys)
+
+
 class DeveloperToolsPrompts:
     """Prompts optimized for developer tools research"""
 
@@ -10,7 +31,7 @@ Focus on actual products developers can use, not general concepts."""
         return f"""Query: {query}
 
 Article Content:
-{content[:3000]}
+{pack_context(content, query, EXTRACT_CONTEXT_TOKENS)}
 
 Extract the most relevant tool/service names for "{query}".
 
@@ -30,23 +51,39 @@ Railway"""
 Be concise and accurate. If information is not found, use appropriate defaults."""
 
     @staticmethod
-    def tool_analysis_user(tool_name: str, content: str) -> str:
+    def tool_analysis_user(tool_name: str, content: str, fields: Optional[Sequence[str]] = None) -> str:
         return f"""Tool: {tool_name}
 
 Content:
-{content[:2500]}
+{pack_context(content, tool_name, ANALYSIS_CONTEXT_TOKENS, ANALYSIS_BOOSTS)}
 
-Analyze and return a JSON object with:
+Analyze and return a JSON object with{" only these fields" if fields else ""}:
 {{
-    "pricing_model": "Free" | "Freemium" | "Paid" | "Enterprise" | "Unknown",
-    "is_open_source": true | false | null,
-    "tech_stack": ["list of supported technologies"],
-    "description": "One sentence about what it does",
-    "api_available": true | false | null,
-    "language_support": ["Python", "JavaScript", etc.],
-    "integration_capabilities": ["GitHub", "Docker", etc.]
+{_analysis_schema(fields, "    ")}
 }}
 
+Return ONLY valid JSON, no markdown formatting."""
+
+    TOOL_BATCH_ANALYSIS_SYSTEM = """You are analyzing several developer tools at once. Extract structured information for each one.
+Be concise and accurate. Keep tools separate and never mix facts between them.
+If information is not found, use appropriate defaults."""
+
+    @staticmethod
+    def tool_batch_analysis_user(pages: list[tuple[str, str]], fields: Optional[Sequence[str]] = None) -> str:
+        sections = "\n\n".join(
+            f"### Tool {i}: {tool_name}\nContent:\n{pack_context(content, tool_name, ANALYSIS_CONTEXT_TOKENS, ANALYSIS_BOOSTS)}"
+            for i, (tool_name, content) in enumerate(pages, start=1)
+        )
+        return f"""{sections}
+
+Analyze each of the {len(pages)} tools above and return a JSON array with one object per tool, in the same order{", with only these fields" if fields else ""}:
+[
+    {{
+        "name": "Tool name exactly as given",
+{_analysis_schema(fields, "        ")}
+    }}
+]
+
 Return ONLY valid JSON, no markdown formatting."""
 
     RECOMMENDATIONS_SYSTEM = """You are a senior developer giving concise tech recommendations.
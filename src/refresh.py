@@ -0,0 +1,90 @@
+"""
+Background refresh of stale research results.
+
+POST /research answers a repeat query from an expired cache entry right
+away and schedules the query here. Each query is queued at most once at a
+time, refreshes start no faster than REFRESH_PER_MINUTE, and when the
+queue is full new queries are dropped; the next stale hit schedules them
+again.
+"""
+import os
+import asyncio
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+from .cache import normalize_query
+from .metrics import Counter
+
+RESULT_REFRESHES = Counter("result_refreshes_total", "Background refreshes of stale research results by outcome")
+
+# Refreshes one query; False when there was nothing to do (another worker got there first)
+Refresher = Callable[[str], Awaitable[bool]]
+
+
+class RefreshQueue:
+    """Deduplicated, rate-limited queue of queries whose cached results went stale"""
+
+    def __init__(self, refresher: Refresher, per_minute: Optional[float] = None, max_queued: Optional[int] = None):
+        self.refresher = refresher
+        per_minute = per_minute or float(os.getenv("REFRESH_PER_MINUTE", "6"))
+        self.interval = 60.0 / per_minute
+        self.max_queued = max_queued or int(os.getenv("REFRESH_MAX_QUEUED", "50"))
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # Normalized query -> query, from scheduling until its refresh finishes
+        self._pending: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.counts: Dict[str, int] = {}
+
+    def _count(self, outcome: str):
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        RESULT_REFRESHES.inc(outcome=outcome)
+
+    def schedule(self, query: str) -> bool:
+        """Queue a refresh of query; False if one is already pending or the queue is full"""
+        key = normalize_query(query)
+        if key in self._pending:
+            self._count("deduplicated")
+            return False
+        if self._queue.qsize() >= self.max_queued:
+            self._count("dropped")
+            return False
+        self._pending[key] = query
+        self._queue.put_nowait(key)
+        self._count("scheduled")
+        return True
+
+    async def start(self):
+        self._task = asyncio.create_task(self._worker())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        next_start = loop.time()
+        while True:
+            key = await self._queue.get()
+            # Rate limit on start times, so a slow refresh doesn't delay the next one further
+            await asyncio.sleep(max(0.0, next_start - loop.time()))
+            next_start = loop.time() + self.interval
+            query = self._pending[key]
+            try:
+                print(f"🔄 Refreshing stale result for '{query}'")
+                self._count("done" if await self.refresher(query) else "skipped")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Refresh failed for '{query}': {e}")
+                self._count("failed")
+            finally:
+                self._pending.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "pending": len(self._pending),
+            "per_minute": round(60.0 / self.interval, 2),
+            "max_queued": self.max_queued,
+            **self.counts,
+        }
@@ -0,0 +1,285 @@
+"""
+Deadlines, retries and circuit breakers for calls to external services.
+
+A research run sets a deadline with deadline(); every call made under it
+(including in tasks it starts) gets at most the remaining time. call()
+retries transient failures with jittered exponential backoff, honoring
+Retry-After when the service sends one, and consults a circuit breaker
+so a provider or host that keeps failing is skipped instead of waited on.
+"""
+import os
+import time
+import random
+import asyncio
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Callable, Awaitable, Iterator, TypeVar
+
+from .metrics import Counter
+
+T = TypeVar("T")
+
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+# A Retry-After longer than this is treated as "give up" rather than waited out
+RETRY_MAX_WAIT = float(os.getenv("RETRY_MAX_WAIT", "30"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", "30"))
+# Per-host breakers kept; past this the least recently used healthy one is dropped
+BREAKER_MAX_HOSTS = int(os.getenv("BREAKER_MAX_HOSTS", "2000"))
+
+RETRIES = Counter("retries_total", "Retried external calls by breaker name")
+BREAKER_REJECTIONS = Counter("breaker_rejections_total", "Calls skipped because a circuit breaker was open")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    pass
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class RetryableError(Exception):
+    """Raised by a call for a response worth retrying (429, 5xx)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after
+
+
+# Deadlines
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Limit everything run in this context to seconds from now (never extends an outer deadline)"""
+    if not seconds:
+        yield
+        return
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(min(at, outer) if outer is not None else at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one"""
+    at = _deadline.get()
+    return None if at is None else max(0.0, at - time.monotonic())
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def time_left(timeout: Optional[float] = None) -> Optional[float]:
+    """timeout capped to the remaining deadline; raises once it has passed"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("Research deadline exceeded")
+    return min(timeout, left) if timeout else left
+
+
+# Circuit breakers
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through per reset period"""
+
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, reset_after: float = BREAKER_RESET):
+        self.name = name
+        self.max_failures = failures
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half_open":
+            # One trial call; the clock restarts so concurrent callers still wait
+            self.opened_at = time.monotonic()
+            return True
+        if state == "open":
+            self.rejected += 1
+            BREAKER_REJECTIONS.inc(breaker=self.name)
+            return False
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.max_failures:
+            if self.opened_at is None:
+                print(f"🔌 Circuit open for {self.name}")
+            self.opened_at = time.monotonic()
+
+    def trip(self):
+        """Open now, for failures that retrying can't fix (a spent quota)"""
+        if self.opened_at is None:
+            print(f"🔌 Circuit open for {self.name}")
+        self.failures = max(self.failures, self.max_failures)
+        self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures, "rejected": self.rejected}
+
+
+# Provider breakers (one per service) and per-host ones, which need a bound
+_breakers: Dict[str, CircuitBreaker] = {}
+_host_breakers: "OrderedDict[str, CircuitBreaker]" = OrderedDict()
+
+
+def breaker(name: str) -> CircuitBreaker:
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+
+def host_breaker(host: str) -> CircuitBreaker:
+    """Breaker for one website, from an LRU of at most BREAKER_MAX_HOSTS"""
+    if host in _host_breakers:
+        _host_breakers.move_to_end(host)
+        return _host_breakers[host]
+    _host_breakers[host] = CircuitBreaker(f"host:{host}")
+    if len(_host_breakers) > BREAKER_MAX_HOSTS:
+        # A breaker with no failures is no different from a new one; failing hosts are kept
+        healthy = next((h for h, b in _host_breakers.items() if not b.failures and b.opened_at is None), None)
+        if healthy is not None and healthy != host:
+            del _host_breakers[healthy]
+    return _host_breakers[host]
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    # Only report breakers that have seen trouble; per-host ones add up
+    breakers = [*_breakers.values(), *_host_breakers.values()]
+    return {b.name: b.stats() for b in breakers if b.failures or b.opened_at or b.rejected}
+
+
+# Retries
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header value (seconds or HTTP date) as seconds from now"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the service asked us to wait, from the error or its HTTP response"""
+    seconds = getattr(error, "retry_after_seconds", None)
+    if seconds is not None:
+        return float(seconds)
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    return parse_retry_after(headers.get("retry-after")) if headers is not None else None
+
+
+def backoff(attempt: int, error: Optional[BaseException] = None) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After when given"""
+    asked = retry_after(error) if error is not None else None
+    if asked is not None:
+        return asked
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def call(
+    fn: Callable[[], Awaitable[T]],
+    circuit: CircuitBreaker,
+    retryable: Callable[[BaseException], bool],
+    retries: int = 2,
+    timeout: Optional[float] = None
+) -> T:
+    """Run fn with retries, a per-attempt timeout and the circuit breaker.
+
+    Only retryable errors count against the breaker; others (bad requests,
+    parse failures) are raised straight away.
+    """
+    attempt = 0
+    while True:
+        attempt_timeout = time_left(timeout)
+        if not circuit.allow():
+            raise CircuitOpen(f"{circuit.name} circuit is open")
+        try:
+            result = await asyncio.wait_for(fn(), timeout=attempt_timeout) if attempt_timeout else await fn()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            transient = isinstance(e, asyncio.TimeoutError) or retryable(e)
+            if not transient:
+                raise
+            if expired():
+                # Our deadline, not the service's fault
+                raise DeadlineExceeded("Research deadline exceeded") from e
+            circuit.record_failure()
+            if attempt >= retries:
+                raise
+            delay = backoff(attempt, e)
+            left = remaining()
+            if delay > RETRY_MAX_WAIT or (left is not None and delay >= left):
+                raise
+            attempt += 1
+            RETRIES.inc(breaker=circuit.name)
+            print(f"🔁 {circuit.name}: retry {attempt}/{retries} in {delay:.1f}s ({type(e).__name__})")
+            await asyncio.sleep(delay)
+            continue
+        circuit.record_success()
+        return result
+
+
+async def hedged(fn: Callable[[], Awaitable[T]], after: float) -> T:
+    """Start a second copy of fn if the first hasn't finished after `after` seconds.
+
+    The first to succeed wins and the other is cancelled. With after <= 0
+    this is a plain await.
+    """
+    if after <= 0:
+        return await fn()
+    first = asyncio.ensure_future(fn())
+    try:
+        done, _ = await asyncio.wait({first}, timeout=after)
+    except asyncio.CancelledError:
+        first.cancel()
+        raise
+    if done:
+        return first.result()
+
+    pending = {first, asyncio.ensure_future(fn())}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,225 @@
+"""
+Finding a tool's official site without a search call.
+
+SiteIndex maps normalized tool names to homepages: a bundled list of
+well-known tools plus sites learned from earlier Tavily results.
+SiteResolver checks the index first, then probes likely domains
+(supabase.com, supabase.io, ...) with HEAD requests. A probed site only
+counts once its og:site_name or <title> names the tool. Only when both
+come up empty does the workflow fall back to search_official_site().
+Learned sites are tagged with where they came from (probe or search)
+and expire after SITE_INDEX_TTL.
+"""
+import os
+import re
+import json
+import time
+import asyncio
+import threading
+from typing import Optional, Dict, Any, List, Tuple, Sequence
+from urllib.parse import urlsplit
+
+from .models import SearchResult
+from .scraper import Page
+from .http_client import HTTPPool
+from .storage import cache_path, connect
+from .knowledge import normalize_tool_name
+from .metrics import Counter
+from . import resilience
+
+BUNDLED_SITES = os.path.join(os.path.dirname(__file__), "official_sites.json")
+# Probe order: a tool's own name is usually on one of these
+PROBE_TLDS = ("com", "io", "dev", "ai", "app", "so", "sh", "tech")
+
+RESOLVER_LOOKUPS = Counter("site_resolver_total", "Official-site lookups by how they were answered")
+
+_domain = re.compile(r"^[a-z0-9-]+(\.[a-z0-9-]+)*\.[a-z]{2,}$")
+# Between a site's name and its tagline in a <title>: "Supabase | The Postgres Development Platform"
+_title_separator = re.compile(r"\s+[|\-–—:·•]\s+|\s*[|–—·•]\s*")
+
+
+def _host_matches(host: str, tokens: List[str]) -> bool:
+    """True if one of the tool's name tokens appears in host (ignoring www and punctuation)"""
+    host = re.sub(r"^www\.", "", host.lower())
+    flat = re.sub(r"[^a-z0-9]", "", host)
+    return any(token and token in flat for token in tokens)
+
+
+def _names_match(names: Sequence[str], tool_name: str) -> bool:
+    """True if a page's og:site_name or a part of its <title> is the tool's name"""
+    key = normalize_tool_name(tool_name)
+    parts = [part for name in names for part in [name, *_title_separator.split(name)]]
+    return bool(key) and any(normalize_tool_name(part) == key for part in parts)
+
+
+def _name_tokens(tool_name: str) -> List[str]:
+    """'Hugging Face' -> ['huggingface', 'hugging']; the first word must be long enough to mean something"""
+    key = normalize_tool_name(tool_name)
+    words = re.findall(r"[a-z0-9]+", tool_name.lower())
+    tokens = [key]
+    if len(words) > 1 and len(words[0]) >= 4 and words[0] != key:
+        tokens.append(words[0])
+    return tokens
+
+
+class SiteIndex:
+    """Bundled and learned tool -> homepage map, shared by every workflow"""
+
+    def __init__(self, path: Optional[str] = None, bundled_path: Optional[str] = None, ttl: Optional[float] = None):
+        try:
+            with open(bundled_path or os.getenv("SITE_INDEX_FILE") or BUNDLED_SITES) as f:
+                self.bundled = {normalize_tool_name(name): url for name, url in json.load(f).items()}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Bundled site index unavailable: {e}")
+            self.bundled = {}
+
+        self.path = path or cache_path("sites.sqlite3")
+        self.ttl = ttl if ttl is not None else float(os.getenv("SITE_INDEX_TTL", str(30 * 86400)))
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS sites (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                learned_at REAL NOT NULL,
+                source TEXT NOT NULL DEFAULT 'probe'
+            )"""
+        )
+        self._conn.commit()
+        self.counts: Dict[str, int] = {}
+
+    def lookup(self, name: str) -> Optional[Tuple[str, str]]:
+        """(url, "bundled" | "learned") for a known tool"""
+        key = normalize_tool_name(name)
+        if key in self.bundled:
+            return self.bundled[key], "bundled"
+        with self._lock:
+            # Past SITE_INDEX_TTL a learned site is found again, in case the tool moved
+            row = self._conn.execute(
+                "SELECT url FROM sites WHERE key = ? AND learned_at > ?", (key, time.time() - self.ttl)
+            ).fetchone()
+        return (row[0], "learned") if row else None
+
+    def learn(self, name: str, url: str, source: str):
+        """Remember url as name's site; source is how it was found ("probe" or "search")"""
+        key = normalize_tool_name(name)
+        if not key or key in self.bundled:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sites (key, url, learned_at, source) VALUES (?, ?, ?, ?) ON CONFLICT(key) DO UPDATE "
+                "SET url = excluded.url, learned_at = excluded.learned_at, source = excluded.source",
+                (key, url, time.time(), source)
+            )
+            self._conn.commit()
+
+    def forget(self, name: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sites WHERE key = ?", (normalize_tool_name(name),))
+            self._conn.commit()
+
+    def record(self, result: str):
+        self.counts[result] = self.counts.get(result, 0) + 1
+        RESOLVER_LOOKUPS.inc(result=result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            learned = dict(self._conn.execute(
+                "SELECT source, COUNT(*) FROM sites WHERE learned_at > ? GROUP BY source", (time.time() - self.ttl,)
+            ).fetchall())
+        saved = sum(self.counts.get(source, 0) for source in ("bundled", "learned", "probe"))
+        searches = self.counts.get("search", 0)
+        return {
+            "bundled_entries": len(self.bundled),
+            "learned_entries": sum(learned.values()),
+            "learned_by_source": learned,
+            "lookups": dict(self.counts),
+            "searches_saved": saved,
+            "hit_rate": round(saved / (saved + searches), 3) if saved + searches else None,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SiteResolver:
+    """Resolves tool names to official sites from the index or by probing domains"""
+
+    def __init__(self, index: SiteIndex, http: HTTPPool):
+        self.index = index
+        self.http = http
+        self.probe_timeout = float(os.getenv("RESOLVER_PROBE_TIMEOUT", "3"))
+        # 0 turns probing off and leaves only the index
+        self.max_probes = int(os.getenv("RESOLVER_MAX_PROBES", "12"))
+
+    def candidates(self, tool_name: str) -> List[str]:
+        """Likely homepages for tool_name, most likely first"""
+        name = tool_name.lower().strip()
+        urls = []
+        if _domain.match(name):
+            # 'Fly.io' names its own domain
+            urls.append(f"https://{name}/")
+            name = name.rsplit(".", 1)[0]
+        words = re.findall(r"[a-z0-9]+", name)
+        bases = [normalize_tool_name(tool_name)]
+        if len(words) > 1:
+            bases.append("-".join(words))
+            if len(words[0]) >= 4:
+                bases.append(words[0])
+        for tld in PROBE_TLDS:
+            urls.extend(f"https://{base}.{tld}/" for base in dict.fromkeys(bases) if base)
+        return list(dict.fromkeys(urls))[:self.max_probes]
+
+    async def _probe(self, url: str, tokens: List[str]) -> Optional[str]:
+        """Root of the site url ends up on, if it's live and still named after the tool"""
+        try:
+            response = await self.http.head(url, timeout=resilience.time_left(self.probe_timeout))
+        except Exception:
+            return None
+        if response.status_code >= 400 and response.status_code != 405:
+            return None
+        final = urlsplit(str(response.url))
+        # A redirect to a registrar or an unrelated company is not the tool's site
+        if not _host_matches(final.netloc, tokens):
+            return None
+        return f"{final.scheme}://{final.netloc}/"
+
+    async def resolve(self, tool_name: str) -> Optional[Tuple[SearchResult, str]]:
+        """(result to scrape, source) without calling search, or None"""
+        known = await asyncio.to_thread(self.index.lookup, tool_name)
+        if known:
+            url, source = known
+            return SearchResult(title=tool_name, url=url, snippet=""), source
+        # Two-letter names match too many unrelated hosts to probe for
+        if self.max_probes <= 0 or len(normalize_tool_name(tool_name)) < 3:
+            return None
+
+        tokens = _name_tokens(tool_name)
+        found = await asyncio.gather(*(self._probe(url, tokens) for url in self.candidates(tool_name)))
+        # All probes run at once; the most likely live candidate wins
+        url = next((u for u in found if u), None)
+        return (SearchResult(title=tool_name, url=url, snippet=""), "probe") if url else None
+
+    async def confirm(self, result: SearchResult, source: str, page: Optional[Page], good: bool) -> bool:
+        """Check the scraped page really is the tool's site and count the lookup"""
+        tool_name = result.title
+        # A probed domain can be parked, for sale or a namesake's; the site has to call itself by the tool's name
+        if good and source == "probe" and not _names_match(page.names, tool_name):
+            good = False
+        if not good:
+            self.index.record("rejected")
+            if source == "learned":
+                await asyncio.to_thread(self.index.forget, tool_name)
+            return False
+        self.index.record(source)
+        if source == "probe":
+            await asyncio.to_thread(self.index.learn, tool_name, result.url, "probe")
+        return True
+
+    async def searched(self, tool_name: str, url: str, good: bool):
+        """Count a search fallback and learn its site when Tavily's result is on the tool's own domain"""
+        self.index.record("search")
+        parts = urlsplit(url)
+        if good and _host_matches(parts.netloc, _name_tokens(tool_name)):
+            await asyncio.to_thread(self.index.learn, tool_name, f"{parts.scheme}://{parts.netloc}/", "search")
@@ -1,53 +1,198 @@
-import httpx
-from bs4 import BeautifulSoup
-from typing import Optional
-import re
+import os
+import asyncio
+from typing import Optional, Tuple, Dict, List, NamedTuple
+from urllib.parse import urlsplit
 import warnings
 
+import httpx
+
+from .http_client import HTTPPool
+from .cache import ScrapeCache
+from .backends import BackendSelector
+from .extract import extract_page, markdown_links, markdown_names
+from .metrics import span, EXTERNAL_SECONDS, SCRAPE_BYTES, CACHE_LOOKUPS, ERRORS
+from . import resilience
+
 warnings.filterwarnings("ignore")
 
+HTML_TYPES = {"text/html", "application/xhtml+xml"}
+RETRY_STATUSES = {429, 502, 503, 504}
+# Less text than this usually means a JavaScript shell or an error page
+MIN_CONTENT_CHARS = 100
+
+
+class Page(NamedTuple):
+    """Extracted text of a scraped page, its links (absolute URL -> anchor text) and the names it gives its site"""
+    content: str
+    links: Dict[str, str]
+    names: Tuple[str, ...] = ()
+
+
+def _retryable(error: BaseException) -> bool:
+    return isinstance(error, (httpx.TransportError, resilience.RetryableError))
+
 
 class ScraperService:
     
-    def __init__(self):
+    def __init__(
+        self,
+        http: Optional[HTTPPool] = None,
+        cache: Optional[ScrapeCache] = None,
+        selector: Optional[BackendSelector] = None
+    ):
+        self.http = http or HTTPPool()
+        self.cache = cache
+        # Firecrawl renders JavaScript-heavy pages; used alongside plain HTTP when configured
+        self.firecrawl = None
+        if os.getenv("FIRECRAWL_API_KEY"):
+            # The SDK (and aiohttp under it) is only imported when it will be used
+            from .firecrawl import FirecrawlService
+            self.firecrawl = FirecrawlService()
+        self.selector = selector or (BackendSelector() if self.firecrawl else None)
+        self.max_bytes = int(os.getenv("SCRAPE_MAX_BYTES", str(1024 * 1024)))
+        self.max_chars = int(os.getenv("SCRAPE_MAX_CHARS", "5000"))
+        self.retries = int(os.getenv("SCRAPE_RETRIES", "1"))
+        self.timeout = float(os.getenv("SCRAPE_TIMEOUT", "15"))
+        # Send a second copy of a request still unanswered after this many seconds (0 = off)
+        self.hedge_after = float(os.getenv("SCRAPE_HEDGE_AFTER", "0"))
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
         }
     
-    def scrape_url(self, url: str) -> Optional[str]:
+    @staticmethod
+    def has_content(content: Optional[str]) -> bool:
+        return bool(content) and len(content) > MIN_CONTENT_CHARS
+    
+    async def scrape_url(self, url: str) -> Optional[str]:
+        page = await self.scrape_page(url)
+        return page.content if page else None
+    
+    async def scrape_page(self, url: str, max_bytes: Optional[int] = None) -> Optional[Page]:
+        """Text and links of url; max_bytes lowers the download cap for this fetch"""
         try:
-            with httpx.Client(
-                headers=self.headers,
-                timeout=10.0,
-                follow_redirects=True,
-                verify=False
-            ) as client:
-                response = client.get(url)
+            cached = await asyncio.to_thread(self.cache.get, url) if self.cache else None
+            
+            if cached and self.cache.is_fresh(cached):
+                self.cache.hits += 1
+                CACHE_LOOKUPS.inc(cache="scrape", result="hit")
+                print(f"💾 Cache hit: {url[:40]}")
+                return Page(cached.content, cached.links, tuple(cached.names))
+            if self.cache and not cached:
+                self.cache.misses += 1
+                CACHE_LOOKUPS.inc(cache="scrape", result="miss")
+            
+            if not self.firecrawl:
+                return await self._scrape_http(url, cached, max_bytes)
+            
+            return await self.selector.scrape(
+                urlsplit(url).netloc.lower(),
+                {
+                    "http": lambda: self._scrape_http(url, cached, max_bytes),
+                    "firecrawl": lambda: self._scrape_firecrawl(url),
+                },
+                lambda page: page is not None and self.has_content(page.content)
+            )
                 
-                if response.status_code == 200:
-                    content = self._extract_content(response.text)
-                    print(f"✅ Scraped {len(content)} chars from {url[:40]}")
-                    return content
-                else:
-                    print(f"❌ HTTP {response.status_code}: {url[:40]}")
-                    return None
-                    
         except Exception as e:
             print(f"❌ Scrape failed: {e}")
+            ERRORS.inc(stage="scrape")
             return None
     
-    def _extract_content(self, html: str) -> str:
+    async def _scrape_http(self, url: str, cached, max_bytes: Optional[int] = None) -> Optional[Page]:
+        headers = self.headers
+        if cached:
+            # Stale entry: revalidate with a conditional GET
+            headers = dict(self.headers)
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        
         try:
-            soup = BeautifulSoup(html, "html.parser")
-            
-            for tag in soup(["script", "style", "nav", "footer", "header", "aside", "form"]):
-                tag.decompose()
+            with span(EXTERNAL_SECONDS, "scrape", service="http", operation="scrape"):
+                status, body, response_headers, encoding = await resilience.call(
+                    lambda: resilience.hedged(lambda: self._fetch(url, headers, max_bytes), self.hedge_after),
+                    resilience.host_breaker(urlsplit(url).netloc.lower()),
+                    _retryable,
+                    self.retries,
+                    self.timeout
+                )
+        except Exception as e:
+            print(f"❌ Scrape failed: {e}")
+            ERRORS.inc(stage="scrape")
+            return None
+        
+        if status == 304 and cached:
+            self.cache.revalidated += 1
+            CACHE_LOOKUPS.inc(cache="scrape", result="revalidated")
+            await asyncio.to_thread(self.cache.touch, url)
+            print(f"💾 Revalidated: {url[:40]}")
+            return Page(cached.content, cached.links, tuple(cached.names))
+        
+        if status != 200:
+            print(f"❌ HTTP {status}: {url[:40]}")
+            return None
+        
+        if body is None:
+            print(f"⏭️ Skipping {response_headers.get('content-type')}: {url[:40]}")
+            return None
+        
+        SCRAPE_BYTES.inc(len(body))
+        # Parsing is CPU bound, keep it off the event loop
+        content, links, names = await asyncio.to_thread(self._extract_content, body, encoding, url)
+        print(f"✅ Scraped {len(content)} chars ({len(body)} bytes) from {url[:40]}")
+        if self.cache and content:
+            await asyncio.to_thread(
+                self.cache.put, url, content, response_headers.get("etag"), response_headers.get("last-modified"), links, names
+            )
+        return Page(content, links, tuple(names))
+    
+    async def _scrape_firecrawl(self, url: str) -> Optional[Page]:
+        content = await self.firecrawl.scrape(url)
+        if not content:
+            return None
+        print(f"🔥 Firecrawl: {len(content)} chars from {url[:40]}")
+        links = markdown_links(content)
+        names = markdown_names(content)
+        if self.cache:
+            await asyncio.to_thread(self.cache.put, url, content, None, None, links, names)
+        return Page(content, links, tuple(names))
+    
+    async def _fetch(
+        self, url: str, headers: dict, max_bytes: Optional[int] = None
+    ) -> Tuple[int, Optional[bytes], httpx.Headers, Optional[str]]:
+        """One GET: (status, capped body or None if not HTML/200, headers, charset)"""
+        async with self.http.stream(url, headers=headers) as response:
+            if response.status_code in RETRY_STATUSES:
+                raise resilience.RetryableError(
+                    f"HTTP {response.status_code}",
+                    resilience.parse_retry_after(response.headers.get("retry-after"))
+                )
+            if response.status_code != 200:
+                return response.status_code, None, response.headers, None
             
-            text = soup.get_text(separator=" ", strip=True)
-            text = re.sub(r'\s+', ' ', text)
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in HTML_TYPES:
+                return response.status_code, None, response.headers, None
             
-            return text[:5000]
-        except:
-            return ""
\ No newline at end of file
+            body = await self._read_capped(response, max_bytes or self.max_bytes)
+            return response.status_code, body, response.headers, response.charset_encoding
+    
+    async def _read_capped(self, response, max_bytes: int) -> bytes:
+        """Read at most max_bytes of the body; the rest is never downloaded"""
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                break
+        return b"".join(chunks)[:max_bytes]
+    
+    def _extract_content(self, html: bytes, encoding: Optional[str], url: str) -> Tuple[str, Dict[str, str], List[str]]:
+        try:
+            return extract_page(html, url, self.max_chars, encoding)
+        except Exception:
+            return "", {}, []
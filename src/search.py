@@ -1,7 +1,42 @@
 import os
-from typing import List
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Any
+import requests
 from tavily import TavilyClient
+from tavily.errors import UsageLimitExceededError, ForbiddenError, TimeoutError as TavilyTimeout
 from .models import SearchResult
+from .metrics import span, EXTERNAL_SECONDS, ERRORS
+from . import resilience
+
+
+# Tavily's client is synchronous, so calls are offloaded to a bounded pool
+# shared by every SearchService in the process.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TAVILY_MAX_WORKERS", "8")),
+    thread_name_prefix="tavily"
+)
+
+
+# The client turns a 429 into UsageLimitExceededError and drops the response;
+# a response hook keeps its Retry-After for the worker thread that got it
+_retry_after = threading.local()
+
+
+def _remember_retry_after(response: requests.Response, *args, **kwargs):
+    _retry_after.value = response.headers.get("retry-after") if response.status_code == 429 else None
+
+
+def _retryable(error: BaseException) -> bool:
+    # 429 is rate limiting (UsageLimitExceededError); a spent plan (432/433) is ForbiddenError and not retried
+    if isinstance(error, (
+        resilience.RetryableError, UsageLimitExceededError, TavilyTimeout, requests.ConnectionError, requests.Timeout
+    )):
+        return True
+    response = getattr(error, "response", None)
+    return isinstance(error, requests.HTTPError) and response is not None and response.status_code >= 500
 
 
 class SearchService:
@@ -10,16 +45,47 @@ class SearchService:
         api_key = os.getenv("TAVILY_API_KEY")
         if not api_key:
             raise ValueError("Missing TAVILY_API_KEY. Get free key at: https://app.tavily.com")
-        self.client = TavilyClient(api_key=api_key)
+        # TAVILY_API_BASE_URL points the client at a proxy or a local stand-in
+        base_url = os.getenv("TAVILY_API_BASE_URL")
+        self.client = TavilyClient(api_key=api_key, **({"api_base_url": base_url} if base_url else {}))
+        session = getattr(self.client, "session", None)
+        if session is not None:
+            session.hooks["response"].append(_remember_retry_after)
+        self.retries = int(os.getenv("SEARCH_RETRIES", "2"))
+        self.timeout = float(os.getenv("SEARCH_TIMEOUT", "15"))
+        self.breaker = resilience.breaker("tavily")
         print("✅ Tavily Search ready")
     
-    def search(self, query: str, max_results: int = 5) -> List[SearchResult]:
+    def _search(self, **kwargs) -> Dict[str, Any]:
+        """client.search, with a 429 raised as RetryableError carrying its Retry-After"""
+        _retry_after.value = None
+        try:
+            return self.client.search(**kwargs)
+        except UsageLimitExceededError as e:
+            if getattr(e, "retry_after_seconds", None) is not None:
+                raise
+            retry_after = resilience.parse_retry_after(_retry_after.value)
+            raise resilience.RetryableError(str(e) or "Tavily rate limit (429)", retry_after) from e
+    
+    async def search(self, query: str, max_results: int = 5) -> List[SearchResult]:
         try:
-            response = self.client.search(
-                query=query,
-                max_results=max_results,
-                search_depth="basic"
-            )
+            loop = asyncio.get_running_loop()
+            
+            async def attempt():
+                # Tavily's own timeout stops the worker thread, not just our wait
+                return await loop.run_in_executor(
+                    _executor,
+                    partial(
+                        self._search,
+                        query=query,
+                        max_results=max_results,
+                        search_depth="basic",
+                        timeout=resilience.time_left(self.timeout)
+                    )
+                )
+            
+            with span(EXTERNAL_SECONDS, "tavily", service="tavily", operation="search"):
+                response = await resilience.call(attempt, self.breaker, _retryable, self.retries, self.timeout)
             
             results = []
             for r in response.get("results", []):
@@ -32,14 +98,21 @@ class SearchService:
             print(f"✅ Found {len(results)} results for: {query[:30]}...")
             return results
             
+        except ForbiddenError as e:
+            # Spent plan or key without access (403/432/433): retrying can't help, stop calling Tavily for a while
+            self.breaker.trip()
+            print(f"❌ Search error: {e}")
+            ERRORS.inc(stage="search")
+            return []
         except Exception as e:
             print(f"❌ Search error: {e}")
+            ERRORS.inc(stage="search")
             return []
     
-    def search_for_tools(self, query: str) -> List[SearchResult]:
+    async def search_for_tools(self, query: str) -> List[SearchResult]:
         enhanced_query = f"{query} tools comparison best 2024"
-        return self.search(enhanced_query, max_results=5)
+        return await self.search(enhanced_query, max_results=5)
     
-    def search_official_site(self, tool_name: str) -> List[SearchResult]:
+    async def search_official_site(self, tool_name: str) -> List[SearchResult]:
         query = f"{tool_name} official website"
-        return self.search(query, max_results=1)
\ No newline at end of file
+        return await self.search(query, max_results=1)
\ No newline at end of file
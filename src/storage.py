@@ -0,0 +1,347 @@
+"""
+Key-value storage behind the caches and the research result store.
+
+STORE_BACKEND picks where entries live:
+
+- memory: per-process, gone on restart
+- sqlite: a WAL-mode file under CACHE_DIR, shared by every worker on the host
+- kv: a Redis server over the Upstash-compatible REST API, shared by every
+  instance (KV_URL, KV_TOKEN)
+
+Values are JSON, zlib-compressed when that makes them smaller. The memory
+and SQLite backends evict least recently used entries to stay within a
+byte budget; a KV server does that itself (maxmemory-policy allkeys-lru).
+"""
+import os
+import json
+import time
+import zlib
+import base64
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+import httpx
+
+BACKENDS = ("memory", "sqlite", "kv")
+
+# Values smaller than this aren't worth compressing
+COMPRESS_MIN_BYTES = 256
+_RAW = b"j"
+_ZLIB = b"z"
+
+# SQLite reads record their use in batches, flushed at this many keys or this many seconds
+TOUCH_BATCH = 100
+TOUCH_INTERVAL = 10.0
+
+
+def cache_path(filename: str) -> str:
+    cache_dir = os.getenv("CACHE_DIR", ".cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, filename)
+
+
+def encode(value: Any) -> bytes:
+    data = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(data) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(data, 6)
+        if len(packed) < len(data):
+            return _ZLIB + packed
+    return _RAW + data
+
+
+def decode(data: bytes) -> Any:
+    if data[:1] == _ZLIB:
+        return json.loads(zlib.decompress(data[1:]))
+    return json.loads(data[1:])
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """SQLite connection that several processes can read and write at once"""
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class Store(ABC):
+    """Bytes by key, with optional per-entry expiry. Methods block; call them via asyncio.to_thread."""
+
+    backend = ""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def put(self, key: str, value: bytes, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+    def close(self):
+        pass
+
+    def get_json(self, key: str) -> Any:
+        data = self.get(key)
+        return decode(data) if data is not None else None
+
+    def put_json(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.put(key, encode(value), ttl)
+
+
+class MemoryStore(Store):
+    backend = "memory"
+
+    def __init__(self, max_bytes: int, max_entries: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: bytes, ttl: Optional[float] = None):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.time() + ttl if ttl else None)
+            self.bytes += len(value)
+            while self._entries and (
+                self.bytes > self.max_bytes
+                or (self.max_entries and len(self._entries) > self.max_entries)
+            ):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def _drop(self, key: str):
+        value, _ = self._entries.pop(key)
+        self.bytes -= len(value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class SQLiteStore(Store):
+    backend = "sqlite"
+
+    def __init__(self, path: str, max_bytes: int, max_entries: Optional[int] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        # Other processes write to the same file, so the running totals live in it too, kept by triggers
+        self._conn.executescript(
+            """BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_by_use ON entries(last_used);
+            CREATE TABLE IF NOT EXISTS totals (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                entries INTEGER NOT NULL,
+                bytes INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO totals SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM entries;
+            CREATE TRIGGER IF NOT EXISTS entries_added AFTER INSERT ON entries BEGIN
+                UPDATE totals SET entries = entries + 1, bytes = bytes + new.size;
+            END;
+            CREATE TRIGGER IF NOT EXISTS entries_resized AFTER UPDATE OF size ON entries BEGIN
+                UPDATE totals SET bytes = bytes + new.size - old.size;
+            END;
+            CREATE TRIGGER IF NOT EXISTS entries_removed AFTER DELETE ON entries BEGIN
+                UPDATE totals SET entries = entries - 1, bytes = bytes - old.size;
+            END;
+            COMMIT;"""
+        )
+        self.evictions = 0
+        # Key -> last read, written to last_used in batches rather than on every read
+        self._touched: Dict[str, float] = {}
+        self._flushed_at = time.time()
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_BATCH or now - self._flushed_at >= TOUCH_INTERVAL:
+                self._flush_touched()
+                self._conn.commit()
+        return row[0]
+
+    def _flush_touched(self):
+        self._conn.executemany(
+            "UPDATE entries SET last_used = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()]
+        )
+        self._touched.clear()
+        self._flushed_at = time.time()
+
+    def put(self, key: str, value: bytes, ttl: Optional[float] = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "value = excluded.value, size = excluded.size, expires_at = excluded.expires_at, last_used = excluded.last_used",
+                (key, value, len(value), now + ttl if ttl else None, now)
+            )
+            self._touched.pop(key, None)
+            # Recent reads count before choosing what to evict
+            self._flush_touched()
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        entries, total = self._conn.execute("SELECT entries, bytes FROM totals").fetchone()
+        excess_bytes = total - self.max_bytes
+        excess_entries = entries - self.max_entries if self.max_entries else 0
+        if excess_bytes <= 0 and excess_entries <= 0:
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            if excess_bytes <= 0 and excess_entries <= 0:
+                break
+            victims.append((key,))
+            excess_bytes -= size
+            excess_entries -= 1
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._touched.pop(key, None)
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute("SELECT entries, bytes FROM totals").fetchone()
+        return {
+            "backend": self.backend,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._touched:
+                self._flush_touched()
+                self._conn.commit()
+            self._conn.close()
+
+
+class KVStore(Store):
+    """Redis over the Upstash REST protocol: POST a command as a JSON array, get {"result": ...} back"""
+
+    backend = "kv"
+
+    def __init__(self, namespace: str, url: Optional[str] = None, token: Optional[str] = None):
+        url = url or os.getenv("KV_URL")
+        if not url:
+            raise ValueError("STORE_BACKEND=kv needs KV_URL")
+        token = token or os.getenv("KV_TOKEN")
+        self.prefix = f"{os.getenv('KV_PREFIX', 'devtools')}:{namespace}:"
+        self.client = httpx.Client(
+            base_url=url,
+            headers={"Authorization": f"Bearer {token}"} if token else {},
+            timeout=float(os.getenv("KV_TIMEOUT", "2"))
+        )
+        self.errors = 0
+
+    def _command(self, *args: Any) -> Any:
+        response = self.client.post("/", json=[str(a) for a in args])
+        response.raise_for_status()
+        body = response.json()
+        if "error" in body:
+            raise RuntimeError(body["error"])
+        return body.get("result")
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = self._command("GET", self.prefix + key)
+        except Exception as e:
+            # An unreachable store is a cache miss, never a failed request
+            self.errors += 1
+            print(f"⚠️ KV get failed: {e}")
+            return None
+        return base64.b64decode(value) if value is not None else None
+
+    def put(self, key: str, value: bytes, ttl: Optional[float] = None):
+        # Values travel as JSON strings, so the bytes are base64-encoded
+        command = ["SET", self.prefix + key, base64.b64encode(value).decode("ascii")]
+        if ttl:
+            command += ["PX", int(ttl * 1000)]
+        try:
+            self._command(*command)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ KV put failed: {e}")
+
+    def delete(self, key: str):
+        try:
+            self._command("DEL", self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ KV delete failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "prefix": self.prefix, "errors": self.errors}
+
+    def close(self):
+        self.client.close()
+
+
+def open_store(namespace: str, max_bytes: int, max_entries: Optional[int] = None) -> Store:
+    """The configured backend for one cache (namespace keeps caches apart in shared backends)"""
+    backend = os.getenv("STORE_BACKEND", "sqlite")
+    if backend == "memory":
+        return MemoryStore(max_bytes, max_entries)
+    if backend == "sqlite":
+        return SQLiteStore(cache_path(f"{namespace}.store.sqlite3"), max_bytes, max_entries)
+    if backend == "kv":
+        return KVStore(namespace)
+    raise ValueError(f"STORE_BACKEND must be one of {', '.join(BACKENDS)}")
@@ -1,35 +1,94 @@
-from typing import Dict, Any
+import os
+import asyncio
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple, List, AsyncIterator
+from urllib.parse import urlsplit
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 
-from .models import ResearchState, CompanyInfo
+from .models import ResearchState, CompanyInfo, CompanyAnalysis, SearchResult
 from .search import SearchService
-from .scraper import ScraperService
+from .scraper import ScraperService, Page
+from .crawler import Crawler, FIELD_KINDS, rules_text
 from .llm import LLMService
+from .http_client import HTTPPool
+from .config import env_flag
+from .cache import ScrapeCache, LLMCache
+from .knowledge import KnowledgeBase, normalize_tool_name
+from .backends import BackendSelector
+from .resolver import SiteIndex, SiteResolver
+from .heuristics import read_facts
+from .metrics import span, STAGE_SECONDS, ERRORS
+from . import resilience
+
+# Receives (event name, JSON-serializable payload) as the workflow progresses
+EventCallback = Callable[[str, Any], Awaitable[None]]
+
+# Extracted tools researched per query
+RESEARCHED_TOOLS = 4
 
 
 class ResearchWorkflow:
     
-    def __init__(self):
+    def __init__(
+        self,
+        http: Optional[HTTPPool] = None,
+        scrape_cache: Optional[ScrapeCache] = None,
+        llm_cache: Optional[LLMCache] = None,
+        knowledge: Optional[KnowledgeBase] = None,
+        scrape_selector: Optional[BackendSelector] = None,
+        site_index: Optional[SiteIndex] = None
+    ):
         self.search = SearchService()
-        self.scraper = ScraperService()
-        self.llm = LLMService()
+        self.scraper = ScraperService(http, scrape_cache, scrape_selector)
+        # Official sites from the index or a domain probe save a Tavily call per tool
+        use_resolver = site_index is not None and env_flag("SITE_RESOLVER", True)
+        self.resolver = SiteResolver(site_index, self.scraper.http) if use_resolver else None
+        # Pricing, docs and source pages linked from each homepage go into its analysis too
+        use_crawler = env_flag("CRAWL_PAGES", True)
+        self.crawler = Crawler(self.scraper) if use_crawler else None
+        self.llm = LLMService(llm_cache)
+        self.knowledge = knowledge
+        self.max_concurrency = int(os.getenv("RESEARCH_CONCURRENCY", "4"))
+        self.tool_timeout = float(os.getenv("TOOL_TIMEOUT", "25"))
+        self.deadline = float(os.getenv("RESEARCH_DEADLINE", "90"))
+        # Seconds of the deadline kept back from tool research for the recommendations call
+        self.recommend_reserve = float(os.getenv("RECOMMEND_RESERVE", "10"))
+        self.batch_analysis = env_flag("BATCH_ANALYSIS", True)
+        # Read analysis fields off the page first; the LLM only fills what stays below the threshold
+        self.rules = env_flag("RULE_ANALYSIS", True)
+        self.rules_confidence = float(os.getenv("HEURISTIC_CONFIDENCE", "0.7"))
+        # Start searching/scraping each tool while extraction is still streaming
+        self.speculative = env_flag("SPECULATIVE_RESEARCH", True)
         self.workflow = self._build_workflow()
     
     def _build_workflow(self) -> StateGraph:
         graph = StateGraph(ResearchState)
-        graph.add_node("extract_tools", self._extract_tools_node)
-        graph.add_node("research", self._research_node)
-        graph.add_node("analyze", self._analyze_node)
+        graph.add_node("extract_tools", self._timed("extract_tools", self._extract_tools_node))
+        graph.add_node("research", self._timed("research", self._research_node))
+        graph.add_node("analyze", self._timed("analyze", self._analyze_node))
         graph.set_entry_point("extract_tools")
         graph.add_edge("extract_tools", "research")
         graph.add_edge("research", "analyze")
         graph.add_edge("analyze", END)
         return graph.compile()
     
-    def _extract_tools_node(self, state: ResearchState) -> Dict[str, Any]:
+    @staticmethod
+    def _timed(stage: str, node: Callable[[ResearchState, RunnableConfig], Awaitable[Dict[str, Any]]]):
+        async def timed_node(state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+            with span(STAGE_SECONDS, stage, stage=stage):
+                return await node(state, config)
+        return timed_node
+    
+    @staticmethod
+    async def _emit(config: Optional[RunnableConfig], event: str, data: Any):
+        emit = (config or {}).get("configurable", {}).get("emit")
+        if emit:
+            await emit(event, data)
+    
+    async def _extract_tools_node(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
         print(f"🔍 Step 1: Searching for '{state.query}'")
         
-        search_results = self.search.search_for_tools(state.query)
+        search_results = await self.search.search_for_tools(state.query)
         
         if not search_results:
             return {
@@ -38,6 +97,8 @@ class ResearchWorkflow:
                 "error": "No search results found"
             }
         
+        await self._emit(config, "search_results", [r.model_dump() for r in search_results])
+        
         all_content = "\n\n".join([
             f"Title: {r.title}\nURL: {r.url}\nContent: {r.snippet}" 
             for r in search_results
@@ -45,23 +106,56 @@ class ResearchWorkflow:
         
         if search_results[0].url:
             print(f"📥 Scraping: {search_results[0].url[:50]}...")
-            scraped = self.scraper.scrape_url(search_results[0].url)
+            scraped = await self.scraper.scrape_url(search_results[0].url)
             if scraped:
-                all_content += f"\n\nFull page content:\n{scraped[:2000]}"
+                all_content += f"\n\nFull page content:\n{scraped}"
                 print(f"✅ Scraped {len(scraped)} chars")
         
-        print(f"🤖 Extracting tools from {len(all_content)} chars...")
-        tools = self.llm.extract_tools(state.query, all_content)
+        prefetch = self._prefetched(config)
+        if self.speculative and prefetch is not None:
+            tools = []
+            async for tool in self.llm.stream_tools(state.query, all_content):
+                tools.append(tool)
+                if len(tools) <= RESEARCHED_TOOLS and normalize_tool_name(tool) not in self._reused(config):
+                    await self._prefetch(tool, prefetch)
+            # Anything the final cut left out is not worth finishing
+            for name in [n for n in prefetch if n not in tools[:RESEARCHED_TOOLS]]:
+                prefetch.pop(name).cancel()
+        else:
+            print(f"🤖 Extracting tools from {len(all_content)} chars...")
+            tools = await self.llm.extract_tools(state.query, all_content)
         
         print(f"📦 Found tools: {tools}")
+        await self._emit(config, "tools", tools[:5])
         
         return {
             "extracted_tools": tools[:5],
             "search_results": search_results
         }
     
-    def _research_node(self, state: ResearchState) -> Dict[str, Any]:
-        tools = state.extracted_tools[:4]
+    @staticmethod
+    def _prefetched(config: Optional[RunnableConfig]) -> Optional[Dict[str, asyncio.Task]]:
+        """Per-run tool name -> running _fetch_tool task, shared between nodes"""
+        return (config or {}).get("configurable", {}).get("prefetch")
+    
+    @staticmethod
+    def _reused(config: Optional[RunnableConfig]) -> Dict[str, CompanyInfo]:
+        """Per-run normalized tool name -> company from a previous result, safe to reuse"""
+        return (config or {}).get("configurable", {}).get("reuse") or {}
+    
+    async def _prefetch(self, tool_name: str, prefetch: Dict[str, asyncio.Task]):
+        if tool_name in prefetch:
+            return
+        if self.knowledge:
+            # Known tools are answered from the knowledge base, nothing to fetch
+            entry = await asyncio.to_thread(self.knowledge.get, tool_name)
+            if entry and entry.age() < self.knowledge.ttl:
+                return
+        print(f"  ⚡ Prefetching {tool_name}")
+        prefetch[tool_name] = asyncio.create_task(self._fetch_tool(tool_name))
+    
+    async def _research_node(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        tools = state.extracted_tools[:RESEARCHED_TOOLS]
         
         if not tools:
             print("⚠️ No tools found")
@@ -69,50 +163,253 @@ class ResearchWorkflow:
         
         print(f"🔬 Step 2: Researching {len(tools)} tools")
         
-        companies = []
+        left = resilience.remaining()
+        budget = max(left - self.recommend_reserve, left / 2) if left is not None else None
+        # Filled with the tools the knowledge base answers, so run() can report when they were verified
+        known = (config or {}).get("configurable", {}).get("known")
+        with resilience.deadline(budget):
+            companies = await self.research_tools(tools, config, known=known)
+            partial = resilience.expired()
+        if partial:
+            print(f"⏱️ Deadline reached, continuing with {len(companies)}/{len(tools)} tools")
         
-        for tool_name in tools:
-            print(f"  → {tool_name}")
-            
-            results = self.search.search_official_site(tool_name)
-            
-            if not results:
-                print(f"    ⚠️ No results for {tool_name}")
-                continue
+        return {"companies": companies, "partial": partial}
+    
+    async def research_tools(
+        self,
+        tools: List[str],
+        config: Optional[RunnableConfig] = None,
+        refresh: bool = False,
+        known: Optional[Dict[str, float]] = None
+    ) -> List[CompanyInfo]:
+        """Research tools concurrently, answering from the knowledge base when fresh.
+        
+        refresh=True ignores known records and re-researches every tool.
+        Returned companies follow the order of tools. Tools answered from
+        the knowledge base are added to known with their last_verified.
+        """
+        companies = await self.research_tools_by_index(tools, config, refresh, known)
+        return [companies[i] for i in sorted(companies)]
+    
+    async def research_tools_by_index(
+        self,
+        tools: List[str],
+        config: Optional[RunnableConfig] = None,
+        refresh: bool = False,
+        known: Optional[Dict[str, float]] = None
+    ) -> Dict[int, CompanyInfo]:
+        """research_tools keyed by each tool's index in tools, leaving out the ones not found.
+        
+        A company can be named differently from the tool it answers
+        ("neon.tech" -> Neon), so callers match results by index, not name.
+        """
+        companies: Dict[int, CompanyInfo] = {}
+        
+        async def found(index: int, company: Optional[CompanyInfo]):
+            if company:
+                companies[index] = company
+                await self._emit(config, "company", {"index": index, **company.model_dump()})
+        
+        reuse = self._reused(config)
+        if reuse and not refresh:
+            # The list lives in the run's config, so run() can report what was reused
+            reused = config["configurable"]["reused"]
+            for index, tool_name in enumerate(tools):
+                previous = reuse.get(normalize_tool_name(tool_name))
+                if previous:
+                    print(f"  ♻️ {tool_name}: unchanged since the last run, reusing its analysis")
+                    reused.append(previous.name)
+                    await found(index, previous)
+        
+        if self.knowledge and not refresh:
+            for index, tool_name in enumerate(tools):
+                if index in companies:
+                    continue
+                entry = await asyncio.to_thread(self.knowledge.lookup, tool_name)
+                if entry:
+                    print(f"  📚 {tool_name}: known, skipping research")
+                    if known is not None:
+                        known[entry.company.name] = entry.last_verified
+                    await found(index, entry.company)
+        
+        pending = [(i, t) for i, t in enumerate(tools) if i not in companies]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        prefetch = self._prefetched(config) or {}
+        
+        async def fetch(tool_name: str) -> Optional[Tuple[SearchResult, Optional[str]]]:
+            # Reuse the fetch started during extraction, if there was one
+            task = prefetch.pop(tool_name, None)
+            return await (task if task else self._fetch_tool(tool_name))
+        
+        async def bounded(tool_name: str, step: Callable[[str], Awaitable[Any]]) -> Any:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(step(tool_name), timeout=self.tool_timeout)
+                except asyncio.TimeoutError:
+                    print(f"    ⏱️ Timed out researching {tool_name}")
+                    ERRORS.inc(stage="research")
+                except Exception as e:
+                    print(f"    ❌ Research failed for {tool_name}: {e}")
+                    ERRORS.inc(stage="research")
+                return None
+        
+        if pending and self.batch_analysis:
+            # Fetch every tool concurrently, then analyze them in one LLM call
+            fetched = await asyncio.gather(*(bounded(t, fetch) for _, t in pending))
+            pages = [
+                (tool_name, page[1]) for (_, tool_name), page in zip(pending, fetched)
+                if page and self._has_content(page[1])
+            ]
+            analyses = dict(zip(
+                [tool_name for tool_name, _ in pages],
+                await self._analyze_pages(pages) if pages else []
+            ))
             
-            result = results[0]
-            content = self.scraper.scrape_url(result.url)
+            for (index, tool_name), page in zip(pending, fetched):
+                if page is not None:
+                    analysis = analyses.get(tool_name)
+                    company = self._build_company(tool_name, page[0], analysis)
+                    await self._remember(company, analysis)
+                    await found(index, company)
+        
+        elif pending:
+            async def research_one(index: int, tool_name: str):
+                await found(index, await bounded(tool_name, lambda t: self._research_tool(t, fetch)))
             
-            if content and len(content) > 100:
-                print(f"    🤖 Analyzing {len(content)} chars...")
-                analysis = self.llm.analyze_tool(tool_name, content)
-                
-                company = CompanyInfo(
-                    name=tool_name,
-                    description=analysis.description,
-                    website=result.url,
-                    pricing_model=analysis.pricing_model,
-                    is_open_source=analysis.is_open_source,
-                    tech_stack=analysis.tech_stack,
-                    api_available=analysis.api_available,
-                    language_support=analysis.language_support,
-                    integration_capabilities=analysis.integration_capabilities
-                )
-                print(f"    ✅ Analyzed")
+            await asyncio.gather(*(research_one(i, t) for i, t in pending))
+        
+        return companies
+    
+    async def _remember(self, company: CompanyInfo, analysis: Optional[CompanyAnalysis]):
+        # Snippet-only results are not worth keeping; they get retried next time
+        if self.knowledge and analysis is not None:
+            await asyncio.to_thread(self.knowledge.put, company, self._site_aliases(company))
+    
+    @staticmethod
+    def _site_aliases(company: CompanyInfo) -> List[str]:
+        """The domain of a tool's own site, so "neon.tech" finds Neon.
+        
+        Products on a page of a bigger site (mongodb.com/atlas) don't own
+        the domain and get no alias.
+        """
+        parts = urlsplit(company.website or "")
+        host = parts.hostname or ""
+        if not host or parts.path.strip("/"):
+            return []
+        return [host[4:] if host.startswith("www.") else host]
+    
+    @staticmethod
+    def _has_content(content: Optional[str]) -> bool:
+        return ScraperService.has_content(content)
+    
+    async def _fetch_tool(self, tool_name: str) -> Optional[Tuple[SearchResult, Optional[str]]]:
+        print(f"  → {tool_name}")
+        
+        if self.resolver:
+            found = await self.resolver.resolve(tool_name)
+            if found:
+                result, source = found
+                page = await self.scraper.scrape_page(result.url)
+                content = page.content if page else None
+                if await self.resolver.confirm(result, source, page, self._has_content(content)):
+                    print(f"    🧭 {result.url} ({source})")
+                    # No search snippet to fall back on, so the page itself stands in
+                    result.snippet = content[:300]
+                    return result, await self._crawl(tool_name, result.url, page)
+        
+        results = await self.search.search_official_site(tool_name)
+        
+        if not results:
+            print(f"    ⚠️ No results for {tool_name}")
+            return None
+        
+        result = results[0]
+        page = await self.scraper.scrape_page(result.url)
+        content = page.content if page else None
+        if self.resolver:
+            await self.resolver.searched(tool_name, result.url, self._has_content(content))
+        return result, await self._crawl(tool_name, result.url, page)
+    
+    async def _crawl(self, tool_name: str, url: str, page: Optional[Page]) -> Optional[str]:
+        """Homepage text, extended with the pages the crawler followed from it"""
+        if page is None or not self.crawler or not self._has_content(page.content):
+            return page.content if page else None
+        
+        if not self.rules:
+            return await self.crawler.crawl(tool_name, url, page)
+        # Only follow pages that can answer what the homepage leaves to the LLM
+        facts = read_facts(tool_name, page.content)
+        if not facts.needs_llm(self.rules_confidence):
+            return page.content
+        kinds = {FIELD_KINDS[f] for f in facts.missing(self.rules_confidence) if f in FIELD_KINDS}
+        return await self.crawler.crawl(tool_name, url, page, kinds)
+    
+    async def _research_tool(
+        self,
+        tool_name: str,
+        fetch: Optional[Callable[[str], Awaitable[Optional[Tuple[SearchResult, Optional[str]]]]]] = None
+    ) -> Optional[CompanyInfo]:
+        page = await (fetch or self._fetch_tool)(tool_name)
+        if page is None:
+            return None
+        
+        result, content = page
+        analysis = None
+        if self._has_content(content):
+            print(f"    🤖 Analyzing {tool_name} ({len(content)} chars)...")
+            analysis = (await self._analyze_pages([(tool_name, content)]))[0]
+        
+        company = self._build_company(tool_name, result, analysis)
+        await self._remember(company, analysis)
+        return company
+    
+    async def _analyze_pages(self, pages: List[Tuple[str, str]]) -> List[Optional[CompanyAnalysis]]:
+        """Analyses for (tool_name, content) pages, in order, using the LLM only where the page falls short"""
+        if not self.rules:
+            return await self.llm.analyze_tools(pages)
+        
+        facts = [read_facts(tool_name, rules_text(content)) for tool_name, content in pages]
+        analyses: List[Optional[CompanyAnalysis]] = [None] * len(pages)
+        unsettled = []
+        for i, page_facts in enumerate(facts):
+            if page_facts.needs_llm(self.rules_confidence):
+                unsettled.append(i)
             else:
-                company = CompanyInfo(
-                    name=tool_name,
-                    description=result.snippet,
-                    website=result.url,
-                    pricing_model="Unknown"
-                )
-                print(f"    ⚠️ Using snippet only")
-            
-            companies.append(company)
+                print(f"    📐 {pages[i][0]}: analyzed from page rules")
+                analyses[i] = page_facts.to_analysis()
+        
+        if unsettled:
+            # One request covers every unsettled page, so it asks for the union of their gaps
+            fields = sorted({f for i in unsettled for f in facts[i].missing(self.rules_confidence)})
+            answered = await self.llm.analyze_tools([pages[i] for i in unsettled], fields=fields)
+            for i, analysis in zip(unsettled, answered):
+                analyses[i] = facts[i].merge(analysis, self.rules_confidence) if analysis else None
+        return analyses
+    
+    def _build_company(self, tool_name: str, result: SearchResult, analysis: Optional[CompanyAnalysis]) -> CompanyInfo:
+        if analysis is None:
+            print(f"    ⚠️ Using snippet only for {tool_name}")
+            return CompanyInfo(
+                name=tool_name,
+                description=result.snippet,
+                website=result.url,
+                pricing_model="Unknown"
+            )
         
-        return {"companies": companies}
+        print(f"    ✅ Analyzed {tool_name}")
+        return CompanyInfo(
+            name=tool_name,
+            description=analysis.description,
+            website=result.url,
+            pricing_model=analysis.pricing_model,
+            is_open_source=analysis.is_open_source,
+            tech_stack=analysis.tech_stack,
+            api_available=analysis.api_available,
+            language_support=analysis.language_support,
+            integration_capabilities=analysis.integration_capabilities
+        )
     
-    def _analyze_node(self, state: ResearchState) -> Dict[str, Any]:
+    async def _analyze_node(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
         print("📝 Step 3: Generating recommendations")
         
         if not state.companies:
@@ -129,18 +426,137 @@ class ResearchWorkflow:
             for c in state.companies
         ])
         
-        analysis = self.llm.generate_recommendations(state.query, tools_data)
+        if (config or {}).get("configurable", {}).get("emit"):
+            chunks = []
+            async for delta in self.llm.stream_recommendations(state.query, tools_data):
+                chunks.append(delta)
+                await self._emit(config, "recommendations_delta", delta)
+            analysis = "".join(chunks).strip() or "Unable to generate recommendations."
+        else:
+            analysis = await self.llm.generate_recommendations(state.query, tools_data)
         
         return {"analysis": analysis}
     
-    def run(self, query: str) -> ResearchState:
+    async def run(
+        self,
+        query: str,
+        emit: Optional[EventCallback] = None,
+        reuse: Optional[List[CompanyInfo]] = None
+    ) -> ResearchState:
+        """Research query. reuse holds companies from a previous run of it: tools
+        extracted again are taken from there instead of being researched."""
         print(f"\n{'='*50}")
         print(f"🚀 LIVE RESEARCH: {query}")
         print(f"{'='*50}\n")
         
         initial_state = ResearchState(query=query)
-        result = self.workflow.invoke(initial_state)
+        prefetch: Dict[str, asyncio.Task] = {}
+        config = {"configurable": {
+            "emit": emit,
+            "prefetch": prefetch,
+            "reuse": {normalize_tool_name(c.name): c for c in reuse or []},
+            "reused": [],
+            "known": {},
+        }}
+        try:
+            # Every search, scrape and LLM call below gets at most the time left
+            with resilience.deadline(self.deadline):
+                result = await self.workflow.ainvoke(initial_state, config=config)
+        finally:
+            for task in prefetch.values():
+                task.cancel()
         
         print(f"\n✅ Research complete!\n")
         
-        return ResearchState(**result)
\ No newline at end of file
+        return ResearchState(**{
+            **result,
+            "reused_tools": config["configurable"]["reused"],
+            "known_tools": config["configurable"]["known"]
+        })
+    
+    async def run_batch(
+        self,
+        queries: List[str],
+        slots: Optional[asyncio.Semaphore] = None
+    ) -> AsyncIterator[Tuple[int, ResearchState]]:
+        """Research many queries, researching each distinct tool only once.
+        
+        Tools are extracted for every query first. The union of their tools
+        is then researched in groups, and each query's recommendations are
+        written as soon as all of its tools are done. Yields (index into
+        queries, final state) in completion order. slots caps concurrent
+        extraction, research and recommendation steps; pass a shared one to
+        cap several batches together.
+        """
+        slots = slots or asyncio.Semaphore(self.max_concurrency)
+        
+        async def extract(query: str) -> ResearchState:
+            async with slots:
+                try:
+                    with resilience.deadline(self.deadline):
+                        update = await self._extract_tools_node(ResearchState(query=query), None)
+                    return ResearchState(query=query, **update)
+                except Exception as e:
+                    print(f"❌ Extraction failed for '{query}': {e}")
+                    return ResearchState(query=query, error=str(e))
+        
+        states = await asyncio.gather(*(extract(q) for q in queries))
+        
+        # One future per distinct tool, shared by every query that mentions it
+        loop = asyncio.get_running_loop()
+        futures: Dict[str, asyncio.Future] = {}
+        names: Dict[str, str] = {}
+        known: Dict[str, float] = {}
+        query_keys: List[List[str]] = []
+        for state in states:
+            keys = []
+            for tool in state.extracted_tools[:RESEARCHED_TOOLS]:
+                key = normalize_tool_name(tool)
+                if not key or key in keys:
+                    continue
+                keys.append(key)
+                if key not in futures:
+                    futures[key] = loop.create_future()
+                    names[key] = tool
+            query_keys.append(keys)
+        
+        mentions = sum(len(keys) for keys in query_keys)
+        print(f"🧮 Batch: {len(queries)} queries, {mentions} tool mentions, {len(futures)} distinct tools")
+        
+        async def research_group(keys: List[str]):
+            companies: Dict[int, CompanyInfo] = {}
+            try:
+                async with slots:
+                    with resilience.deadline(self.deadline):
+                        companies = await self.research_tools_by_index([names[k] for k in keys], known=known)
+            except Exception as e:
+                print(f"❌ Batch research failed for {[names[k] for k in keys]}: {e}")
+            finally:
+                for index, key in enumerate(keys):
+                    if not futures[key].done():
+                        futures[key].set_result(companies.get(index))
+        
+        async def finish(index: int) -> Tuple[int, ResearchState]:
+            state = states[index]
+            found = await asyncio.gather(*(futures[k] for k in query_keys[index]))
+            state.companies = [c for c in found if c is not None]
+            state.known_tools = {c.name: known[c.name] for c in state.companies if c.name in known}
+            async with slots:
+                with resilience.deadline(self.deadline):
+                    update = await self._analyze_node(state, None)
+            state.analysis = update["analysis"]
+            return index, state
+        
+        # Groups the size of one normal request keep batch analysis prompts small
+        keys = list(futures)
+        size = self.max_concurrency
+        tasks = [asyncio.create_task(research_group(keys[i:i + size])) for i in range(0, len(keys), size)]
+        finishers = [asyncio.create_task(finish(i)) for i in range(len(queries))]
+        tasks += finishers
+        try:
+            for done in asyncio.as_completed(finishers):
+                yield await done
+        finally:
+            # The caller stopped reading (client disconnected)
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,162 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from src.backends import BackendSelector, MIN_SAMPLES
+
+
+def good(content: Optional[str]) -> bool:
+    return bool(content)
+
+
+def backend(calls: List[str], name: str, content: Optional[str], delay: float = 0.0, error: bool = False):
+    async def fetch() -> Optional[str]:
+        calls.append(name)
+        await asyncio.sleep(delay)
+        if error:
+            raise RuntimeError(f"{name} is down")
+        return content
+    return fetch
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        BackendSelector(strategy="parallel")
+
+
+def test_fallback_tries_backends_in_order_until_one_is_good():
+    selector = BackendSelector(strategy="fallback")
+    calls: List[str] = []
+    content = asyncio.run(selector.scrape("example.com", {
+        "http": backend(calls, "http", None, error=True),
+        "firecrawl": backend(calls, "firecrawl", "rendered"),
+    }, good))
+
+    assert content == "rendered"
+    assert calls == ["http", "firecrawl"]
+    assert selector.stats()["wins"] == {"firecrawl": 1}
+    assert selector.stats()["failures"] == {"http": 1}
+
+
+def test_fallback_stops_at_the_first_good_page():
+    selector = BackendSelector(strategy="fallback")
+    calls: List[str] = []
+    content = asyncio.run(selector.scrape("example.com", {
+        "http": backend(calls, "http", "static"),
+        "firecrawl": backend(calls, "firecrawl", "rendered"),
+    }, good))
+
+    assert content == "static"
+    assert calls == ["http"]
+
+
+def test_rejected_content_is_a_failure():
+    selector = BackendSelector(strategy="fallback")
+    calls: List[str] = []
+    content = asyncio.run(selector.scrape("example.com", {
+        "http": backend(calls, "http", "<div id=root></div>"),
+        "firecrawl": backend(calls, "firecrawl", "rendered"),
+    }, lambda c: c == "rendered"))
+
+    assert content == "rendered"
+    assert selector.stats()["failures"] == {"http": 1}
+
+
+def test_nothing_good_returns_none():
+    selector = BackendSelector(strategy="fallback")
+    calls: List[str] = []
+    content = asyncio.run(selector.scrape("example.com", {
+        "http": backend(calls, "http", ""),
+        "firecrawl": backend(calls, "firecrawl", None),
+    }, good))
+
+    assert content is None
+    assert selector.stats()["wins"] == {}
+
+
+def test_order_learns_per_host():
+    selector = BackendSelector(strategy="fallback")
+    calls: List[str] = []
+    backends = {
+        "http": backend(calls, "http", None),
+        "firecrawl": backend(calls, "firecrawl", "rendered"),
+    }
+
+    async def run():
+        for _ in range(MIN_SAMPLES):
+            await selector.scrape("spa.example.com", backends, good)
+
+    asyncio.run(run())
+    assert selector.order("spa.example.com", ["http", "firecrawl"]) == ["firecrawl", "http"]
+    # Another host keeps the configured order until it has data of its own
+    assert selector.order("static.example.com", ["http", "firecrawl"]) == ["http", "firecrawl"]
+
+
+def test_race_keeps_the_first_good_result_and_cancels_the_rest():
+    selector = BackendSelector(strategy="race")
+    calls: List[str] = []
+    content = asyncio.run(selector.scrape("example.com", {
+        "http": backend(calls, "http", "static", delay=0.01),
+        "firecrawl": backend(calls, "firecrawl", "rendered", delay=1.0),
+    }, good))
+
+    assert content == "static"
+    assert sorted(calls) == ["firecrawl", "http"]
+    assert selector.stats()["wins"] == {"http": 1}
+    # The cancelled loser is not recorded against firecrawl
+    assert selector.stats()["failures"] == {}
+
+
+def test_race_waits_past_a_fast_bad_result():
+    selector = BackendSelector(strategy="race")
+    calls: List[str] = []
+    content = asyncio.run(selector.scrape("example.com", {
+        "http": backend(calls, "http", None),
+        "firecrawl": backend(calls, "firecrawl", "rendered", delay=0.05),
+    }, good))
+
+    assert content == "rendered"
+    assert selector.stats()["wins"] == {"firecrawl": 1}
+
+
+def test_race_benches_a_failing_backend_until_the_others_fail():
+    selector = BackendSelector(strategy="race")
+    calls: List[str] = []
+    backends = {
+        "http": backend(calls, "http", None),
+        "firecrawl": backend(calls, "firecrawl", "rendered"),
+    }
+
+    async def run():
+        for _ in range(MIN_SAMPLES):
+            await selector.scrape("spa.example.com", backends, good)
+
+    asyncio.run(run())
+    calls.clear()
+    content = asyncio.run(selector.scrape("spa.example.com", backends, good))
+    assert content == "rendered"
+    assert calls == ["firecrawl"]
+
+
+def test_host_stats_are_bounded_and_keep_recent_hosts():
+    selector = BackendSelector(strategy="fallback", max_hosts=2)
+    calls: List[str] = []
+    backends = {
+        "http": backend(calls, "http", None),
+        "firecrawl": backend(calls, "firecrawl", "rendered"),
+    }
+
+    async def learn(host: str):
+        for _ in range(MIN_SAMPLES):
+            await selector.scrape(host, backends, good)
+
+    asyncio.run(learn("a.com"))
+    asyncio.run(learn("b.com"))
+    # a.com was used last, so b.com is the one dropped for c.com
+    selector.order("a.com", ["http", "firecrawl"])
+    selector.order("c.com", ["http", "firecrawl"])
+
+    assert selector.stats()["hosts"] == 2
+    assert selector.order("a.com", ["http", "firecrawl"]) == ["firecrawl", "http"]
+    assert selector.order("b.com", ["http", "firecrawl"]) == ["http", "firecrawl"]
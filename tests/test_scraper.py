@@ -0,0 +1,108 @@
+import asyncio
+import time
+from typing import Optional, Tuple
+
+import pytest
+
+from benchmarks.fakes import FakeServers, FakeConfig
+from src.backends import BackendSelector
+from src.extract import markdown_links, markdown_names
+from src.scraper import ScraperService, Page
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    """Start the local stand-ins for vendor sites and the Firecrawl API"""
+    started = []
+
+    def start(js_rate: float, firecrawl_latency: float = 0.05) -> FakeServers:
+        servers = FakeServers(FakeConfig(
+            site_latency=0.02, firecrawl_latency=firecrawl_latency, jitter=0.0, js_rate=js_rate
+        ))
+        servers.start()
+        started.append(servers)
+        monkeypatch.setenv("FIRECRAWL_API_KEY", "fake")
+        monkeypatch.setenv("FIRECRAWL_API_URL", servers.url("firecrawl"))
+        return servers
+
+    yield start
+    for servers in started:
+        servers.stop()
+
+
+def scrape(url: str, strategy: str) -> Tuple[Optional[Page], BackendSelector]:
+    async def run():
+        selector = BackendSelector(strategy=strategy)
+        scraper = ScraperService(selector=selector)
+        try:
+            return await scraper.scrape_page(url), selector
+        finally:
+            await scraper.http.aclose()
+    return asyncio.run(run())
+
+
+def firecrawl_requests(servers: FakeServers) -> int:
+    return servers.recorder.snapshot().get("firecrawl", {}).get("requests", 0)
+
+
+def test_fallback_reads_static_sites_without_firecrawl(fakes):
+    servers = fakes(js_rate=0.0)
+    page, selector = scrape(f"{servers.url('sites')}/site/neon/", "fallback")
+
+    assert page is not None and "Neon" in page.content
+    assert selector.stats()["wins"] == {"http": 1}
+    assert firecrawl_requests(servers) == 0
+
+
+def test_fallback_renders_javascript_sites_with_firecrawl(fakes):
+    servers = fakes(js_rate=1.0)
+    site = f"{servers.url('sites')}/site/neon"
+    page, selector = scrape(site + "/", "fallback")
+
+    assert page is not None and page.content.startswith("# Neon")
+    assert page.links == {f"{site}/pricing": "Pricing", f"{site}/docs": "Docs"}
+    assert page.names == ("Neon",)
+    assert selector.stats()["wins"] == {"firecrawl": 1}
+    # The JavaScript shell was tried first and rejected
+    assert selector.stats()["failures"] == {"http": 1}
+
+
+def test_race_keeps_the_fast_static_page_and_cancels_firecrawl(fakes):
+    servers = fakes(js_rate=0.0, firecrawl_latency=2.0)
+    start = time.perf_counter()
+    page, selector = scrape(f"{servers.url('sites')}/site/neon/", "race")
+
+    assert page is not None and "Neon" in page.content
+    assert time.perf_counter() - start < 1.5
+    assert selector.stats()["wins"] == {"http": 1}
+    # The cancelled request is not held against Firecrawl
+    assert selector.stats()["failures"] == {}
+
+
+def test_race_waits_for_firecrawl_on_javascript_sites(fakes):
+    servers = fakes(js_rate=1.0)
+    page, selector = scrape(f"{servers.url('sites')}/site/neon/", "race")
+
+    assert page is not None and page.content.startswith("# Neon")
+    assert selector.stats()["wins"] == {"firecrawl": 1}
+
+
+def test_firecrawl_service_scrapes_markdown(fakes, monkeypatch):
+    servers = fakes(js_rate=1.0)
+    monkeypatch.setenv("SCRAPE_MAX_CHARS", "40")
+    from src.firecrawl import FirecrawlService
+
+    markdown = asyncio.run(FirecrawlService().scrape(f"{servers.url('sites')}/site/neon/"))
+    assert markdown.startswith("# Neon")
+    assert len(markdown) == 40
+
+
+def test_markdown_links_and_names():
+    markdown = (
+        "# Acme\n\nSee [Pricing](https://acme.dev/pricing#plans), [docs](https://acme.dev/docs) "
+        "and [the blog](/blog).\n\n## Features\n"
+    )
+    # Fragments are dropped and relative links (no base URL to resolve them) skipped
+    assert markdown_links(markdown) == {"https://acme.dev/pricing": "Pricing", "https://acme.dev/docs": "docs"}
+    assert markdown_names(markdown) == ["Acme"]
+    assert markdown_links("") == {} and markdown_names("no heading") == []
@@ -0,0 +1,66 @@
+import asyncio
+from typing import List
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.fakes import FakeServers
+from src.search import SearchService
+
+
+def tavily(statuses: List[int], seen: List[dict]) -> FastAPI:
+    """Tavily stand-in answering with statuses in turn, then 200"""
+    app = FastAPI()
+
+    @app.post("/search")
+    async def search(request: Request):
+        seen.append(await request.json())
+        status = statuses.pop(0) if statuses else 200
+        if status != 200:
+            return JSONResponse({"detail": {"error": f"status {status}"}}, status_code=status, headers={"Retry-After": "0"})
+        return {"results": [{"title": "Neon", "url": "https://neon.tech/", "content": "Serverless Postgres"}]}
+
+    return app
+
+
+@pytest.fixture
+def service(monkeypatch):
+    def start(statuses: List[int], seen: List[dict]) -> SearchService:
+        servers = FakeServers(extra_apps={"tavily": tavily(statuses, seen)})
+        servers.start()
+        started.append(servers)
+        monkeypatch.setenv("TAVILY_API_KEY", "fake")
+        monkeypatch.setenv("TAVILY_API_BASE_URL", servers.url("tavily"))
+        monkeypatch.setenv("SEARCH_RETRIES", "2")
+        return SearchService()
+
+    started: List[FakeServers] = []
+    yield start
+    for servers in started:
+        servers.stop()
+
+
+def test_rate_limit_is_retried(service):
+    seen: List[dict] = []
+    search = service([429], seen)
+    results = asyncio.run(search.search("neon official website", max_results=1))
+
+    assert [r.url for r in results] == ["https://neon.tech/"]
+    assert len(seen) == 2
+    assert search.breaker.state == "closed"
+
+
+@pytest.mark.parametrize("status", [432, 433])
+def test_spent_plan_opens_the_breaker_without_retrying(service, status):
+    seen: List[dict] = []
+    search = service([status], seen)
+    try:
+        assert asyncio.run(search.search("neon official website")) == []
+        assert len(seen) == 1
+        assert search.breaker.state == "open"
+        # Later searches skip Tavily until the breaker resets
+        assert asyncio.run(search.search("neon official website")) == []
+        assert len(seen) == 1
+    finally:
+        search.breaker.record_success()